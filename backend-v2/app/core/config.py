@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -11,9 +13,129 @@ class Settings(BaseSettings):
     APP_NAME: str = "Master Mind AI"
     APP_VERSION: str = "2.0.0"
     DEBUG: bool = False
+    # A failed memory service startup (e.g. Mem0 briefly down) is retried in
+    # the background, backing off from the initial delay up to the max
+    STARTUP_RETRY_INITIAL_SECONDS: float = 1.0
+    STARTUP_RETRY_MAX_SECONDS: float = 60.0
+
+    # Logging: level, "text" (key=value) or "json" lines, and the share of
+    # high-volume per-stage events that are kept
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    LOG_SAMPLE_RATE: float = 1.0
 
     MEM0_API_KEY: str
+    MEM0_HOST: str = "https://api.mem0.ai"
+    MEM0_MAX_CONNECTIONS: int = 200
+    MEM0_TIMEOUT_SECONDS: float = 10.0
     OPENAI_API_KEY: str | None = None
+    # OpenAI-compatible endpoint override (proxies, local stand-ins); None uses the SDK default
+    OPENAI_BASE_URL: Optional[str] = None
+    OPENAI_TIMEOUT_SECONDS: float = 10.0
+    # Count prompt/cached tokens from completion usage (adds usage to streams).
+    # OpenAI caches prefixes from 1024 tokens; the shared prefix is the ~110-token
+    # system prompt plus up to CONTEXT_TOKEN_BUDGET of context, so at the default
+    # budget nothing is cached
+    OPENAI_RECORD_CACHED_TOKENS: bool = False
+
+    # Per-request latency budget for enhancement (EnhanceRequest.deadline_ms
+    # overrides it); retrieval gets ENHANCE_SEARCH_BUDGET_FRACTION of it and
+    # the completion the rest
+    ENHANCE_DEADLINE_SECONDS: float = 8.0
+    ENHANCE_SEARCH_BUDGET_FRACTION: float = 0.5
+    # Cap for a single Mem0 search strategy so its fallbacks still get a turn (0 disables)
+    SEARCH_STRATEGY_TIMEOUT_SECONDS: float = 2.0
+
+    # Upstream protection: consecutive failures that open a breaker, how long
+    # it stays open before a half-open probe, and AIMD concurrency limits
+    # (start at the max, shrink on errors/latency above target)
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RECOVERY_SECONDS: float = 15.0
+    UPSTREAM_CONCURRENCY_MIN: int = 2
+    MEM0_CONCURRENCY_MAX: int = 100
+    MEM0_LATENCY_TARGET_SECONDS: float = 1.0
+    OPENAI_CONCURRENCY_MAX: int = 50
+    OPENAI_LATENCY_TARGET_SECONDS: float = 3.0
+
+    # Strategy execution: "sequential", "parallel" or "hedged"
+    SEARCH_STRATEGY_MODE: Literal["sequential", "parallel", "hedged"] = "sequential"
+    SEARCH_HEDGE_DELAY_SECONDS: float = 0.25
+
+    # Batch endpoints: unique items processed at once per request
+    BATCH_MAX_CONCURRENCY: int = 8
+
+    # Cache backend: "memory" (per-worker LRU) or "redis" (shared across workers)
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_KEY_PREFIX: str = "mastermind"
+    CACHE_MAX_ENTRIES: int = 2048
+
+    # Per-use cache TTLs (0 disables that cache)
+    SEARCH_CACHE_TTL_SECONDS: float = 30.0
+    ENHANCE_CACHE_TTL_SECONDS: float = 5.0
+    # Also the refresh interval of the user → app_id index
+    ENTITIES_CACHE_TTL_SECONDS: float = 60.0
+    # Apps each user wrote through this worker, shown before the Entities
+    # snapshot lists them: kept for the TTL after the user's last write, for
+    # at most this many users (least recently written dropped first)
+    APP_INDEX_USER_TTL_SECONDS: float = 3600.0
+    APP_INDEX_MAX_USERS: int = 10000
+    # Near-duplicate reuse (per worker): a search or enhancement missing the
+    # exact cache reuses the result of a prompt at least this similar (SimHash
+    # bit agreement, 0-1; above 1 disables) in the same user/app scope, for as
+    # long as the exact cache would keep it. Candidates must also have the same
+    # words up to typos, so the threshold only pre-filters: 0.8 keeps ~94% of
+    # one-typo pairs. Memory: scopes x entries per scope
+    NEAR_DUPLICATE_THRESHOLD: float = 0.8
+    NEAR_DUPLICATE_MAX_SCOPES: int = 4096
+    NEAR_DUPLICATE_MAX_PER_SCOPE: int = 16
+    # Typing sessions (enhancements sharing user_id + run_id): a prompt
+    # extending the session's last searched prompt reuses its retrieval unless
+    # it adds this many content words absent from that prompt and its context
+    # (0 disables). A retrieval is reused for at most the TTL after its search
+    SESSION_NEW_TERMS_RESEARCH: int = 2
+    SESSION_CONTEXT_TTL_SECONDS: float = 120.0
+    SESSION_CONTEXT_MAX_SESSIONS: int = 10000
+
+    # Write-behind queue for Mem0 adds (assignment seeds)
+    WRITE_QUEUE_FLUSH_INTERVAL_SECONDS: float = 0.5
+    WRITE_QUEUE_MAX_BATCH: int = 20
+    WRITE_QUEUE_MAX_RETRIES: int = 4
+    WRITE_QUEUE_BACKOFF_SECONDS: float = 0.5
+    WRITE_QUEUE_MAX_DEPTH: int = 10000
+    # Batches written to Mem0 at once; a batch backing off frees its slot
+    WRITE_QUEUE_MAX_CONCURRENT_FLUSHES: int = 8
+    WRITE_QUEUE_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+
+    # Per-user GraphMemory relation index: how long a relation stays usable
+    # after Mem0 last returned it, the per-user cap, and relations per
+    # context bucket (work/assignment/project) for app-scoped context
+    RELATION_INDEX_TTL_SECONDS: float = 600.0
+    RELATION_INDEX_MAX_PER_USER: int = 5000
+    RELATION_CONTEXT_LIMIT: int = 20
+    # Token budget for the context sent to OpenAI, filled with the segments
+    # most relevant to the prompt (0 sends everything). Counted with tiktoken
+    # in this encoding when installed, else ~4 chars/token
+    CONTEXT_TOKEN_BUDGET: int = 400
+    CONTEXT_TOKEN_ENCODING: str = "o200k_base"
+    # Words listed in the completion's vocabulary whitelist, most relevant first
+    VOCABULARY_TOP_K: int = 50
+    # Answer "X is" prompts from the retrieved relations and memories without
+    # calling OpenAI when the rule-based completer is at least this confident
+    LOCAL_COMPLETION_ENABLED: bool = True
+    LOCAL_COMPLETION_MIN_CONFIDENCE: float = 0.7
+    # Optional JSON file of relation → sentence templates, keyed
+    # "relationship" or "relationship:target_type" (see context_templates.py)
+    CONTEXT_TEMPLATES_PATH: Optional[str] = None
+
+    # Local memory tier mirroring add_memory writes (SQLite + in-process vector
+    # index): "fallback" searches it when Mem0 finds nothing, fails or its
+    # breaker is open; "first" tries it before Mem0. The index is per worker:
+    # writes made through other workers are searchable only after a restart
+    LOCAL_STORE_MODE: Literal["off", "fallback", "first"] = "off"
+    LOCAL_STORE_PATH: str = "data/local_memories.sqlite3"
+    # Minimum cosine similarity for a local hit
+    LOCAL_STORE_MIN_SCORE: float = 0.2
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,19 @@
+"""FastAPI dependencies shared across routers."""
+
+from __future__ import annotations
+
+from fastapi import HTTPException, Request
+
+from app.services.memory import AsyncMemoryService
+
+
+def get_memory_service(request: Request) -> AsyncMemoryService:
+    """Return the process-wide memory service built in the lifespan hook."""
+
+    service = getattr(request.app.state, "memory_service", None)
+    if service is None or not service.ready:
+        raise HTTPException(status_code=503, detail="Memory service unavailable")
+    return service
+
+
+__all__ = ["get_memory_service"]
@@ -0,0 +1,153 @@
+"""Structured, lazily formatted logging for request hot paths.
+
+Call sites log an event name plus keyword fields instead of pre-rendered
+f-strings. Nothing is formatted unless the level is enabled: fields travel on
+the ``LogRecord`` and are rendered by the formatter (``key=value`` text or
+JSON lines). Large payloads go through :meth:`StructuredLogger.payload`, which
+only runs at DEBUG, and high-volume events can be sampled.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+# LogRecord attributes carrying our structured data
+_EVENT_ATTR = "event"
+_FIELDS_ATTR = "fields"
+
+_PAYLOAD_MAX_CHARS = 4000
+
+# Share of sampled events that are emitted; set by configure_logging()
+_sample_rate = 1.0
+
+
+def _render(value: Any) -> Any:
+    """Resolve lazy values: callables are invoked only when the record is emitted."""
+    return value() if callable(value) else value
+
+
+class StructuredLogger:
+    """Thin wrapper over a stdlib logger that logs ``event`` + fields."""
+
+    def __init__(self, name: str) -> None:
+        self._logger = logging.getLogger(name)
+
+    @property
+    def logger(self) -> logging.Logger:
+        return self._logger
+
+    def isEnabledFor(self, level: int) -> bool:  # noqa: N802 - mirror logging.Logger
+        return self._logger.isEnabledFor(level)
+
+    def log(self, level: int, event: str, *, exc_info: Any = None, **fields: Any) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        self._logger.log(
+            level,
+            event,
+            exc_info=exc_info,
+            extra={_EVENT_ATTR: event, _FIELDS_ATTR: fields},
+            stacklevel=3,
+        )
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self.log(logging.ERROR, event, **fields)
+
+    def sampled(self, event: str, *, level: int = logging.INFO, **fields: Any) -> None:
+        """Log a high-volume event for roughly ``LOG_SAMPLE_RATE`` of calls."""
+        if _sample_rate < 1.0 and random.random() >= _sample_rate:
+            return
+        self.log(level, event, **fields)
+
+    def payload(self, event: str, **payloads: Any) -> None:
+        """Dump large request/response bodies; a no-op unless DEBUG is enabled.
+
+        Values may be zero-argument callables so even building the payload is
+        skipped when DEBUG is off.
+        """
+        if not self._logger.isEnabledFor(logging.DEBUG):
+            return
+        self.log(logging.DEBUG, event, **payloads)
+
+
+class _StructuredFormatterMixin:
+    @staticmethod
+    def fields(record: logging.LogRecord) -> Dict[str, Any]:
+        return {k: _render(v) for k, v in getattr(record, _FIELDS_ATTR, {}).items()}
+
+
+class KeyValueFormatter(_StructuredFormatterMixin, logging.Formatter):
+    """Human-readable ``event key=value ...`` lines (the default)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = self.fields(record)
+        if not fields:
+            return line
+        rendered = " ".join(f"{key}={self._value(value)}" for key, value in fields.items())
+        return f"{line} {rendered}"
+
+    @staticmethod
+    def _value(value: Any) -> str:
+        text = value if isinstance(value, str) else repr(value)
+        if len(text) > _PAYLOAD_MAX_CHARS:
+            text = f"{text[:_PAYLOAD_MAX_CHARS]}…(+{len(text) - _PAYLOAD_MAX_CHARS} chars)"
+        return json.dumps(text) if " " in text or not text else text
+
+
+class JsonFormatter(_StructuredFormatterMixin, logging.Formatter):
+    """One JSON object per line for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, _EVENT_ATTR, None) or record.getMessage(),
+        }
+        entry.update(self.fields(record))
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(level: str = "INFO", fmt: str = "text", sample_rate: float = 1.0) -> None:
+    """Install the root handler for ``LOG_FORMAT`` ("text" or "json")."""
+    global _sample_rate
+    _sample_rate = min(max(sample_rate, 0.0), 1.0)
+    handler = logging.StreamHandler()
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            KeyValueFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        )
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper())
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(name)
+
+
+__all__ = [
+    "JsonFormatter",
+    "KeyValueFormatter",
+    "StructuredLogger",
+    "configure_logging",
+    "get_logger",
+]
@@ -0,0 +1,222 @@
+"""In-process latency histograms and counters rendered in Prometheus text format.
+
+Deliberately tiny: the service runs on a single event loop per worker, so
+metric updates need no locking and no client library. Values are per worker
+process; scrape each worker (or run one) when using several uvicorn workers.
+"""
+
+from __future__ import annotations
+
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Seconds; spans cache hits (~1 ms) through slow completions (~10 s)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally labelled."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram with ``_bucket``/``_sum``/``_count`` series."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last slot is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall time of the ``with`` block, even when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders the Prometheus exposition text."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+ENHANCE_STAGE_SECONDS = registry.histogram(
+    "mastermind_enhance_stage_seconds",
+    "Latency of enhancement pipeline stages (cleanup, context, local, openai, guardrails, total).",
+    ["stage"],
+)
+SEARCH_STRATEGY_SECONDS = registry.histogram(
+    "mastermind_search_strategy_seconds",
+    "Latency of Mem0 searches per strategy and outcome (hit, empty, error).",
+    ["strategy", "outcome"],
+)
+STRATEGY_SELECTED = registry.counter(
+    "mastermind_search_strategy_selected_total",
+    "Enhancements by the search strategy whose results were used ('none' if no strategy found memories).",
+    ["strategy"],
+)
+SEARCH_FALLBACKS = registry.counter(
+    "mastermind_search_fallbacks_total",
+    "Strategies that came back empty or failed and fell through to the next one (or to no context).",
+    ["strategy"],
+)
+CACHE_LOOKUPS = registry.counter(
+    "mastermind_cache_lookups_total",
+    "Cache lookups by cache namespace and result (hit, miss, error, coalesced, near_hit, near_miss).",
+    ["cache", "result"],
+)
+OPENAI_FAILURES = registry.counter(
+    "mastermind_openai_failures_total",
+    "OpenAI completion failures by kind (request, stream, bad_response, empty).",
+    ["kind"],
+)
+OPENAI_PROMPT_TOKENS = registry.counter(
+    "mastermind_openai_prompt_tokens_total",
+    "OpenAI prompt tokens by kind: all prompt tokens, and those served from the prompt cache (cached).",
+    ["kind"],
+)
+ENHANCE_ENGINE = registry.counter(
+    "mastermind_enhance_engine_total",
+    "Enhancements by what produced the completion (local, openai, none).",
+    ["engine"],
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+__all__ = [
+    "CACHE_LOOKUPS",
+    "Counter",
+    "DEFAULT_BUCKETS",
+    "ENHANCE_ENGINE",
+    "ENHANCE_STAGE_SECONDS",
+    "Histogram",
+    "MetricsRegistry",
+    "OPENAI_FAILURES",
+    "OPENAI_PROMPT_TOKENS",
+    "PROMETHEUS_CONTENT_TYPE",
+    "SEARCH_FALLBACKS",
+    "SEARCH_STRATEGY_SECONDS",
+    "STRATEGY_SELECTED",
+    "registry",
+]
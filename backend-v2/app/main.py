@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-import logging
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -10,24 +10,67 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.core.exceptions import setup_exception_handlers
-from app.routers import assignments, enhancement, health, memories, users
+from app.core.logging import configure_logging, get_logger
+from app.routers import assignments, enhancement, health, memories, metrics, users
+from app.services.memory import AsyncMemoryService
 
-# Configure logging to show INFO level
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_SAMPLE_RATE)
+
+logger = get_logger(__name__)
+
+async def _start_memory_service(attempt: int) -> AsyncMemoryService | None:
+    """Build and start the memory service; None (logged) when either step fails."""
+    service: AsyncMemoryService | None = None
+    try:
+        service = AsyncMemoryService()
+        await service.startup()
+        return service
+    except Exception as exc:
+        logger.error("memory_service.start_failed", error=str(exc), attempt=attempt)
+        if service is not None:
+            await service.aclose()
+        return None
+    except asyncio.CancelledError:
+        # Shutdown while a retry was starting up
+        if service is not None:
+            await service.aclose()
+        raise
+
+
+async def _retry_memory_service(app: FastAPI) -> None:
+    """Retry startup with exponential backoff until the service comes up."""
+    delay = settings.STARTUP_RETRY_INITIAL_SECONDS
+    attempt = 1
+    while app.state.memory_service is None:
+        logger.info("memory_service.retry_scheduled", attempt=attempt + 1, delay_s=delay)
+        await asyncio.sleep(delay)
+        attempt += 1
+        app.state.memory_service = await _start_memory_service(attempt)
+        delay = min(delay * 2, settings.STARTUP_RETRY_MAX_SECONDS)
+    logger.info("memory_service.started", attempt=attempt)
 
-logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Run startup and shutdown hooks."""
-    logger.info("🚀 Starting Master Mind AI FastAPI server")
+    logger.info("server.starting", version=settings.APP_VERSION)
+    app.state.memory_service = await _start_memory_service(attempt=1)
+    retry: asyncio.Task | None = None
+    if app.state.memory_service is None:
+        # Keep /health reachable; memory-backed routes answer 503 until a retry succeeds
+        retry = asyncio.create_task(_retry_memory_service(app))
     try:
         yield
     finally:
-        logger.info("🛑 Shutting down Master Mind AI server")
+        if retry is not None:
+            retry.cancel()
+            try:
+                await retry
+            except asyncio.CancelledError:
+                pass
+        if app.state.memory_service is not None:
+            await app.state.memory_service.aclose()
+        logger.info("server.stopped")
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -47,6 +90,7 @@ app.add_middleware(
 setup_exception_handlers(app)
 
 app.include_router(health.router, prefix="/api/v1")
+app.include_router(metrics.router, prefix="/api/v1")
 app.include_router(users.router, prefix="/api/v1")
 app.include_router(assignments.router, prefix="/api/v1")
 app.include_router(enhancement.router, prefix="/api/v1")
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -15,6 +15,7 @@ class UserRequest(BaseModel):
 class AppIdsResponse(BaseModel):
     """Response wrapper returning app identifiers for a user."""
     app_ids: List[str]
+    app_counts: Dict[str, int] = Field(default_factory=dict, description="Memory count per app_id")
 
 class AssignmentCreateRequest(BaseModel):
     """Payload for creating an assignment namespace."""
@@ -45,18 +46,68 @@ class EnhanceRequest(BaseModel):
         description="App ID (3-50 chars, letters/numbers/underscore/hyphen allowed)"
     )
     run_id: Optional[str] = None
+    deadline_ms: Optional[int] = Field(
+        None,
+        ge=100,
+        le=60000,
+        description="Latency budget for this request; defaults to ENHANCE_DEADLINE_SECONDS",
+    )
 
 class EnhanceResponse(BaseModel):
     """Enhanced prompt response."""
     enhanced_prompt: str
     memories_used: int
     processing_time: float
+    strategy_used: str = "none"
+    graph_enabled: bool = False
+    time_saved: float = Field(0.0, description="Seconds saved by concurrent/hedged strategy search")
+    cache_hit: bool = False
+    timed_out_stage: Optional[str] = Field(
+        None, description="Stage cut off by the deadline ('search' or 'completion'); output is degraded"
+    )
+    circuit_open: Optional[str] = Field(
+        None, description="Upstream whose circuit breaker was open ('mem0' or 'openai'); output is the cleaned prompt"
+    )
+    engine: str = Field(
+        "none",
+        description="What completed the prompt: 'local' (rule-based, no model call), 'openai', or 'none' (cleaned prompt only)",
+    )
+    session_reused: bool = Field(
+        False, description="Context reused from an earlier prompt this one extends (same run_id); no Mem0 search"
+    )
+
+class EnhanceBatchRequest(BaseModel):
+    """Batch of enhancement requests processed in one call."""
+    items: List[EnhanceRequest] = Field(..., min_length=1, max_length=100)
+
+class EnhanceBatchItem(BaseModel):
+    """Outcome for one item of an enhancement batch."""
+    index: int
+    result: Optional[EnhanceResponse] = None
+    error: Optional[str] = None
+    processing_time: float
+    deduplicated: bool = False
+
+class EnhanceBatchResponse(BaseModel):
+    """Per-item enhancement results, in request order."""
+    results: List[EnhanceBatchItem]
+    processing_time: float
+
+class UpstreamStatus(BaseModel):
+    """Circuit breaker and concurrency limiter state for one upstream API."""
+    state: str
+    consecutive_failures: int
+    times_opened: int
+    retry_in_seconds: float
+    concurrency_limit: int
+    in_flight: int
 
 class HealthResponse(BaseModel):
     """Service health report."""
     status: str
     service: str
     timestamp: datetime
+    upstreams: Optional[Dict[str, UpstreamStatus]] = None
 
 class MemoryMetadata(BaseModel):
     """Metadata attached to a memory result."""
@@ -89,16 +140,107 @@ class MemorySearchResponse(BaseModel):
     """Response payload for memory search."""
     results: List[MemoryResult]
 
+class MemorySearchBatchRequest(BaseModel):
+    """Batch of memory searches processed in one call."""
+    items: List[MemorySearchRequest] = Field(..., min_length=1, max_length=100)
+
+class MemorySearchBatchItem(BaseModel):
+    """Outcome for one item of a search batch."""
+    index: int
+    result: Optional[MemorySearchResponse] = None
+    error: Optional[str] = None
+    processing_time: float
+    deduplicated: bool = False
+
+class MemorySearchBatchResponse(BaseModel):
+    """Per-item search results, in request order."""
+    results: List[MemorySearchBatchItem]
+    processing_time: float
+
+class CacheStats(BaseModel):
+    """Hit/miss counters for a single cache namespace (this worker only)."""
+    hits: int
+    misses: int
+    errors: int = 0
+    ttl_seconds: float
+    hit_rate: float
+    coalesced: int = 0
+
+class LocalStoreStats(BaseModel):
+    """Size and search counters of the local memory tier (this worker only)."""
+    mode: str
+    path: str
+    users: int
+    memories: int
+    searches: int
+    hits: int
+
+class RelationIndexStats(BaseModel):
+    """Size and usage counters of the GraphMemory relation index (this worker only)."""
+    users: int
+    relations: int
+    ingested: int
+    lookups: int
+
+class NearDuplicateStats(BaseModel):
+    """Counters and size of a near-duplicate index (this worker only)."""
+    hits: int
+    misses: int
+    evictions: int
+    scopes: int
+    entries: int
+    threshold: float
+    ttl_seconds: float
+    hit_rate: float
+
+class CacheStatsResponse(BaseModel):
+    """Cache backend details and counters for every cache namespace."""
+    backend: str
+    size: Optional[int] = None
+    max_entries: Optional[int] = None
+    evictions: Optional[int] = None
+    caches: Dict[str, CacheStats]
+    near_duplicate: Optional[Dict[str, NearDuplicateStats]] = None
+    relation_index: Optional[RelationIndexStats] = None
+    local_store: Optional[LocalStoreStats] = None
+
+class WriteQueueStatusResponse(BaseModel):
+    """Depth, lag and counters of the Mem0 write-behind queue (this worker only)."""
+    running: bool
+    depth: int
+    pending_batches: int
+    in_flight_batches: int
+    lag_seconds: float
+    enqueued: int
+    flushed: int
+    failed: int
+    retries: int
+    dropped: int
+    last_error: Optional[str] = None
+
 __all__ = [
     "AppIdsResponse",
     "AssignmentCreateRequest", 
     "AssignmentResponse",
+    "CacheStats",
+    "CacheStatsResponse",
+    "EnhanceBatchItem",
+    "EnhanceBatchRequest",
+    "EnhanceBatchResponse",
     "EnhanceRequest",
     "EnhanceResponse",
     "HealthResponse",
+    "LocalStoreStats",
     "MemoryMetadata",
     "MemoryResult", 
+    "MemorySearchBatchItem",
+    "MemorySearchBatchRequest",
+    "MemorySearchBatchResponse",
     "MemorySearchRequest",
     "MemorySearchResponse",
+    "NearDuplicateStats",
+    "RelationIndexStats",
+    "UpstreamStatus",
     "UserRequest",
+    "WriteQueueStatusResponse",
 ]
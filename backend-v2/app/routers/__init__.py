@@ -1,11 +1,12 @@
 """Router exports for FastAPI."""
 
-from . import assignments, enhancement, health, memories, users
+from . import assignments, enhancement, health, memories, metrics, users
 
 __all__ = [
     "assignments",
     "enhancement",
     "health",
     "memories",
+    "metrics",
     "users",
 ]
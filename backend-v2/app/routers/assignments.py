@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from app.core.dependencies import get_memory_service
 from app.models import AssignmentCreateRequest, AssignmentResponse
 from app.services.memory import AsyncMemoryService
 
@@ -12,10 +13,12 @@ router = APIRouter(tags=["assignments"])
 
 
 @router.post("/assignments", response_model=AssignmentResponse)
-async def create_assignment(request: AssignmentCreateRequest) -> AssignmentResponse:
+async def create_assignment(
+    request: AssignmentCreateRequest,
+    service: AsyncMemoryService = Depends(get_memory_service),
+) -> AssignmentResponse:
     """Create a lightweight assignment record without touching Mem0."""
 
-    service = AsyncMemoryService()
     assignment = await service.create_assignment(
         user_id=request.user_id,
         app_id=request.app_id,
@@ -2,29 +2,96 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+import json
+import time
+from typing import AsyncIterator
 
-from app.models import EnhanceRequest, EnhanceResponse
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.core.dependencies import get_memory_service
+from app.core.logging import get_logger
+from app.models import (
+    EnhanceBatchItem,
+    EnhanceBatchRequest,
+    EnhanceBatchResponse,
+    EnhanceRequest,
+    EnhanceResponse,
+)
 from app.services.memory import AsyncMemoryService
 
 
+logger = get_logger(__name__)
 router = APIRouter(tags=["enhancement"])
 
 
 @router.post("/prompts/enhance", response_model=EnhanceResponse)
-async def enhance_prompt(request: EnhanceRequest) -> EnhanceResponse:
+async def enhance_prompt(
+    request: EnhanceRequest,
+    service: AsyncMemoryService = Depends(get_memory_service),
+) -> EnhanceResponse:
     """Perform two-stage enhancement for the provided prompt."""
 
-    service = AsyncMemoryService()
     try:
         result = await service.two_stage_enhance(
             prompt=request.prompt,
             user_id=request.user_id,
             app_id=request.app_id,
             run_id=request.run_id,
+            deadline_ms=request.deadline_ms,
         )
         return EnhanceResponse(**result)
     except HTTPException:
         raise
     except Exception as exc:  # pragma: no cover - defensive
         raise HTTPException(status_code=500, detail="Enhancement failed") from exc
+
+
+@router.post("/prompts/enhance:batch", response_model=EnhanceBatchResponse)
+async def enhance_prompts_batch(
+    request: EnhanceBatchRequest,
+    service: AsyncMemoryService = Depends(get_memory_service),
+) -> EnhanceBatchResponse:
+    """Enhance several prompts in one call, deduplicating identical items."""
+
+    start_time = time.time()
+    outcomes = await service.batch_enhance([item.model_dump() for item in request.items])
+    return EnhanceBatchResponse(
+        results=[EnhanceBatchItem(**outcome) for outcome in outcomes],
+        processing_time=round(time.time() - start_time, 3),
+    )
+
+
+@router.post("/prompts/enhance/stream")
+async def enhance_prompt_stream(
+    request: EnhanceRequest,
+    service: AsyncMemoryService = Depends(get_memory_service),
+) -> StreamingResponse:
+    """Stream enhancement as Server-Sent Events.
+
+    Emits ``token`` events with guardrail-filtered completion text as it
+    arrives, then a single ``done`` event carrying the final ``EnhanceResponse``.
+    """
+
+    async def event_source() -> AsyncIterator[str]:
+        try:
+            async for event in service.stream_enhance(
+                prompt=request.prompt,
+                user_id=request.user_id,
+                app_id=request.app_id,
+                run_id=request.run_id,
+                deadline_ms=request.deadline_ms,
+            ):
+                data = event["data"]
+                if event["event"] == "done":
+                    data = EnhanceResponse(**data).model_dump()
+                yield f"event: {event['event']}\ndata: {json.dumps(data)}\n\n"
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.error("enhance.stream_failed", error=str(exc))
+            yield f"event: error\ndata: {json.dumps({'detail': 'Enhancement failed'})}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 from app.models import HealthResponse
 
@@ -13,11 +13,16 @@ router = APIRouter(tags=["health"])
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check() -> HealthResponse:
-    """Return basic service health without external dependencies."""
+async def health_check(request: Request) -> HealthResponse:
+    """Return service health and upstream circuit breaker state without calling upstreams."""
+
+    service = getattr(request.app.state, "memory_service", None)
+    upstreams = service.upstream_status() if service is not None else None
+    degraded = bool(upstreams) and any(up["state"] == "open" for up in upstreams.values())
 
     return HealthResponse(
-        status="healthy",
+        status="degraded" if degraded else "healthy",
         service="master-mind-fastapi",
         timestamp=datetime.utcnow(),
+        upstreams=upstreams,
     )
@@ -2,11 +2,23 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
+import time
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
-from app.models import MemoryMetadata, MemoryResult, MemorySearchRequest, MemorySearchResponse
+from app.core.dependencies import get_memory_service
+from app.models import (
+    CacheStatsResponse,
+    MemoryMetadata,
+    MemoryResult,
+    MemorySearchBatchItem,
+    MemorySearchBatchRequest,
+    MemorySearchBatchResponse,
+    MemorySearchRequest,
+    MemorySearchResponse,
+    WriteQueueStatusResponse,
+)
 from app.services.memory import AsyncMemoryService
 
 
@@ -14,10 +26,12 @@ router = APIRouter(tags=["memories"])
 
 
 @router.post("/memories/search", response_model=MemorySearchResponse)
-async def search_memories(request: MemorySearchRequest) -> MemorySearchResponse:
+async def search_memories(
+    request: MemorySearchRequest,
+    service: AsyncMemoryService = Depends(get_memory_service),
+) -> MemorySearchResponse:
     """Search Mem0 for memories that match the provided query."""
 
-    service = AsyncMemoryService()
     try:
         raw_results = await service.search_memories(
             query=request.query,
@@ -29,6 +43,54 @@ async def search_memories(request: MemorySearchRequest) -> MemorySearchResponse:
     except Exception as exc:  # pragma: no cover - defensive
         raise HTTPException(status_code=500, detail="Memory search failed") from exc
 
+    return _to_search_response(raw_results)
+
+
+@router.post("/memories/search:batch", response_model=MemorySearchBatchResponse)
+async def search_memories_batch(
+    request: MemorySearchBatchRequest,
+    service: AsyncMemoryService = Depends(get_memory_service),
+) -> MemorySearchBatchResponse:
+    """Run several memory searches in one call, deduplicating identical items."""
+
+    start_time = time.time()
+    outcomes = await service.batch_search([item.model_dump() for item in request.items])
+    results = []
+    for outcome in outcomes:
+        if outcome["error"] is None:
+            outcome["result"] = _to_search_response(outcome["result"])
+        results.append(MemorySearchBatchItem(**outcome))
+    return MemorySearchBatchResponse(
+        results=results,
+        processing_time=round(time.time() - start_time, 3),
+    )
+
+
+@router.get("/memories/cache/stats", response_model=CacheStatsResponse)
+async def get_cache_stats(
+    service: AsyncMemoryService = Depends(get_memory_service),
+) -> CacheStatsResponse:
+    """Return hit/miss counters for the memory service caches."""
+
+    return CacheStatsResponse(**service.cache_stats())
+
+
+@router.get("/memories/queue", response_model=WriteQueueStatusResponse)
+async def get_write_queue_status(
+    service: AsyncMemoryService = Depends(get_memory_service),
+) -> WriteQueueStatusResponse:
+    """Return depth and lag of the background Mem0 write queue."""
+
+    return WriteQueueStatusResponse(**service.write_queue_status())
+
+
+def _to_search_response(raw_results: Any) -> MemorySearchResponse:
+    """Convert raw Mem0 search output into the public response model."""
+
+    if isinstance(raw_results, dict):
+        # v2 / graph output: {"results": [...], "relations": [...]}
+        raw_results = raw_results.get("results")
+
     results: List[MemoryResult] = []
     for memory in raw_results or []:
         if not isinstance(memory, dict):
@@ -0,0 +1,18 @@
+"""Prometheus metrics endpoint."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, registry
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Return per-stage latency histograms and counters in Prometheus text format."""
+
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,35 +1,30 @@
 """User-related API endpoints."""
 
 from __future__ import annotations
-import logging
 
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, Depends, HTTPException, Path
 
+from app.core.dependencies import get_memory_service
+from app.core.logging import get_logger
 from app.models import AppIdsResponse
 from app.services.memory import AsyncMemoryService
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 router = APIRouter(tags=["users"])
 
 @router.get("/users/{user_id}/app-ids", response_model=AppIdsResponse)
 async def get_user_app_ids(
-    user_id: str = Path(..., min_length=1, max_length=255)
+    user_id: str = Path(..., min_length=1, max_length=255),
+    service: AsyncMemoryService = Depends(get_memory_service),
 ) -> AppIdsResponse:
     """Return all app IDs associated with the user."""
-    logger.info(f"🔍 BACKEND: Received request for user_id: {user_id}")
-    
-    service = AsyncMemoryService()
-    
     try:
-        app_ids = await service.get_user_app_ids(user_id)
-        logger.info(f"🔍 BACKEND: Service returned app_ids: {app_ids}")
-        
-        response = AppIdsResponse(app_ids=app_ids)
-        logger.info(f"🔍 BACKEND: Sending response: {response.dict()}")
-        
+        app_counts = await service.get_user_apps(user_id)
+        response = AppIdsResponse(app_ids=list(app_counts), app_counts=app_counts)
+        logger.payload("users.app_ids.response", user_id=user_id, response=response.model_dump)
         return response
     except Exception as exc:  # pragma: no cover - defensive
-        logger.error(f"❌ BACKEND: Exception occurred: {exc}")
+        logger.error("users.app_ids.failed", user_id=user_id, error=str(exc))
         raise HTTPException(
             status_code=500, detail="Failed to retrieve app_ids"
         ) from exc
@@ -0,0 +1,160 @@
+"""Maintained user → app_id index backing ``/users/{user_id}/app-ids``.
+
+The Mem0 Entities API lists every app in the account, so downloading and
+filtering it per popup open scales with the account, not the user. This index
+keeps the account-level app counts from the last Entities snapshot (refreshed
+on a TTL with ETag-style conditional requests, stale-while-revalidate) and
+overlays apps each user wrote to through this service.
+
+Per-user scoping only covers those locally written apps: the Entities API
+does not say which user wrote to an account app, so every user sees all of
+them. Local writes are kept per user in a bounded TTL cache (refreshed on
+each write); once the snapshot lists an app, losing the entry changes
+nothing, so the TTL only needs to outlast a few snapshot refreshes. Users without local writes share one account view; merged views of the
+others are memoised in a bounded LRU, so lookups are O(1) until the
+underlying data changes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from app.core.logging import get_logger
+from app.services.cache import TTLCache
+
+logger = get_logger(__name__)
+
+# loader(etag) -> {"version", "etag", "apps"} snapshot, or None when unchanged
+SnapshotLoader = Callable[[Optional[str]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def extract_app_counts(entities: Iterable[Dict[str, Any]], min_length: int = 3) -> Dict[str, int]:
+    """App name → memory count for app entities that hold memories (3+ char names)."""
+    apps: Dict[str, int] = {}
+    for entity in entities:
+        if entity.get("type") != "app" or entity.get("total_memories", 0) <= 0:
+            continue
+        name = (entity.get("name") or "").strip()
+        if len(name) >= min_length:
+            apps[name] = int(entity.get("total_memories", 0))
+    return apps
+
+
+def snapshot_version(apps: Dict[str, int]) -> str:
+    """Content digest used as the version when upstream sends no ETag."""
+    return hashlib.sha1(json.dumps(sorted(apps.items())).encode()).hexdigest()
+
+
+class AppIdIndex:
+    """User → {app_id: memory count} index with TTL-driven conditional refresh."""
+
+    def __init__(
+        self,
+        loader: SnapshotLoader,
+        *,
+        ttl: float,
+        retry_after: float = 5.0,
+        max_users: int = 10000,
+        user_ttl: float = 3600.0,
+        max_views: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._loader = loader
+        self._ttl = ttl
+        self._retry_after = retry_after
+        self._max_views = max_views
+        self._clock = clock
+
+        self._account_apps: Dict[str, int] = {}
+        # User → apps written through this worker, dropped user_ttl after the last write
+        self._user_apps = TTLCache(max_users, user_ttl, clock=clock)
+        # Sorted account apps, shared by users with no local writes
+        self._account_view: Optional[Dict[str, int]] = None
+        # Users with local writes → merged view, least recently used first
+        self._views: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+        self._version: Optional[str] = None
+        self._etag: Optional[str] = None
+        self._loaded = False
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._background: Optional[asyncio.Task] = None
+
+    async def lookup(self, user_id: str) -> Dict[str, int]:
+        """Return the user's apps with counts, sorted by app_id (shared; do not mutate)."""
+        if not self._loaded:
+            await self.refresh()
+        elif self._clock() >= self._expires_at and (self._background is None or self._background.done()):
+            # Serve the current view and revalidate in the background
+            self._background = asyncio.create_task(self.refresh())
+
+        if self._account_view is None:
+            self._account_view = dict(sorted(self._account_apps.items()))
+        user_apps = self._user_apps.get(user_id)
+        if not user_apps:
+            return self._account_view
+
+        view = self._views.get(user_id)
+        if view is None:
+            merged = dict(self._account_apps)
+            for app_id, count in user_apps.items():
+                merged.setdefault(app_id, count)
+            view = dict(sorted(merged.items()))
+            self._views[user_id] = view
+            while len(self._views) > self._max_views:
+                self._views.popitem(last=False)
+        else:
+            self._views.move_to_end(user_id)
+        return view
+
+    def record(self, user_id: str, app_id: str, memories: int = 1) -> None:
+        """Note that ``user_id`` wrote ``memories`` memories to ``app_id``."""
+        apps = self._user_apps.get(user_id) or {}
+        apps[app_id] = apps.get(app_id, 0) + memories
+        self._user_apps.set(user_id, apps)
+        if app_id in self._account_apps:
+            self._account_apps[app_id] += memories
+            # Account counts feed every user's view
+            self._account_view = None
+            self._views.clear()
+        else:
+            self._views.pop(user_id, None)
+
+    async def refresh(self) -> None:
+        """Revalidate the Entities snapshot; rebuild only when its version changed."""
+        async with self._lock:
+            if self._loaded and self._clock() < self._expires_at:
+                return
+            try:
+                snapshot = await self._loader(self._etag)
+            except Exception as exc:
+                logger.error("app_index.refresh_failed", error=str(exc))
+                self._loaded = True
+                self._expires_at = self._clock() + self._retry_after
+                return
+
+            self._loaded = True
+            self._expires_at = self._clock() + self._ttl
+            if snapshot is None or snapshot["version"] == self._version:
+                logger.info("app_index.unchanged", version=self._version)
+                return
+
+            self._version = snapshot["version"]
+            self._etag = snapshot.get("etag")
+            self._account_apps = dict(snapshot["apps"])
+            self._account_view = None
+            self._views.clear()
+            logger.info("app_index.loaded", apps=len(self._account_apps), version=self._version)
+
+    async def aclose(self) -> None:
+        if self._background is not None and not self._background.done():
+            self._background.cancel()
+            await asyncio.gather(self._background, return_exceptions=True)
+
+
+__all__ = ["AppIdIndex", "extract_app_counts", "snapshot_version"]
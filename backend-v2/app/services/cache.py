@@ -0,0 +1,318 @@
+"""Caching primitives for the memory service.
+
+``CacheBackend`` abstracts the store so several uvicorn workers can share one
+out-of-process cache (anything speaking the Redis protocol) while single-worker
+and local runs keep the in-process LRU. ``CacheNamespace`` layers per-use TTLs,
+key hashing and hit/miss counters on top of whichever backend is configured.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from app.core.logging import get_logger
+from app.core.metrics import CACHE_LOOKUPS
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire ``ttl`` seconds after insertion."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value (refreshing its LRU position) or ``None``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches ``predicate``; return how many were dropped."""
+        stale = [key for key in self._entries if predicate(key)]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def invalidate_values(self, predicate: Callable[[Any], bool]) -> int:
+        """Drop every entry whose stored value matches ``predicate``."""
+        stale = [key for key, (_, value) in self._entries.items() if predicate(value)]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class CacheBackend(ABC):
+    """Key/value store with per-entry TTL and tag-based invalidation."""
+
+    name = "abstract"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the stored value or ``None`` on a miss."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()) -> None:
+        """Store a JSON-serialisable value for ``ttl`` seconds under the given tags."""
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of ``tags``; return how many were dropped."""
+
+    async def aclose(self) -> None:
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process LRU backend; invalidation scans at most ``max_entries`` keys.
+
+    Values are stored as JSON like the Redis backend, so every hit is a fresh
+    copy with the same types a shared cache would return.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int) -> None:
+        self._cache = TTLCache(max_entries, ttl=0.0)
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._cache.get(key)
+        return json.loads(entry[1]) if entry is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()) -> None:
+        self._cache.set(key, (frozenset(tags), json.dumps(value, default=str)), ttl=ttl)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        wanted = set(tags)
+        return self._cache.invalidate_values(lambda entry: not wanted.isdisjoint(entry[0]))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        return {
+            "size": stats["size"],
+            "max_entries": stats["max_entries"],
+            "evictions": stats["evictions"],
+        }
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared backend for any server speaking the Redis protocol.
+
+    Values are stored as JSON; each tag is a Redis set of member keys so
+    invalidation issued by one worker is seen by all of them.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, *, prefix: str = "mastermind", tag_ttl: float = 3600.0) -> None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+
+        self._redis = redis_asyncio.from_url(url)
+        self._prefix = prefix
+        self._tag_ttl = max(1, int(tag_ttl))
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self._prefix}:tag:{tag}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._redis.get(f"{self._prefix}:{key}")
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()) -> None:
+        full_key = f"{self._prefix}:{key}"
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(full_key, json.dumps(value, default=str), px=max(1, int(ttl * 1000)))
+            for tag in tags:
+                pipe.sadd(self._tag_key(tag), full_key)
+                pipe.expire(self._tag_key(tag), self._tag_ttl)
+            await pipe.execute()
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        dropped = 0
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            members = await self._redis.smembers(tag_key)
+            if members:
+                dropped += await self._redis.delete(*members)
+            await self._redis.delete(tag_key)
+        return dropped
+
+    async def aclose(self) -> None:
+        await self._redis.aclose()
+
+
+class CacheNamespace:
+    """One logical cache (search, enhance, entities) on top of a shared backend."""
+
+    def __init__(self, backend: CacheBackend, name: str, ttl: float) -> None:
+        self.backend = backend
+        self.name = name
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def key(self, parts: Tuple[Any, ...]) -> str:
+        digest = hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+        return f"{self.name}:{digest}"
+
+    async def get(self, parts: Tuple[Any, ...]) -> Optional[Any]:
+        if self.ttl <= 0:
+            return None
+        try:
+            value = await self.backend.get(self.key(parts))
+        except Exception as exc:
+            # A broken shared cache must never fail the request
+            self.errors += 1
+            CACHE_LOOKUPS.inc(cache=self.name, result="error")
+            logger.warning("cache.get_failed", cache=self.name, backend=self.backend.name, error=str(exc))
+            value = None
+        if value is None:
+            self.misses += 1
+            CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+        else:
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache=self.name, result="hit")
+        return value
+
+    async def set(self, parts: Tuple[Any, ...], value: Any, tags: Iterable[str] = ()) -> None:
+        if self.ttl <= 0:
+            return
+        try:
+            await self.backend.set(self.key(parts), value, self.ttl, tags)
+        except Exception as exc:
+            self.errors += 1
+            logger.warning("cache.set_failed", cache=self.name, backend=self.backend.name, error=str(exc))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "ttl_seconds": self.ttl,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def build_cache_backend(
+    kind: str,
+    *,
+    max_entries: int,
+    redis_url: str,
+    key_prefix: str,
+    tag_ttl: float,
+) -> CacheBackend:
+    """Instantiate the backend selected by ``CACHE_BACKEND``."""
+    if kind == "redis":
+        return RedisCacheBackend(redis_url, prefix=key_prefix, tag_ttl=tag_ttl)
+    return InMemoryCacheBackend(max_entries)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key onto one in-flight task."""
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Await the shared result for ``key``; the flag is True when another caller started it."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so a disconnecting leader does not cancel work its followers await
+        return await asyncio.shield(task), False
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+__all__ = [
+    "CacheBackend",
+    "CacheNamespace",
+    "InMemoryCacheBackend",
+    "RedisCacheBackend",
+    "SingleFlight",
+    "TTLCache",
+    "build_cache_backend",
+]
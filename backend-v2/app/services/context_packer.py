@@ -0,0 +1,138 @@
+"""Relevance-ranked, token-budgeted packing of enhancement context.
+
+Retrieval can yield far more memory and relation sentences than the
+completion needs. :class:`ContextPacker` ranks each segment by its Mem0 score
+and its lexical overlap with the prompt, drops near-duplicates, and keeps the
+best segments that fit ``CONTEXT_TOKEN_BUDGET``. The kept segments are
+emitted in retrieval order, not relevance order, so prompts that keep the
+same segments send byte-identical context. Tokens are counted with
+``tiktoken`` when it is installed (and its encoding is available offline or
+downloadable); otherwise with a ~4 characters/token approximation.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Callable, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.logging import get_logger
+from app.services.relation_index import Relation
+
+logger = get_logger(__name__)
+
+_TERM_RE = re.compile(r"[a-z0-9]{3,}")
+
+# Weight of prompt overlap against the Mem0 score (both in [0, 1])
+OVERLAP_WEIGHT = 0.6
+SCORE_WEIGHT = 0.4
+
+# Token-set Jaccard similarity above which two segments count as duplicates
+DUPLICATE_SIMILARITY = 0.85
+
+# Tokens spent on the newline between segments
+SEPARATOR_TOKENS = 1
+
+
+class ContextSegment(NamedTuple):
+    text: str
+    score: float
+    kind: str  # "memory" or "relation"
+    # The relation a "relation" segment was rendered from
+    relation: Optional[Relation] = None
+
+
+def approximate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def build_token_counter(encoding: str) -> Callable[[str], int]:
+    """Exact counter from tiktoken when usable, else the length approximation."""
+    try:
+        import tiktoken
+
+        encoder = tiktoken.get_encoding(encoding)
+    except Exception as exc:  # missing package or encoding download failed
+        logger.info("context_packer.approximate_tokens", encoding=encoding, reason=str(exc))
+        return approximate_tokens
+    logger.info("context_packer.tiktoken", encoding=encoding)
+    return lambda text: len(encoder.encode_ordinary(text))
+
+
+def _terms(text: str) -> FrozenSet[str]:
+    return frozenset(_TERM_RE.findall(text.lower()))
+
+
+class ContextPacker:
+    """Rank, dedupe and budget context segments for one completion."""
+
+    def __init__(self, token_budget: int, count_tokens: Callable[[str], int] = approximate_tokens) -> None:
+        self.token_budget = token_budget
+        self.count_tokens = count_tokens
+
+    def pack(self, segments: Sequence[ContextSegment], prompt: str) -> str:
+        if not segments:
+            return ""
+        if self.token_budget <= 0:
+            return "\n".join(segment.text for segment in segments)
+
+        prompt_terms = _terms(prompt)
+        ranked = []
+        for position, segment in enumerate(segments):
+            terms = _terms(segment.text)
+            overlap = len(terms & prompt_terms) / len(prompt_terms) if prompt_terms else 0.0
+            relevance = OVERLAP_WEIGHT * overlap + SCORE_WEIGHT * min(max(segment.score, 0.0), 1.0)
+            # Ties keep retrieval order
+            ranked.append((-relevance, position, segment, terms))
+        ranked.sort(key=lambda item: (item[0], item[1]))
+
+        kept: List[Tuple[int, str]] = []
+        kept_terms: List[FrozenSet[str]] = []
+        seen_texts = set()
+        used = 0
+        dropped_duplicates = 0
+        for _, position, segment, terms in ranked:
+            normalized = " ".join(segment.text.lower().split())
+            if normalized in seen_texts or self._near_duplicate(terms, kept_terms):
+                dropped_duplicates += 1
+                continue
+            cost = self.count_tokens(segment.text) + (SEPARATOR_TOKENS if kept else 0)
+            if used + cost > self.token_budget:
+                # A shorter, less relevant segment may still fit
+                continue
+            kept.append((position, segment.text))
+            kept_terms.append(terms)
+            seen_texts.add(normalized)
+            used += cost
+
+        logger.sampled(
+            "context.packed",
+            segments=len(segments),
+            kept=len(kept),
+            duplicates=dropped_duplicates,
+            tokens=used,
+            budget=self.token_budget,
+        )
+        return "\n".join(text for _, text in sorted(kept))
+
+    @staticmethod
+    def _near_duplicate(terms: FrozenSet[str], kept_terms: Sequence[FrozenSet[str]]) -> bool:
+        if not terms:
+            return False
+        for other in kept_terms:
+            union = len(terms | other)
+            if union and len(terms & other) / union >= DUPLICATE_SIMILARITY:
+                return True
+        return False
+
+
+def segments_to_text(segments: Optional[Sequence[ContextSegment]]) -> str:
+    return "\n".join(segment.text for segment in segments or ())
+
+
+__all__ = [
+    "ContextPacker",
+    "ContextSegment",
+    "approximate_tokens",
+    "build_token_counter",
+    "segments_to_text",
+]
@@ -0,0 +1,146 @@
+"""Table-driven rendering of GraphMemory relations into context sentences.
+
+Each relation is rendered by the template registered for its
+``(relationship, target_type)`` pair, falling back to the relationship alone
+and then to the ``"*"`` default. Templates use ``str.format`` field syntax and
+are compiled once into a ``%``-format string plus an ``itemgetter`` over the
+:class:`Relation` tuple, so rendering a relation is two C-level calls.
+Resolution per pair is memoised.
+
+Templates can be extended or overridden from a JSON file
+(``CONTEXT_TEMPLATES_PATH``) mapping ``"relationship"`` or
+``"relationship:target_type"`` to a template::
+
+    {"working_on": "{source} works on {target}", "owns:repo": "{source} owns the {target} repository"}
+"""
+
+from __future__ import annotations
+
+import json
+import string
+from operator import itemgetter
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.services.relation_index import BUCKETS, Relation
+
+DEFAULT_KEY = "*"
+
+DEFAULT_TEMPLATES: Dict[str, str] = {
+    "starting_work_on": "{source} is currently starting work on the {target} {target_kind}",
+    "working_on": "{source} is actively working on the {target} {target_kind}",
+    "initiated_assignment": "{source} initiated assignment for the {target} {target_kind}",
+    "assignment": "{source} has assignment relationship with {target}",
+    "is_related_to": "{source} is related to {target} {target_kind}",
+    DEFAULT_KEY: "{source} {relationship_text} {target}",
+}
+
+# Fields a template may reference: every Relation field except the bucket
+# (relationship_text has underscores as spaces; target_kind is target_type,
+# or "project" when Mem0 left it empty)
+FIELDS: Tuple[str, ...] = tuple(field for field in Relation._fields if field != "bucket")
+
+
+class CompiledTemplate:
+    """A template reduced to a ``%`` format string and an itemgetter feeding it."""
+
+    __slots__ = ("source", "_format", "_values")
+
+    def __init__(self, template: str) -> None:
+        self.source = template
+        parts: List[str] = []
+        indexes: List[int] = []
+        for literal, field, spec, conversion in string.Formatter().parse(template):
+            parts.append(literal.replace("%", "%%"))
+            if field is None:
+                continue
+            if field not in FIELDS:
+                raise ValueError(f"unknown field {{{field}}} in context template {template!r}")
+            if spec or conversion:
+                raise ValueError(f"format specs are not supported in context template {template!r}")
+            parts.append("%s")
+            indexes.append(Relation._fields.index(field))
+        self._format = "".join(parts)
+        # itemgetter with two or more indexes returns a tuple, ready for %
+        if len(indexes) > 1:
+            self._values = itemgetter(*indexes)
+        elif indexes:
+            index = indexes[0]
+            self._values = lambda relation: (relation[index],)
+        else:
+            self._values = lambda relation: ()
+
+    def render(self, relation: Relation) -> str:
+        return self._format % self._values(relation)
+
+
+class ContextTemplates:
+    """Registry of compiled templates keyed on relationship and target_type."""
+
+    def __init__(self, templates: Optional[Mapping[str, str]] = None) -> None:
+        merged = dict(DEFAULT_TEMPLATES)
+        merged.update(templates or {})
+        self._compiled: Dict[Tuple[str, str], CompiledTemplate] = {}
+        for key, template in merged.items():
+            relationship, _, target_type = key.partition(":")
+            self._compiled[(relationship, target_type)] = CompiledTemplate(template)
+        self._default = self._compiled[(DEFAULT_KEY, "")]
+        self._resolved: Dict[Tuple[str, str], CompiledTemplate] = {}
+
+    @classmethod
+    def from_file(cls, path: str) -> "ContextTemplates":
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        if not isinstance(data, dict) or not all(isinstance(v, str) for v in data.values()):
+            raise ValueError(f"{path}: expected a JSON object of template strings")
+        return cls(data)
+
+    def resolve(self, relationship: str, target_type: str) -> CompiledTemplate:
+        key = (relationship, target_type)
+        template = self._resolved.get(key)
+        if template is None:
+            template = (
+                self._compiled.get(key)
+                or self._compiled.get((relationship, ""))
+                or self._compiled.get((DEFAULT_KEY, target_type))
+                or self._default
+            )
+            self._resolved[key] = template
+        return template
+
+    def render(self, relation: Relation) -> str:
+        return self.resolve(relation.relationship, relation.target_type).render(relation)
+
+    def render_all(self, relations: Iterable[Relation]) -> List[str]:
+        resolved = self._resolved
+        lines: List[str] = []
+        append = lines.append
+        for relation in relations:
+            template = resolved.get((relation[1], relation[3]))
+            if template is None:
+                template = self.resolve(relation[1], relation[3])
+            append(template._format % template._values(relation))
+        return lines
+
+    def render_groups(self, groups: Mapping[str, Iterable[Relation]]) -> List[str]:
+        """Render bucketed relations in context order (work, assignment, project)."""
+        lines: List[str] = []
+        for bucket in BUCKETS:
+            lines.extend(self.render_all(groups.get(bucket, ())))
+        return lines
+
+
+def load_context_templates(path: Optional[str]) -> ContextTemplates:
+    """Defaults, extended by the JSON file at ``path`` when one is configured."""
+    return ContextTemplates.from_file(path) if path else ContextTemplates()
+
+
+default_templates = ContextTemplates()
+
+__all__ = [
+    "CompiledTemplate",
+    "ContextTemplates",
+    "DEFAULT_TEMPLATES",
+    "FIELDS",
+    "default_templates",
+    "load_context_templates",
+]
@@ -0,0 +1,216 @@
+"""Deterministic completion of "X is" prompts from retrieved context.
+
+Short "X is" fragments are usually answered outright by the retrieved graph
+relations or memories ("masterbrain is" → the project the user is working
+on). :class:`LocalCompleter` tries that without a model call:
+
+* **entity**: X names a relation's source; the relation's context sentence
+  ("X is actively working on the Y project") supplies the rest.
+* **work**: X asks after the user's project, app, task... ("my current
+  project", "what I am building"); a work or assignment relation's target is
+  the answer.
+* **memory**: a memory sentence contains "X is ..."; its clause is the answer.
+
+Each candidate scores its source's Mem0 score times how directly it matches.
+Candidates agreeing on an answer reinforce each other, and a competing work
+target discounts the winner. The winning answer passes through the same guardrails
+as a model completion. Below ``min_confidence`` the caller falls back to
+OpenAI.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.services.context_packer import ContextSegment
+from app.services.relation_index import Relation
+from app.services.text_pipeline import apply_guardrails, is_x_is_prompt
+from app.services.vocabulary import FUNCTION_WORDS
+
+_WORD_RE = re.compile(r"[a-z0-9_']+")
+_CLAUSE_END = r"[^.;!?\n]+"
+
+# X asks what the user is working on when its head noun is one of these
+# ("my current project") or it contains one of the verbs ("what I am building")
+WORK_NOUNS = frozenset({
+    "project", "app", "application", "product", "task", "assignment", "focus", "work", "repo", "repository",
+})
+WORK_VERBS = frozenset({"working", "building", "developing", "shipping"})
+# Trailing words skipped when looking for the head noun
+_TEMPORAL = frozenset({"now", "right", "today", "currently", "lately", "these", "days", "this", "week", "month"})
+FIRST_PERSON = frozenset({"i", "i'm", "im", "my", "me", "we", "we're", "our", "current", "currently"})
+
+# Relationships read naturally after "X is"
+PREDICATES: Dict[str, str] = {
+    "starting_work_on": "starting work on",
+    "working_on": "working on",
+    "developing": "developing",
+    "assigned_to": "assigned to",
+    "is_related_to": "related to",
+}
+
+# How directly each rule answers the prompt, applied to the source's score
+ENTITY_WEIGHT = 1.0
+ENTITY_PARTIAL_WEIGHT = 0.9
+WORK_WEIGHT = 0.9
+WORK_OTHER_WEIGHT = 0.7
+MEMORY_WEIGHT = 0.85
+MEMORY_PARTIAL_WEIGHT = 0.7
+
+
+class LocalCompletion(NamedTuple):
+    text: str
+    confidence: float
+    rule: str  # "entity", "work" or "memory"
+
+
+class _Candidate(NamedTuple):
+    # Phrasings of one answer, most informative first
+    phrases: Tuple[str, ...]
+    confidence: float
+    rule: str
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower().replace("_", " ")))
+
+
+def _subject(prompt: str) -> str:
+    """X of an "X is" prompt (the prompt without its trailing "is")."""
+    stem = prompt.rstrip()
+    return stem[: len(stem) - 2].rstrip(" ,:;-")
+
+
+class LocalCompleter:
+    """Rule-based "X is" completer over context segments."""
+
+    def __init__(self, min_confidence: float) -> None:
+        self.min_confidence = min_confidence
+
+    def complete(
+        self, prompt: str, segments: Sequence[ContextSegment], char_max: int
+    ) -> Optional[LocalCompletion]:
+        """Best local completion, or None when no rule applies or the answer does not fit."""
+        if not segments or not is_x_is_prompt(prompt):
+            return None
+        subject = _normalize(_subject(prompt))
+        if not subject:
+            return None
+
+        candidates = self._candidates(subject, segments)
+        if not candidates:
+            return None
+
+        # The space between prompt and answer counts against char_max
+        budget = char_max - len(prompt) - 1
+        answers: Dict[str, Tuple[str, float, str]] = {}
+        for candidate in candidates:
+            phrase = next((p for p in candidate.phrases if 0 < len(p) <= budget), None)
+            if phrase is None:
+                continue
+            key = phrase.lower()
+            previous = answers.get(key)
+            if previous is None:
+                answers[key] = (phrase, candidate.confidence, candidate.rule)
+            else:
+                # Independent sources agreeing: noisy-or of their confidences
+                combined = 1 - (1 - previous[1]) * (1 - candidate.confidence)
+                rule = previous[2] if previous[1] >= candidate.confidence else candidate.rule
+                answers[key] = (previous[0], combined, rule)
+        if not answers:
+            return None
+
+        ranked = sorted(answers.values(), key=lambda answer: answer[1], reverse=True)
+        phrase, confidence, rule = ranked[0]
+        if rule == "work":
+            # Two different projects for "my project is": the winner is less certain.
+            # (Entity and memory answers are facts about X; several can all hold.)
+            rival = next((answer[1] for answer in ranked[1:] if answer[2] == "work"), 0.0)
+            confidence *= confidence / (confidence + rival)
+
+        text = apply_guardrails(phrase, prompt, char_max)
+        if text == prompt:
+            return None
+        return LocalCompletion(text, round(min(confidence, 1.0), 3), rule)
+
+    def accept(self, completion: Optional[LocalCompletion]) -> bool:
+        return completion is not None and completion.confidence >= self.min_confidence
+
+    def _candidates(self, subject: str, segments: Sequence[ContextSegment]) -> List[_Candidate]:
+        words = subject.split()
+        head = next((word for word in reversed(words) if word not in _TEMPORAL), "")
+        asks_for_work = head in WORK_NOUNS or not WORK_VERBS.isdisjoint(words)
+        first_person = not FIRST_PERSON.isdisjoint(words)
+        candidates: List[_Candidate] = []
+        for segment in segments:
+            score = min(max(segment.score, 0.0), 1.0)
+            relation = segment.relation
+            if relation is not None:
+                candidates.extend(
+                    self._relation_candidates(subject, asks_for_work, first_person, relation, segment.text, score)
+                )
+            elif segment.kind == "memory":
+                candidate = self._memory_candidate(subject, segment.text, score)
+                if candidate is not None:
+                    candidates.append(candidate)
+        return candidates
+
+    @staticmethod
+    def _relation_candidates(
+        subject: str,
+        asks_for_work: bool,
+        first_person: bool,
+        relation: Relation,
+        sentence: str,
+        score: float,
+    ) -> List[_Candidate]:
+        candidates: List[_Candidate] = []
+        source = _normalize(relation.source)
+        if source and (subject == source or subject.endswith(" " + source)):
+            phrases = []
+            lead = relation.source + " is "
+            if sentence.lower().startswith(lead.lower()):
+                phrases.append(sentence[len(lead):])
+            predicate = PREDICATES.get(relation.relationship)
+            if predicate:
+                phrases.append(f"{predicate} {relation.target}")
+            if phrases:
+                weight = ENTITY_WEIGHT if subject == source else ENTITY_PARTIAL_WEIGHT
+                candidates.append(_Candidate(tuple(phrases), score * weight, "entity"))
+        elif (
+            asks_for_work
+            and relation.bucket in ("work", "assignment")
+            # X already naming the target is asking something else about it
+            and f" {_normalize(relation.target)} " not in f" {subject} "
+        ):
+            weight = WORK_WEIGHT if first_person or f" {source} " in f" {subject} " else WORK_OTHER_WEIGHT
+            phrases = (f"the {relation.target} {relation.target_kind}", relation.target)
+            if relation.target_kind in subject.split():
+                phrases = (relation.target,)
+            candidates.append(_Candidate(phrases, score * weight, "work"))
+        return candidates
+
+    @staticmethod
+    def _memory_candidate(subject: str, text: str, score: float) -> Optional[_Candidate]:
+        if text.startswith("Memory: "):
+            text = text[len("Memory: "):]
+        words = subject.split()
+        # Longest tail of X first: "my current project" before "project"
+        for size in range(min(len(words), 4), 0, -1):
+            if FUNCTION_WORDS.issuperset(words[-size:]):
+                # "it is", "this is": matches anything
+                continue
+            # Entities are normalized with "_" as a space; memories keep "user_1"
+            tail = r"[\s_]+".join(re.escape(word) for word in words[-size:])
+            match = re.search(rf"\b{tail}\s+is\s+({_CLAUSE_END})", text, re.IGNORECASE)
+            if match:
+                clause = match.group(1).strip(" ,:-")
+                if not clause:
+                    return None
+                weight = MEMORY_WEIGHT if size == len(words) else MEMORY_PARTIAL_WEIGHT
+                return _Candidate((clause,), score * weight, "memory")
+        return None
+
+
+__all__ = ["LocalCompleter", "LocalCompletion", "WORK_NOUNS", "WORK_VERBS"]
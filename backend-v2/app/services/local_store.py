@@ -0,0 +1,273 @@
+"""Local memory tier: SQLite-backed copy of our writes with an in-process vector index.
+
+Every memory written through ``AsyncMemoryService.add_memory`` is mirrored
+here, so enhancement still has context when Mem0 is slow, failing or behind an
+open circuit breaker. Rows live in SQLite (durable across restarts); each
+user's rows are also held in memory as a contiguous float32 matrix of
+L2-normalised hashed bag-of-words vectors, so a search is one NumPy
+matrix-vector product per user — no embedding model, no network, CPU only.
+
+Search results use the Mem0 v2 ``{"results": [...], "relations": [...]}``
+shape that ``_build_enhanced_context`` consumes. The local tier stores raw
+message text, not Mem0's extracted graph, so ``relations`` is always empty.
+
+The in-memory index is per process: it holds the rows on disk when the
+worker started plus the writes made through this worker since. With
+``--workers > 1`` the workers share the SQLite file but not their indexes,
+so a memory written through one worker is only searchable in the others
+after they restart. Fallback context may therefore miss a user's latest
+writes on multi-worker deployments.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Hashed feature space; 256 float32 lanes = 1 KiB per stored memory
+VECTOR_DIM = 256
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    app_id TEXT NOT NULL DEFAULT '',
+    run_id TEXT NOT NULL DEFAULT '',
+    memory TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (user_id, app_id, run_id, memory)
+);
+CREATE INDEX IF NOT EXISTS memories_user ON memories (user_id, id);
+"""
+
+
+def embed(text: str, dim: int = VECTOR_DIM) -> np.ndarray:
+    """Signed feature-hashing of unigrams and bigrams into a unit float32 vector."""
+    vector = np.zeros(dim, dtype=np.float32)
+    tokens = _TOKEN_RE.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for feature in features:
+        digest = zlib.crc32(feature.encode("utf-8"))
+        vector[digest % dim] += 1.0 if digest & 0x80000000 else -1.0
+    norm = float(np.linalg.norm(vector))
+    if norm:
+        vector /= norm
+    return vector
+
+
+class _UserIndex:
+    """One user's memories: row metadata plus a growable float32 matrix."""
+
+    __slots__ = ("ids", "texts", "apps", "runs", "created", "app_codes", "vectors", "size", "_app_lookup")
+
+    def __init__(self, dim: int) -> None:
+        self.ids: List[int] = []
+        self.texts: List[str] = []
+        self.apps: List[str] = []
+        self.runs: List[str] = []
+        self.created: List[float] = []
+        self.app_codes = np.zeros(16, dtype=np.int32)
+        self.vectors = np.zeros((16, dim), dtype=np.float32)
+        self.size = 0
+        self._app_lookup: Dict[str, int] = {}
+
+    def append(self, row_id: int, app_id: str, run_id: str, text: str, created_at: float) -> None:
+        if self.size == len(self.vectors):
+            self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+            self.app_codes = np.concatenate([self.app_codes, np.zeros_like(self.app_codes)])
+        self.vectors[self.size] = embed(text, self.vectors.shape[1])
+        self.app_codes[self.size] = self._app_lookup.setdefault(app_id, len(self._app_lookup))
+        self.ids.append(row_id)
+        self.texts.append(text)
+        self.apps.append(app_id)
+        self.runs.append(run_id)
+        self.created.append(created_at)
+        self.size += 1
+
+    def search(
+        self, query: np.ndarray, *, app_id: Optional[str], run_id: Optional[str], limit: int, min_score: float
+    ) -> List[Tuple[int, float]]:
+        scores = self.vectors[: self.size] @ query
+        if app_id is not None:
+            code = self._app_lookup.get(app_id)
+            if code is None:
+                return []
+            scores = np.where(self.app_codes[: self.size] == code, scores, -1.0)
+        if run_id is not None:
+            mask = np.fromiter((run == run_id for run in self.runs), dtype=bool, count=self.size)
+            scores = np.where(mask, scores, -1.0)
+        if limit < self.size:
+            candidates = np.argpartition(-scores, limit)[:limit]
+        else:
+            candidates = np.arange(self.size)
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(i), float(scores[i])) for i in ranked if scores[i] >= min_score]
+
+
+class LocalMemoryStore:
+    """Durable local copy of written memories with per-user cosine search."""
+
+    def __init__(
+        self, path: str, *, min_score: float = 0.2, dim: int = VECTOR_DIM, max_seen: int = 65536
+    ) -> None:
+        self.path = path
+        self.min_score = min_score
+        self.dim = dim
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._users: Dict[str, _UserIndex] = {}
+        # Recently stored (user, app, run, text) keys, least recent first; spares
+        # SQLite repeat inserts, whose UNIQUE constraint still catches evicted ones
+        self._seen: "OrderedDict[Tuple[str, str, str, str], None]" = OrderedDict()
+        self.max_seen = max_seen
+        self.searches = 0
+        self.hits = 0
+
+    async def open(self) -> None:
+        """Create the database if needed and load every stored memory into the index."""
+        rows = await asyncio.to_thread(self._open_sync)
+        for row in rows:
+            self._index(*row)
+        logger.info("local_store.opened", path=self.path, memories=len(rows), users=len(self._users))
+
+    def _open_sync(self) -> List[Tuple[int, str, str, str, str, float]]:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+        return conn.execute(
+            "SELECT id, user_id, app_id, run_id, memory, created_at FROM memories ORDER BY id"
+        ).fetchall()
+
+    async def aclose(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await asyncio.to_thread(self._close_sync, conn)
+
+    def _close_sync(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            conn.close()
+
+    async def add(
+        self, user_id: str, app_id: Optional[str], run_id: Optional[str], texts: Iterable[str]
+    ) -> int:
+        """Persist and index new memory texts; exact duplicates are ignored. Returns rows added."""
+        if self._conn is None:
+            return 0
+        app, run = app_id or "", run_id or ""
+        fresh = []
+        for text in texts:
+            text = text.strip()
+            key = (user_id, app, run, text)
+            if text and key not in self._seen:
+                self._remember(key)
+                fresh.append(text)
+        if not fresh:
+            return 0
+        created_at = time.time()
+        try:
+            rows = await asyncio.to_thread(self._insert_sync, user_id, app, run, fresh, created_at)
+        except Exception:
+            for text in fresh:
+                self._seen.pop((user_id, app, run, text), None)
+            raise
+        for row in rows:
+            self._index(*row)
+        return len(rows)
+
+    def _insert_sync(
+        self, user_id: str, app: str, run: str, texts: List[str], created_at: float
+    ) -> List[Tuple[int, str, str, str, str, float]]:
+        rows = []
+        with self._lock:
+            conn = self._conn
+            if conn is None:
+                return rows
+            with conn:
+                for text in texts:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO memories (user_id, app_id, run_id, memory, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (user_id, app, run, text, created_at),
+                    )
+                    if cursor.rowcount:
+                        rows.append((cursor.lastrowid, user_id, app, run, text, created_at))
+        return rows
+
+    def _remember(self, key: Tuple[str, str, str, str]) -> None:
+        self._seen[key] = None
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+
+    def _index(self, row_id: int, user_id: str, app: str, run: str, text: str, created_at: float) -> None:
+        self._remember((user_id, app, run, text))
+        index = self._users.get(user_id)
+        if index is None:
+            index = self._users[user_id] = _UserIndex(self.dim)
+        index.append(row_id, app, run, text, created_at)
+
+    def search(
+        self,
+        query: str,
+        user_id: str,
+        *,
+        app_id: Optional[str] = None,
+        run_id: Optional[str] = None,
+        limit: int = 5,
+    ) -> Dict[str, Any]:
+        """Top ``limit`` memories by cosine similarity, in the Mem0 v2 search shape."""
+        self.searches += 1
+        index = self._users.get(user_id)
+        if index is None or limit <= 0:
+            return {"results": [], "relations": []}
+        ranked = index.search(
+            embed(query, self.dim), app_id=app_id, run_id=run_id, limit=limit, min_score=self.min_score
+        )
+        results = [
+            {
+                "id": f"local-{index.ids[i]}",
+                "memory": index.texts[i],
+                "score": round(score, 4),
+                "user_id": user_id,
+                "app_id": index.apps[i] or None,
+                "run_id": index.runs[i] or None,
+                "created_at": index.created[i],
+                "source": "local",
+            }
+            for i, score in ranked
+        ]
+        if results:
+            self.hits += 1
+        return {"results": results, "relations": []}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "users": len(self._users),
+            "memories": sum(index.size for index in self._users.values()),
+            "searches": self.searches,
+            "hits": self.hits,
+        }
+
+
+__all__ = ["LocalMemoryStore", "VECTOR_DIM", "embed"]
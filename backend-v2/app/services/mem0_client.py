@@ -0,0 +1,115 @@
+"""Native async transport for the Mem0 platform REST API.
+
+Speaks the same endpoints and payload shapes as ``mem0.client.main.MemoryClient``
+(``filters``, ``enable_graph``, ``output_format``...) on a shared
+``httpx.AsyncClient`` so hundreds of Mem0 calls can be in flight on one event
+loop without hopping through the default thread pool.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+
+class AsyncMem0Client:
+    """Minimal async Mem0 client covering search, add, entities and project update."""
+
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        host: str = "https://api.mem0.ai",
+        max_connections: int = 200,
+        timeout: float = 300.0,
+    ) -> None:
+        self.api_key = api_key
+        self.host = host.rstrip("/")
+        self.org_id: Optional[str] = None
+        self.project_id: Optional[str] = None
+        self.user_email: Optional[str] = None
+
+        self.http = httpx.AsyncClient(
+            base_url=self.host,
+            headers={
+                "Authorization": f"Token {api_key}",
+                "Mem0-User-ID": hashlib.md5(api_key.encode()).hexdigest(),
+            },
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def validate(self) -> None:
+        """Ping Mem0 to validate the key and discover org/project identifiers."""
+        response = await self.http.get("/v1/ping/")
+        response.raise_for_status()
+        data = response.json()
+        if data.get("org_id") and data.get("project_id"):
+            self.org_id = data["org_id"]
+            self.project_id = data["project_id"]
+        self.user_email = data.get("user_email")
+
+    async def search(self, query: str, version: str = "v1", **kwargs: Any) -> Any:
+        """POST ``/{version}/memories/search/`` with MemoryClient-compatible kwargs."""
+        payload: Dict[str, Any] = {"query": query}
+        payload.update(self._prepare_params(kwargs))
+        response = await self.http.post(f"/{version}/memories/search/", json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def add(self, messages: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        """POST ``/v1/memories/`` using the v2 add pipeline."""
+        params = self._prepare_params(kwargs)
+        # Mem0 deprecated v1.0 add output; MemoryClient forces v1.1 as well
+        params["output_format"] = "v1.1"
+        params["version"] = "v2"
+        payload: Dict[str, Any] = {"messages": messages}
+        payload.update(params)
+        response = await self.http.post("/v1/memories/", json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_entities(
+        self, etag: Optional[str] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """GET ``/v1/entities/`` for the whole account, conditionally on ``etag``.
+
+        Returns ``(None, etag)`` when the server answers 304 Not Modified.
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        response = await self.http.get("/v1/entities/", headers=headers)
+        if response.status_code == 304:
+            return None, etag
+        response.raise_for_status()
+        return response.json(), response.headers.get("ETag")
+
+    async def update_project(self, **settings: Any) -> Dict[str, Any]:
+        """PATCH the current project's settings (e.g. ``enable_graph=True``)."""
+        if not (self.org_id and self.project_id):
+            raise ValueError("org_id and project_id are unknown; call validate() first")
+        payload = self._prepare_params(settings)
+        response = await self.http.patch(
+            f"/api/v1/orgs/organizations/{self.org_id}/projects/{self.project_id}/",
+            json=payload,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    def _prepare_params(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach org/project scope and drop ``None`` values, as MemoryClient does."""
+        params = dict(kwargs)
+        if self.org_id and self.project_id:
+            params["org_id"] = self.org_id
+            params["project_id"] = self.project_id
+        return {k: v for k, v in params.items() if v is not None}
+
+
+__all__ = ["AsyncMem0Client"]
@@ -10,16 +10,84 @@ import logging
 import time
 import uuid
 import math
-import re
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Set
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import httpx
-from mem0.client.main import MemoryClient
 from openai import AsyncOpenAI
 from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import (
+    CACHE_LOOKUPS,
+    ENHANCE_ENGINE,
+    ENHANCE_STAGE_SECONDS,
+    OPENAI_FAILURES,
+    OPENAI_PROMPT_TOKENS,
+    SEARCH_FALLBACKS,
+    SEARCH_STRATEGY_SECONDS,
+    STRATEGY_SELECTED,
+)
+from app.services.app_index import AppIdIndex, extract_app_counts, snapshot_version
+from app.services.cache import CacheNamespace, SingleFlight, build_cache_backend
+from app.services.context_packer import (
+    ContextPacker,
+    ContextSegment,
+    approximate_tokens,
+    build_token_counter,
+    segments_to_text,
+)
+from app.services.context_templates import ContextTemplates, default_templates, load_context_templates
+from app.services.local_completer import LocalCompleter
+from app.services.local_store import LocalMemoryStore
+from app.services.mem0_client import AsyncMem0Client
+from app.services.near_duplicate import NearDuplicateIndex, NearMatch, normalize
+from app.services.relation_index import BUCKETS, Relation, RelationIndex, group_payload
+from app.services.resilience import CircuitOpenError, Upstream
+from app.services.session_context import SessionContexts
+from app.services.text_pipeline import PREAMBLE_PREFIXES, apply_guardrails, is_x_is_prompt, light_cleanup
+from app.services.vocabulary import (
+    ContextVocabulary,
+    VocabularyCache,
+    build_context_vocabulary,
+    select_vocabulary,
+)
+from app.services.write_queue import MemoryWriteQueue, WriteKey, WriteQueueFull
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+# Stop sequences for single-line completions
+STOP_SEQUENCES = ["\n", "\n\n", "—", "•"]
+
+# Byte-identical for every completion so the upstream prompt cache can reuse
+# it; anything per-user or per-request goes in the user message after it.
+# It is only ~110 tokens: caching needs the context after it to be long too
+COMPLETION_SYSTEM_PROMPT = (
+    "You complete incomplete prompts concisely.\n"
+    "Hard limits:\n"
+    "- Stay within the absolute max chars given with the prompt (<= 4x its original length).\n"
+    "- Return exactly one short completion (no more than 1 sentence).\n"
+    "- Do not introduce facts not present in PROMPT or CONTEXT.\n"
+    "- No advice, no questions, no preambles, no quotes.\n"
+    "- Use only words from the vocabulary given with the prompt.\n"
+    "For 'X is' fragments, return a 2–6 word noun phrase; no verbs beyond 'is'."
+)
+
+# OpenAI only caches prompt prefixes of at least this many tokens
+OPENAI_PROMPT_CACHE_MIN_TOKENS = 1024
+
+# Pseudo-strategy reported when context came from the local memory tier
+LOCAL_STRATEGY_NAME = "local_store"
 
 class AsyncMemoryService:
     """
@@ -35,91 +103,239 @@ class AsyncMemoryService:
     """
 
     def __init__(self) -> None:
-        logger.info("🔧 INIT: Initializing AsyncMemoryService with HARDENED v2 API and GraphMemory")
+        logger.info("init.start")
         
-        # Initialize Mem0 client
+        # Readiness flags flipped by startup()
+        self.ready = False
+        self.graph_enabled = False
+        
+        # Initialize async Mem0 transport (one pooled httpx.AsyncClient)
         try:
-            self.client = MemoryClient(
+            self.client = AsyncMem0Client(
                 api_key=settings.MEM0_API_KEY,
-                # Add org_id and project_id if available in settings
-                # org_id=settings.MEM0_ORG_ID,
-                # project_id=settings.MEM0_PROJECT_ID,
+                host=settings.MEM0_HOST,
+                max_connections=settings.MEM0_MAX_CONNECTIONS,
+                timeout=settings.MEM0_TIMEOUT_SECONDS,
             )
-            logger.info("✅ INIT: Mem0 client initialized successfully")
-            
-            # Enable GraphMemory at project level (GraphMemory enhancement)
-            try:
-                self.client.project.update(enable_graph=True)
-                logger.info("✅ INIT: GraphMemory enabled at project level")
-            except Exception as exc:
-                logger.warn(f"⚠️ INIT: Could not enable GraphMemory (may not be available): {exc}")
-                
+            logger.info("init.mem0_client", host=settings.MEM0_HOST)
         except Exception as exc:
-            logger.error(f"❌ INIT: Mem0 client initialization failed: {exc}")
+            logger.error("init.mem0_client_failed", error=str(exc))
             raise
         
+        # Per-upstream circuit breakers and adaptive concurrency limits
+        self.mem0 = Upstream(
+            "mem0",
+            failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+            recovery_time=settings.BREAKER_RECOVERY_SECONDS,
+            max_concurrency=settings.MEM0_CONCURRENCY_MAX,
+            min_concurrency=settings.UPSTREAM_CONCURRENCY_MIN,
+            latency_target=settings.MEM0_LATENCY_TARGET_SECONDS,
+        )
+        self.openai = Upstream(
+            "openai",
+            failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+            recovery_time=settings.BREAKER_RECOVERY_SECONDS,
+            max_concurrency=settings.OPENAI_CONCURRENCY_MAX,
+            min_concurrency=settings.UPSTREAM_CONCURRENCY_MIN,
+            latency_target=settings.OPENAI_LATENCY_TARGET_SECONDS,
+        )
+        
+        # Shared cache backend (in-process LRU or Redis protocol) with per-use TTLs
+        self.cache_backend = build_cache_backend(
+            settings.CACHE_BACKEND,
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            redis_url=settings.CACHE_REDIS_URL,
+            key_prefix=settings.CACHE_KEY_PREFIX,
+            tag_ttl=max(
+                settings.SEARCH_CACHE_TTL_SECONDS,
+                settings.ENHANCE_CACHE_TTL_SECONDS,
+                settings.ENTITIES_CACHE_TTL_SECONDS,
+            ),
+        )
+        self.search_cache = CacheNamespace(
+            self.cache_backend, "search", settings.SEARCH_CACHE_TTL_SECONDS
+        )
+        self.enhance_cache = CacheNamespace(
+            self.cache_backend, "enhance", settings.ENHANCE_CACHE_TTL_SECONDS
+        )
+        self.entities_cache = CacheNamespace(
+            self.cache_backend, "entities", settings.ENTITIES_CACHE_TTL_SECONDS
+        )
+        
+        # SimHash lookups behind the search/enhance caches: near-identical
+        # prompts reuse results within the same scope (per process)
+        self.near_search = NearDuplicateIndex(
+            "search",
+            threshold=settings.NEAR_DUPLICATE_THRESHOLD,
+            ttl=settings.SEARCH_CACHE_TTL_SECONDS,
+            max_scopes=settings.NEAR_DUPLICATE_MAX_SCOPES,
+            max_per_scope=settings.NEAR_DUPLICATE_MAX_PER_SCOPE,
+        )
+        self.near_enhance = NearDuplicateIndex(
+            "enhance",
+            threshold=settings.NEAR_DUPLICATE_THRESHOLD,
+            ttl=settings.ENHANCE_CACHE_TTL_SECONDS,
+            max_scopes=settings.NEAR_DUPLICATE_MAX_SCOPES,
+            max_per_scope=settings.NEAR_DUPLICATE_MAX_PER_SCOPE,
+        )
+        
+        # User → app_id index fed by the Entities API and our own writes
+        self.app_index = AppIdIndex(
+            self._load_entities_snapshot,
+            ttl=settings.ENTITIES_CACHE_TTL_SECONDS,
+            max_users=settings.APP_INDEX_MAX_USERS,
+            user_ttl=settings.APP_INDEX_USER_TTL_SECONDS,
+        )
+        
+        # Relation → sentence templates (built-ins plus CONTEXT_TEMPLATES_PATH)
+        self.context_templates = load_context_templates(settings.CONTEXT_TEMPLATES_PATH)
+        
+        # Ranks, dedupes and trims context segments to CONTEXT_TOKEN_BUDGET
+        self.context_packer = ContextPacker(
+            settings.CONTEXT_TOKEN_BUDGET,
+            build_token_counter(settings.CONTEXT_TOKEN_ENCODING)
+            if settings.CONTEXT_TOKEN_BUDGET > 0
+            else approximate_tokens,
+        )
+        if settings.CONTEXT_TOKEN_BUDGET > 0:
+            # System prompt plus a full context: the longest prefix completions can share
+            prefix_tokens = (
+                self.context_packer.count_tokens(COMPLETION_SYSTEM_PROMPT + "\nContext: ")
+                + settings.CONTEXT_TOKEN_BUDGET
+            )
+            logger.info(
+                "init.completion_prefix",
+                max_stable_tokens=prefix_tokens,
+                cache_min_tokens=OPENAI_PROMPT_CACHE_MIN_TOKENS,
+                cacheable=prefix_tokens >= OPENAI_PROMPT_CACHE_MIN_TOKENS,
+            )
+        
+        # Retrieved segments → ranked vocabulary, so repeat retrievals skip re-tokenising
+        self.vocabulary_cache = VocabularyCache()
+        
+        # Rule-based "X is" answers from context, tried before OpenAI
+        self.local_completer: Optional[LocalCompleter] = (
+            LocalCompleter(settings.LOCAL_COMPLETION_MIN_CONFIDENCE)
+            if settings.LOCAL_COMPLETION_ENABLED
+            else None
+        )
+        
+        # User → entity → GraphMemory relations, fed by search results
+        self.relation_index = RelationIndex(
+            ttl=settings.RELATION_INDEX_TTL_SECONDS,
+            max_per_user=settings.RELATION_INDEX_MAX_PER_USER,
+        )
+        
+        # user_id + run_id → last retrieval, reused while the prompt is being typed
+        self.sessions = SessionContexts(
+            ttl=settings.SESSION_CONTEXT_TTL_SECONDS,
+            max_sessions=settings.SESSION_CONTEXT_MAX_SESSIONS,
+            min_new_terms=settings.SESSION_NEW_TERMS_RESEARCH,
+        )
+        
+        # Single-flight for identical concurrent enhancements (per process)
+        self._enhance_flight = SingleFlight()
+
+        # Write-behind queue: seed/add memories land in Mem0 in the background
+        self.write_queue = MemoryWriteQueue(
+            self._write_batch,
+            flush_interval=settings.WRITE_QUEUE_FLUSH_INTERVAL_SECONDS,
+            max_batch=settings.WRITE_QUEUE_MAX_BATCH,
+            max_retries=settings.WRITE_QUEUE_MAX_RETRIES,
+            backoff=settings.WRITE_QUEUE_BACKOFF_SECONDS,
+            max_depth=settings.WRITE_QUEUE_MAX_DEPTH,
+            max_concurrent=settings.WRITE_QUEUE_MAX_CONCURRENT_FLUSHES,
+        )
+        
+        # Local memory tier (SQLite + in-process vector index), opened by startup()
+        self.local_store: Optional[LocalMemoryStore] = None
+        if settings.LOCAL_STORE_MODE != "off":
+            self.local_store = LocalMemoryStore(
+                settings.LOCAL_STORE_PATH, min_score=settings.LOCAL_STORE_MIN_SCORE
+            )
+        
         # Initialize OpenAI client for HARDENED completion
         try:
             self.openai_client = AsyncOpenAI(
-                api_key=settings.OPENAI_API_KEY
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL or None,
+                timeout=settings.OPENAI_TIMEOUT_SECONDS,
             )
-            logger.info("✅ INIT: OpenAI client initialized for HARDENED completion")
+            logger.info("init.openai_client")
         except Exception as exc:
-            logger.error(f"❌ INIT: OpenAI client initialization failed: {exc}")
+            logger.error("init.openai_client_failed", error=str(exc))
             raise
 
+    async def startup(self) -> None:
+        """Run one-off startup work: open the local store, validate the Mem0 key and enable GraphMemory."""
+        if self.local_store is not None:
+            await self.local_store.open()
+        await self.client.validate()
+        logger.info("startup.mem0_validated", org_id=self.client.org_id, project_id=self.client.project_id)
+        try:
+            await self.client.update_project(enable_graph=True)
+            self.graph_enabled = True
+            logger.info("startup.graph_enabled")
+        except Exception as exc:
+            logger.warning("startup.graph_unavailable", error=str(exc))
+        self.write_queue.start()
+        self.ready = True
+
+    async def aclose(self) -> None:
+        """Flush queued writes, then release pooled HTTP connections held by the service."""
+        self.ready = False
+        await self.write_queue.close(settings.WRITE_QUEUE_SHUTDOWN_TIMEOUT_SECONDS)
+        await self.app_index.aclose()
+        await self.client.aclose()
+        await self.openai_client.close()
+        await self.cache_backend.aclose()
+        if self.local_store is not None:
+            await self.local_store.aclose()
+        logger.info("shutdown.closed")
+
     async def get_user_app_ids(self, user_id: str) -> List[str]:
-        """Get app_ids using Mem0 Entities API - the most efficient approach."""
-        logger.info(f"🔍 MEMORY: Getting app_ids for user: {user_id} using Entities API")
-        
+        """Get the user's app_ids from the maintained app index."""
+        return list((await self.get_user_apps(user_id)).keys())
+
+    async def get_user_apps(self, user_id: str) -> Dict[str, int]:
+        """Get app_id → memory count for the user, sorted by app_id."""
         try:
-            # Use Entities API to get all apps
-            logger.info(f"📤 MEMORY: Calling Mem0 /v1/entities/ endpoint")
-            headers = {"Authorization": f"Token {settings.MEM0_API_KEY}"}
-            async with httpx.AsyncClient() as client:
-                logger.info(f"📤 MEMORY: Making HTTP request to entities API")
-                response = await client.get("https://api.mem0.ai/v1/entities/", headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"✅ MEMORY: Entities API HTTP request successful")
-
-            logger.info(f"📥 MEMORY: Entities API returned: {data}")
-            logger.info(f"📥 MEMORY: Total apps found: {data.get('total_apps', 0)}")
-
-            # Extract app names from entities (allow any length 3+)
-            app_ids = []
-            for entity in data.get("results", []):
-                if entity.get("type") == "app" and entity.get("total_memories", 0) > 0:
-                    app_name = entity.get("name")
-                    if app_name and len(app_name.strip()) >= 3:  # Allow 3+ chars instead of 8+
-                        app_ids.append(app_name.strip())
-                        logger.info(f"📥 MEMORY: Found valid app: {app_name} (memories: {entity.get('total_memories')})")
-                    else:
-                        logger.info(f"📥 MEMORY: Skipped app (too short): {app_name}")
-
-            logger.info(f"🔍 MEMORY: Extracted valid app_ids: {app_ids}")
-            return sorted(app_ids)
+            apps = await self.app_index.lookup(user_id)
+        except Exception as exc:
+            logger.error("app_ids.lookup_failed", user_id=user_id, error=str(exc))
+            return {}
+        logger.info("app_ids.lookup", user_id=user_id, apps=len(apps))
+        return apps
+
+    async def _load_entities_snapshot(self, etag: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Load the account's app counts, sharing one snapshot across workers."""
+        cached = await self.entities_cache.get(("snapshot",))
+        if cached is not None:
+            logger.info("entities.shared_snapshot", version=cached["version"])
+            return cached
 
+        try:
+            data, new_etag = await self.mem0.call(lambda: self.client.get_entities(etag))
         except httpx.HTTPStatusError as exc:
-            logger.error(f"❌ MEMORY: HTTP error calling entities API: {exc.response.status_code} - {exc.response.text}")
-            return []
-        except Exception as exc:
-            logger.error(f"❌ MEMORY: Entities API failed: {exc}")
-            logger.error(f"❌ MEMORY: Exception type: {type(exc)}")
-            logger.error(f"❌ MEMORY: Exception details: {str(exc)}")
-            return []
+            logger.error("entities.http_error", status=exc.response.status_code, body=exc.response.text)
+            raise
+        if data is None:
+            logger.info("entities.not_modified", etag=etag)
+            return None
+
+        logger.info("entities.loaded", total_apps=data.get("total_apps", 0))
+        apps = extract_app_counts(data.get("results", []))
+        snapshot = {"version": new_etag or snapshot_version(apps), "etag": new_etag, "apps": apps}
+        await self.entities_cache.set(("snapshot",), snapshot, ("entities",))
+        return snapshot
 
     async def create_assignment(self, user_id: str, app_id: str) -> Dict[str, Any]:
         """Create an assignment with GraphMemory-enabled seed memory."""
         assignment_id = str(uuid.uuid4())
         created_at = datetime.now(timezone.utc)
 
-        logger.info(f"🆕 ASSIGNMENT: Creating assignment for user={user_id}, app_id={app_id}")
-        logger.info(f"🆕 ASSIGNMENT: Generated assignment_id={assignment_id}")
-
         try:
-            logger.info(f"📤 ASSIGNMENT: Adding GraphMemory-enabled seed memory")
-            await self.add_memory(
+            await self.enqueue_memory(
                 user_id=user_id,
                 app_id=app_id,
                 messages=[
@@ -127,11 +343,8 @@ class AsyncMemoryService:
                 ],
                 enable_graph=True,  # Enable graph for better relationships
             )
-            logger.info(f"✅ ASSIGNMENT: GraphMemory-enabled seed memory added successfully")
         except Exception as exc:  # pragma: no cover - network failures
-            logger.error(
-                f"❌ ASSIGNMENT: Failed to seed assignment memory for user={user_id} app={app_id}: {exc}"
-            )
+            logger.error("assignment.seed_failed", user_id=user_id, app_id=app_id, error=str(exc))
 
         assignment_data = {
             "id": assignment_id,
@@ -142,7 +355,7 @@ class AsyncMemoryService:
             "mem0_namespace": f"{user_id}:{app_id}",
         }
         
-        logger.info(f"✅ ASSIGNMENT: Created successfully: {assignment_data}")
+        logger.info("assignment.created", assignment_id=assignment_id, user_id=user_id, app_id=app_id)
         return assignment_data
 
     async def add_memory(
@@ -151,18 +364,15 @@ class AsyncMemoryService:
         app_id: str, 
         messages: List[Dict[str, Any]],
         enable_graph: bool = True,
-        run_id: Optional[str] = None
+        run_id: Optional[str] = None,
+        *,
+        record_app: bool = True,
     ) -> Dict[str, Any]:
         """Store memory with GraphMemory support and v1.1 output format."""
-        logger.info(f"📤 MEMORY: Adding memory for user_id={user_id}, app_id={app_id}")
-        logger.info(f"📤 MEMORY: Messages count: {len(messages)}")
-        logger.info(f"📤 MEMORY: GraphMemory enabled: {enable_graph}")
-        logger.info(f"📤 MEMORY: run_id: {run_id}")
-        logger.info(f"📤 MEMORY: Messages preview: {messages}")
+        logger.payload("add.messages", user_id=user_id, app_id=app_id, messages=messages)
+        await self._mirror_locally(user_id, app_id, run_id, messages)
 
         try:
-            logger.info(f"📤 MEMORY: Calling Mem0 add() with GraphMemory")
-            
             # Prepare add() parameters
             add_params = {
                 "user_id": user_id,
@@ -174,25 +384,101 @@ class AsyncMemoryService:
             if run_id:
                 add_params["run_id"] = run_id
                 
-            logger.info(f"📤 MEMORY: Add parameters: {add_params}")
-            
-            result = await asyncio.to_thread(
-                self.client.add,
-                messages,
-                **add_params
-            )
+            add_start = time.perf_counter()
+            result = await self.mem0.call(lambda: self.client.add(messages, **add_params))
 
-            logger.info(f"📥 MEMORY: Mem0 add returned: {result}")
-            logger.info(f"📥 MEMORY: Add response type: {type(result)}")
-            logger.info(f"✅ MEMORY: Memory added successfully with GraphMemory")
+            if record_app:
+                self.app_index.record(user_id, app_id)
+            dropped = await self.invalidate_user_caches(user_id, app_id)
+            logger.info(
+                "add.done",
+                user_id=user_id,
+                app_id=app_id,
+                run_id=run_id,
+                messages=len(messages),
+                enable_graph=enable_graph,
+                invalidated=dropped,
+                duration_ms=round((time.perf_counter() - add_start) * 1000, 1),
+            )
+            logger.payload("add.response", result=result)
             return result
 
         except Exception as exc:
-            logger.error(f"❌ MEMORY: Add memory failed: {exc}")
-            logger.error(f"❌ MEMORY: Add exception type: {type(exc)}")
-            logger.error(f"❌ MEMORY: Add exception details: {str(exc)}")
+            logger.error("add.failed", user_id=user_id, app_id=app_id, error=str(exc), error_type=type(exc).__name__)
             raise
 
+    async def _mirror_locally(
+        self, user_id: str, app_id: Optional[str], run_id: Optional[str], messages: List[Dict[str, Any]]
+    ) -> None:
+        """Copy message texts into the local store; never fails the Mem0 write."""
+        if self.local_store is None:
+            return
+        texts = [m["content"] for m in messages if isinstance(m.get("content"), str)]
+        try:
+            added = await self.local_store.add(user_id, app_id, run_id, texts)
+        except Exception as exc:
+            logger.warning("local_store.add_failed", user_id=user_id, app_id=app_id, error=str(exc))
+            return
+        if added:
+            logger.sampled("local_store.added", user_id=user_id, app_id=app_id, memories=added)
+
+    def _search_local(
+        self, query: str, user_id: str, app_id: Optional[str], limit: int, run_id: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Search the local tier, app-scoped first, then user-wide; returns (memories, strategy)."""
+        if self.local_store is None:
+            return {"results": [], "relations": []}, None
+        scopes = [app_id, None] if app_id else [None]
+        for scope in scopes:
+            started = time.perf_counter()
+            memories = self.local_store.search(query, user_id, app_id=scope, run_id=run_id, limit=limit)
+            hit = self._has_memories(memories)
+            SEARCH_STRATEGY_SECONDS.observe(
+                time.perf_counter() - started, strategy=LOCAL_STRATEGY_NAME, outcome="hit" if hit else "empty"
+            )
+            if hit:
+                strategy = {
+                    "name": LOCAL_STRATEGY_NAME,
+                    "version": "local",
+                    "filters": {"app_id": scope} if scope else {},
+                    "enable_graph": False,
+                }
+                return memories, strategy
+        return {"results": [], "relations": []}, None
+
+    def local_store_stats(self) -> Optional[Dict[str, Any]]:
+        if self.local_store is None:
+            return None
+        return {"mode": settings.LOCAL_STORE_MODE, **self.local_store.stats()}
+
+    async def enqueue_memory(
+        self,
+        user_id: str,
+        app_id: str,
+        messages: List[Dict[str, Any]],
+        enable_graph: bool = True,
+        run_id: Optional[str] = None,
+    ) -> None:
+        """Accept memories for a background Mem0 add; writes inline if the queue is full."""
+        try:
+            self.write_queue.enqueue(WriteKey(user_id, app_id, run_id, enable_graph), messages)
+        except WriteQueueFull as exc:
+            logger.warning("add.queue_unavailable", error=str(exc))
+            await self.add_memory(user_id, app_id, messages, enable_graph, run_id)
+            return
+        # The app shows up in the user's list right away, not after the flush
+        self.app_index.record(user_id, app_id)
+        logger.info("add.queued", user_id=user_id, app_id=app_id, messages=len(messages))
+
+    async def _write_batch(self, key: WriteKey, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Write-queue flush target: one Mem0 add for a coalesced batch."""
+        return await self.add_memory(
+            key.user_id, key.app_id, messages, key.enable_graph, key.run_id, record_app=False
+        )
+
+    def write_queue_status(self) -> Dict[str, Any]:
+        return self.write_queue.status()
+
     async def two_stage_enhance(
         self,
         *,
@@ -201,6 +487,279 @@ class AsyncMemoryService:
         app_id: Optional[str] = None,
         run_id: Optional[str] = None,
         limit: int = 5,
+        deadline_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Cached, single-flight front for the enhancement pipeline.
+        
+        Repeats within ENHANCE_CACHE_TTL_SECONDS are served from the result
+        cache, and concurrent identical requests (same cleaned prompt, user,
+        app, run and deadline) share one in-flight enhancement. A
+        near-identical prompt's result is reused next (see
+        _near_enhancement). Results degraded by a deadline are returned but
+        not cached.
+        """
+        start_time = time.time()
+        cleaned_prompt = self._light_cleanup(prompt)
+        # Only complete results are cached, so the cache key leaves out the deadline
+        cache_key = (cleaned_prompt, user_id, app_id, limit)
+        # A shared run returns the leader's result even when it is degraded, so
+        # only callers with the same budget (and typing session) share one
+        flight_key = (*cache_key, run_id, deadline_ms)
+        
+        cached = await self.enhance_cache.get(cache_key)
+        if cached is None:
+            cached = self._near_enhancement(cache_key)
+        if cached is not None:
+            logger.sampled("enhance.cache_hit", user_id=user_id, app_id=app_id)
+            ENHANCE_STAGE_SECONDS.observe(time.time() - start_time, stage="total")
+            return {**cached, "processing_time": round(time.time() - start_time, 3), "cache_hit": True}
+
+        async def compute() -> Dict[str, Any]:
+            result = await self._two_stage_enhance_uncached(
+                prompt=prompt, user_id=user_id, app_id=app_id, run_id=run_id, limit=limit,
+                deadline_ms=deadline_ms,
+            )
+            if not self._is_degraded(result):
+                await self._cache_enhancement(cache_key, result)
+            return result
+
+        result, shared = await self._enhance_flight.run(flight_key, compute)
+        ENHANCE_STAGE_SECONDS.observe(time.time() - start_time, stage="total")
+        if shared:
+            logger.sampled("enhance.coalesced", user_id=user_id, app_id=app_id)
+            CACHE_LOOKUPS.inc(cache="enhance", result="coalesced")
+            return {**result, "processing_time": round(time.time() - start_time, 3), "cache_hit": True}
+        return result
+
+    async def stream_enhance(
+        self,
+        *,
+        prompt: str,
+        user_id: str,
+        app_id: Optional[str] = None,
+        run_id: Optional[str] = None,
+        limit: int = 5,
+        deadline_ms: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of two_stage_enhance.
+        
+        Yields ``{"event": "token", "data": {"text": ...}}`` while the completion
+        arrives, then ``{"event": "done", "data": result}`` where ``result`` has
+        the same shape as two_stage_enhance and is authoritative.
+        """
+        start_time = time.time()
+        with ENHANCE_STAGE_SECONDS.time(stage="cleanup"):
+            cleaned_prompt = self._light_cleanup(prompt)
+        # Streams never share a run; like two_stage_enhance, only complete results are cached
+        cache_key = (cleaned_prompt, user_id, app_id, limit)
+
+        cached = await self.enhance_cache.get(cache_key)
+        if cached is None:
+            cached = self._near_enhancement(cache_key)
+        if cached is not None:
+            logger.sampled("enhance.stream.cache_hit", user_id=user_id, app_id=app_id)
+            ENHANCE_STAGE_SECONDS.observe(time.time() - start_time, stage="total")
+            yield {
+                "event": "done",
+                "data": {**cached, "processing_time": round(time.time() - start_time, 3), "cache_hit": True},
+            }
+            return
+
+        open_upstream = self._open_upstream()
+        if open_upstream is not None:
+            logger.warning("enhance.circuit_open", upstream=open_upstream, user_id=user_id)
+            yield {
+                "event": "done",
+                "data": self._build_result(
+                    cleaned_prompt, self._empty_retrieval(), start_time, circuit_open=open_upstream
+                ),
+            }
+            return
+
+        search_deadline, deadline = self._enhance_deadlines(deadline_ms)
+        retrieval = await self._session_retrieval(cleaned_prompt, user_id, app_id, run_id, limit, search_deadline)
+        timed_out_stage = "search" if retrieval["timed_out"] else None
+        enhanced = cleaned_prompt
+        engine = "none"
+        local = self._local_completion(cleaned_prompt, retrieval, user_id) if retrieval["context"].strip() else None
+        if local is not None:
+            engine = "local"
+            enhanced = local
+            # The whole completion at once: the part after the prompt
+            yield {"event": "token", "data": {"text": local[len(cleaned_prompt):].lstrip()}}
+        elif retrieval["context"].strip():
+            engine = "openai"
+            async for kind, text in self._stream_hardened_completion(
+                prompt=cleaned_prompt,
+                context=retrieval["context"],
+                user_id=user_id,
+                deadline=deadline,
+                vocabulary=retrieval["vocabulary"],
+            ):
+                if kind == "token":
+                    yield {"event": "token", "data": {"text": text}}
+                else:
+                    enhanced = text
+                    if kind == "timeout":
+                        timed_out_stage = timed_out_stage or "completion"
+
+        result = self._build_result(enhanced, retrieval, start_time, timed_out_stage, engine=engine)
+        if not self._is_degraded(result):
+            await self._cache_enhancement(cache_key, result)
+        ENHANCE_STAGE_SECONDS.observe(time.time() - start_time, stage="total")
+        logger.info(
+            "enhance.stream.done",
+            user_id=user_id,
+            app_id=app_id,
+            strategy=result["strategy_used"],
+            memories=result["memories_used"],
+            duration_s=result["processing_time"],
+            timed_out_stage=timed_out_stage,
+            engine=engine,
+        )
+        yield {"event": "done", "data": result}
+
+    async def _cache_enhancement(self, cache_key: Tuple[Any, ...], result: Dict[str, Any]) -> None:
+        cleaned_prompt, user_id, app_id, limit = cache_key
+        await self.enhance_cache.set(cache_key, result, self._cache_tags(user_id, app_id))
+        self.near_enhance.store((user_id, app_id, limit), cleaned_prompt, result)
+
+    def _near_enhancement(self, cache_key: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+        """A near-identical prompt's cached enhancement, rebased onto this prompt.
+
+        A completion continues the prompt's last word, so only a match ending
+        in the same word (punctuation included) is reused; its completion is
+        re-attached to this prompt and passes the guardrails again.
+        """
+        cleaned_prompt, user_id, app_id, limit = cache_key
+        last_word = cleaned_prompt.rsplit(" ", 1)[-1].lower()
+
+        def same_ending(match: NearMatch) -> bool:
+            return (
+                match.text.rsplit(" ", 1)[-1].lower() == last_word
+                and match.value["enhanced_prompt"].lower().startswith(match.text.lower())
+            )
+
+        match = self.near_enhance.lookup((user_id, app_id, limit), cleaned_prompt, same_ending)
+        if match is None:
+            return None
+        completion = match.value["enhanced_prompt"][len(match.text):]
+        if not normalize(completion):
+            # No completion, at most the closing punctuation
+            enhanced = cleaned_prompt + completion.strip()
+        else:
+            enhanced = apply_guardrails(
+                completion, cleaned_prompt, self._completion_char_max(cleaned_prompt)
+            )
+            if enhanced == cleaned_prompt:
+                return None
+        logger.sampled("enhance.near_hit", user_id=user_id, similarity=round(match.similarity, 3))
+        return {**match.value, "enhanced_prompt": enhanced}
+
+    async def batch_enhance(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enhance many prompts at once; identical items (prompt, user, app, run and deadline) run once."""
+        return await self._run_batch(
+            items,
+            key=lambda item: (
+                self._light_cleanup(item["prompt"]),
+                item["user_id"],
+                item.get("app_id"),
+                item.get("run_id"),
+                item.get("deadline_ms"),
+            ),
+            run=lambda item: self.two_stage_enhance(
+                prompt=item["prompt"],
+                user_id=item["user_id"],
+                app_id=item.get("app_id"),
+                run_id=item.get("run_id"),
+                deadline_ms=item.get("deadline_ms"),
+            ),
+            error="Enhancement failed",
+        )
+
+    async def batch_search(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Search many queries at once; identical searches run once."""
+        return await self._run_batch(
+            items,
+            key=lambda item: (
+                self._light_cleanup(item["query"]),
+                item["user_id"],
+                item.get("app_id"),
+                item.get("run_id"),
+                item.get("limit", 5),
+            ),
+            run=lambda item: self.search_memories(
+                query=item["query"],
+                user_id=item["user_id"],
+                limit=item.get("limit", 5),
+                app_id=item.get("app_id"),
+                run_id=item.get("run_id"),
+            ),
+            error="Memory search failed",
+        )
+
+    async def _run_batch(
+        self,
+        items: List[Dict[str, Any]],
+        *,
+        key: Callable[[Dict[str, Any]], Hashable],
+        run: Callable[[Dict[str, Any]], Awaitable[Any]],
+        error: str,
+    ) -> List[Dict[str, Any]]:
+        """
+        Dedupe ``items`` by ``key`` and run the unique ones with bounded concurrency.
+        
+        Returns one outcome per input item, in order, with ``result`` or
+        ``error``, the item's own ``processing_time`` and whether it reused
+        another item's work.
+        """
+        semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+        async def guarded(item: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                started = time.time()
+                try:
+                    return {"result": await run(item), "error": None,
+                            "processing_time": round(time.time() - started, 3)}
+                except Exception as exc:
+                    logger.error("batch.item_failed", user_id=item.get("user_id"), error=str(exc))
+                    return {"result": None, "error": error,
+                            "processing_time": round(time.time() - started, 3)}
+
+        tasks: Dict[Hashable, asyncio.Task] = {}
+        keys = []
+        for item in items:
+            item_key = key(item)
+            keys.append(item_key)
+            if item_key not in tasks:
+                tasks[item_key] = asyncio.create_task(guarded(item))
+
+        logger.info(
+            "batch.start",
+            items=len(items),
+            unique=len(tasks),
+            concurrency=settings.BATCH_MAX_CONCURRENCY,
+        )
+        await asyncio.gather(*tasks.values())
+
+        outcomes = []
+        seen: Set[Hashable] = set()
+        for index, item_key in enumerate(keys):
+            outcomes.append({"index": index, **tasks[item_key].result(), "deduplicated": item_key in seen})
+            seen.add(item_key)
+        return outcomes
+
+    async def _two_stage_enhance_uncached(
+        self,
+        *,
+        prompt: str,
+        user_id: str,
+        app_id: Optional[str] = None,
+        run_id: Optional[str] = None,
+        limit: int = 5,
+        deadline_ms: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         HARDENED prompt enhancement with v2 API, GraphMemory, and expert-recommended strict controls.
@@ -211,29 +770,282 @@ class AsyncMemoryService:
         - Vocabulary-constrained generation
         - Pattern-specific handling for "X is..." completions
         - Post-processing guardrails with hard truncation
-        """
-        logger.info(f"🔒 HARDENED ENHANCE: Starting production-grade enhancement")
-        logger.info(f"🔒 HARDENED ENHANCE: Input prompt: '{prompt}'")
-        logger.info(f"🔒 HARDENED ENHANCE: user_id: {user_id}")
-        logger.info(f"🔒 HARDENED ENHANCE: app_id: {app_id}")
-        logger.info(f"🔒 HARDENED ENHANCE: run_id: {run_id} (for context info only)")
-        logger.info(f"🔒 HARDENED ENHANCE: limit: {limit}")
         
+        The whole pipeline runs within ``deadline_ms`` (ENHANCE_DEADLINE_SECONDS
+        by default): retrieval gets ENHANCE_SEARCH_BUDGET_FRACTION of it and the
+        completion the remainder. A stage that runs out is cancelled and the
+        request degrades to the cleaned prompt, reporting ``timed_out_stage``.
+        """
         start_time = time.time()
+        search_deadline, deadline = self._enhance_deadlines(deadline_ms)
         
         # Step 1: Light cleanup
-        logger.info(f"🧹 CLEANUP: Starting light cleanup")
-        cleaned_prompt = self._light_cleanup(prompt)
-        logger.info(f"🧹 CLEANUP: '{prompt}' → '{cleaned_prompt}'")
+        with ENHANCE_STAGE_SECONDS.time(stage="cleanup"):
+            cleaned_prompt = self._light_cleanup(prompt)
+        logger.payload("enhance.input", prompt=prompt, cleaned_prompt=cleaned_prompt, run_id=run_id)
+
+        # A tripped upstream would only fail slowly; answer with the cleanup now
+        open_upstream = self._open_upstream()
+        if open_upstream is not None:
+            logger.warning("enhance.circuit_open", upstream=open_upstream, user_id=user_id)
+            return self._build_result(
+                cleaned_prompt, self._empty_retrieval(), start_time, circuit_open=open_upstream
+            )
+
+        # Steps 2-3: Hierarchical search and context building (or the
+        # session's, when this prompt extends the one it was built for)
+        retrieval = await self._session_retrieval(cleaned_prompt, user_id, app_id, run_id, limit, search_deadline)
+        used_strategy = retrieval["strategy"]
+        context = retrieval["context"]
+        timed_out_stage = "search" if retrieval["timed_out"] else None
         
-        if cleaned_prompt == prompt:
-            logger.info(f"🧹 CLEANUP: No changes needed")
+        # Step 4: HARDENED enhancement with expert recommendations, unless
+        # the context answers an "X is" prompt outright
+        engine = "none"
+        if context.strip():
+            enhance_start = time.time()
+            enhanced = self._local_completion(cleaned_prompt, retrieval, user_id)
+            if enhanced is not None:
+                engine = "local"
+            else:
+                engine = "openai"
+                try:
+                    enhanced = await self._hardened_enhance_with_context(
+                        prompt=cleaned_prompt,
+                        context=context,
+                        user_id=user_id,
+                        strategy_used=used_strategy["name"] if used_strategy else "none",
+                        deadline=deadline,
+                        vocabulary=retrieval["vocabulary"],
+                    )
+                except asyncio.TimeoutError:
+                    enhanced = cleaned_prompt
+                    timed_out_stage = timed_out_stage or "completion"
+            
+            logger.sampled(
+                "enhance.completion",
+                engine=engine,
+                duration_ms=round((time.time() - enhance_start) * 1000, 1),
+                prompt_chars=len(cleaned_prompt),
+                enhanced_chars=len(enhanced),
+            )
         else:
-            logger.info(f"🧹 CLEANUP: Cleaned successfully - removed extra whitespace")
+            enhanced = cleaned_prompt
+
+        result = self._build_result(enhanced, retrieval, start_time, timed_out_stage, engine=engine)
+        logger.info(
+            "enhance.done",
+            user_id=user_id,
+            app_id=app_id,
+            strategy=result["strategy_used"],
+            memories=result["memories_used"],
+            enhanced=bool(context.strip()),
+            engine=engine,
+            duration_s=result["processing_time"],
+            timed_out_stage=timed_out_stage,
+        )
+        logger.payload("enhance.result", result=result)
+        
+        return result
+
+    @staticmethod
+    def _build_result(
+        enhanced: str,
+        retrieval: Dict[str, Any],
+        start_time: float,
+        timed_out_stage: Optional[str] = None,
+        circuit_open: Optional[str] = None,
+        engine: str = "none",
+    ) -> Dict[str, Any]:
+        """Shape the enhancement payload returned to the router."""
+        used_strategy = retrieval["strategy"]
+        ENHANCE_ENGINE.inc(engine=engine)
+        return {
+            "enhanced_prompt": enhanced,
+            "memories_used": len(retrieval["memories"] or []),
+            "processing_time": round(time.time() - start_time, 3),
+            "strategy_used": used_strategy["name"] if used_strategy else "none",
+            "graph_enabled": used_strategy.get("enable_graph", False) if used_strategy else False,
+            "time_saved": round(retrieval["time_saved"], 3),
+            "timed_out_stage": timed_out_stage,
+            "circuit_open": circuit_open,
+            "engine": engine,
+            "session_reused": retrieval["session_reused"],
+        }
+
+    @staticmethod
+    def _empty_retrieval() -> Dict[str, Any]:
+        return {
+            "memories": [],
+            "strategy": None,
+            "time_saved": 0.0,
+            "context": "",
+            "segments": [],
+            "vocabulary": None,
+            "timed_out": False,
+            "session_reused": False,
+        }
+
+    @staticmethod
+    def _is_degraded(result: Dict[str, Any]) -> bool:
+        """True for results cut short by a deadline or an open breaker (never cached)."""
+        return result.get("timed_out_stage") is not None or result.get("circuit_open") is not None
 
+    def _open_upstream(self) -> Optional[str]:
+        """Name of the first open upstream that enhancement cannot work around, if any.
+
+        An open Mem0 breaker is not blocking while the local store can stand in.
+        """
+        for upstream in (self.mem0, self.openai):
+            if upstream is self.mem0 and self.local_store is not None:
+                continue
+            if upstream.breaker.is_open:
+                return upstream.name
+        return None
+
+    def upstream_status(self) -> Dict[str, Dict[str, Any]]:
+        return {upstream.name: upstream.snapshot() for upstream in (self.mem0, self.openai)}
+
+    async def _retrieve_context(
+        self,
+        cleaned_prompt: str,
+        user_id: str,
+        app_id: Optional[str],
+        limit: int,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Run the hierarchical Mem0 search (within ``deadline``) and build the enhancement context.
+
+        With LOCAL_STORE_MODE "first" the local tier is consulted before Mem0;
+        with "fallback" it answers when Mem0 finds nothing, fails, runs out of
+        time or sits behind an open breaker.
+        """
         # Step 2: Smart search strategy (hierarchical fallback)
-        logger.info(f"🔍 STRATEGY: Starting smart hierarchical search")
+        search_mode = settings.SEARCH_STRATEGY_MODE
+        local_mode = settings.LOCAL_STORE_MODE if self.local_store is not None else "off"
+        
+        search_strategies = self._build_search_strategies(app_id)
+        memories: Any = []
+        used_strategy: Optional[Dict[str, Any]] = None
+        time_saved = 0.0
+        timed_out = False
+
+        if local_mode == "first":
+            memories, used_strategy = self._search_local(cleaned_prompt, user_id, app_id, limit)
+
+        if used_strategy is not None:
+            search_strategies = []
+        elif local_mode != "off" and self.mem0.breaker.is_open:
+            logger.sampled("search.mem0_circuit_open", user_id=user_id)
+            search_strategies = []
+        elif search_mode in ("parallel", "hedged"):
+            hedge_delay = settings.SEARCH_HEDGE_DELAY_SECONDS if search_mode == "hedged" else None
+            memories, used_strategy, time_saved, timed_out = await self._search_concurrently(
+                cleaned_prompt, user_id, search_strategies, limit, hedge_delay=hedge_delay, deadline=deadline
+            )
+        else:
+            memories, used_strategy, timed_out = await self._search_sequentially(
+                cleaned_prompt, user_id, search_strategies, limit, deadline=deadline
+            )
+
+        if used_strategy is None and local_mode == "fallback":
+            memories, used_strategy = self._search_local(cleaned_prompt, user_id, app_id, limit)
+
+        logger.payload("retrieve.memories", memories=memories)
+        STRATEGY_SELECTED.inc(strategy=used_strategy["name"] if used_strategy else "none")
+        passed_over = (
+            search_strategies[: search_strategies.index(used_strategy)]
+            if used_strategy in search_strategies
+            else search_strategies
+        )
+        for strategy in passed_over:
+            SEARCH_FALLBACKS.inc(strategy=strategy["name"])
+
+        # Step 3: Enhanced context building (supports GraphMemory format);
+        # app-scoped relations come straight from the relation index
+        with ENHANCE_STAGE_SECONDS.time(stage="context"):
+            target_app_id = used_strategy["filters"].get("app_id") if used_strategy else None
+            relation_groups = (
+                self.relation_index.lookup(user_id, target_app_id, settings.RELATION_CONTEXT_LIMIT)
+                if target_app_id
+                else None
+            )
+            segments = self._context_segments(
+                memories, used_strategy, relation_groups, self.context_templates
+            )
+            context = self.context_packer.pack(segments, cleaned_prompt)
+        logger.sampled(
+            "retrieve.done",
+            mode=search_mode,
+            strategy=used_strategy["name"] if used_strategy else None,
+            context_chars=len(context),
+            time_saved_s=round(time_saved, 3),
+        )
+        logger.payload("retrieve.context", context=context)
         
+        return {
+            "memories": memories,
+            "strategy": used_strategy,
+            "time_saved": time_saved,
+            "context": context,
+            # Every segment, before packing, for the local completer
+            "segments": segments,
+            # Built from every retrieved segment, so it does not change with the prompt
+            "vocabulary": self._segments_vocabulary(segments),
+            "timed_out": timed_out,
+            "session_reused": False,
+        }
+
+    async def _session_retrieval(
+        self,
+        cleaned_prompt: str,
+        user_id: str,
+        app_id: Optional[str],
+        run_id: Optional[str],
+        limit: int,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """_retrieve_context, reusing the run_id session's retrieval when the prompt only extends it.
+
+        The reused memories and segments are re-packed for this prompt, so
+        a follow-up keystroke costs the completion alone.
+        """
+        if run_id is None:
+            return await self._retrieve_context(cleaned_prompt, user_id, app_id, limit, deadline)
+
+        previous = self.sessions.lookup(user_id, run_id, cleaned_prompt, app_id, limit)
+        if previous is None:
+            retrieval = await self._retrieve_context(cleaned_prompt, user_id, app_id, limit, deadline)
+            if not retrieval["timed_out"]:
+                self.sessions.store(user_id, run_id, cleaned_prompt, app_id, limit, retrieval)
+            return retrieval
+
+        with ENHANCE_STAGE_SECONDS.time(stage="context"):
+            context = self.context_packer.pack(previous["segments"], cleaned_prompt)
+        logger.sampled("retrieve.session_reused", user_id=user_id, run_id=run_id, context_chars=len(context))
+        return {
+            **previous,
+            "context": context,
+            "time_saved": 0.0,
+            "session_reused": True,
+        }
+
+    def _segments_vocabulary(self, segments: List[ContextSegment]) -> Optional[ContextVocabulary]:
+        """Ranked vocabulary of a retrieval, cached on its segments (not the prompt-packed text)."""
+        if not segments:
+            return None
+        return self.vocabulary_cache.get(
+            tuple(segment.text for segment in segments), segments_to_text(segments)
+        )
+
+    def _index_relations(self, user_id: str, memories: Any, token: Hashable) -> None:
+        """Feed GraphMemory relations from a search payload into the relation index."""
+        if isinstance(memories, dict) and memories.get("relations"):
+            self.relation_index.ingest(user_id, memories["relations"], token=token)
+
+    @staticmethod
+    def _build_search_strategies(app_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Return the hierarchical search strategies in priority order."""
         search_strategies = []
         
         # Strategy 1: App-wide search (primary for enhancement)
@@ -263,114 +1075,262 @@ class AsyncMemoryService:
             "enable_graph": False,
             "output_format": "v1.0"
         })
+        return search_strategies
+
+    @staticmethod
+    def _has_memories(memories: Any) -> bool:
+        """True when a search returned results (v1 list) or results/relations (v2 graph dict)."""
+        if isinstance(memories, dict):
+            return bool(memories.get("results") or memories.get("relations"))
+        return bool(memories)
 
-        memories = []
-        used_strategy = None
+    async def _run_strategy(
+        self, index: int, strategy: Dict[str, Any], query: str, user_id: str, limit: int
+    ) -> Any:
+        """Execute one search strategy against Mem0 and return the raw memories."""
+        search_start = time.time()
         
-        for i, strategy in enumerate(search_strategies):
-            logger.info(f"🔍 STRATEGY {i+1} ({strategy['name']}): {strategy}")
-            
-            try:
-                search_start = time.time()
-                
-                # Prepare search parameters
-                search_params = {
-                    "user_id": user_id,
-                    "limit": limit,
-                }
-                
-                # Add strategy-specific parameters
-                if strategy.get("version") == "v2":
-                    search_params["version"] = "v2"
-                    if strategy["filters"]:
-                        search_params["filters"] = strategy["filters"]
-                        
-                if strategy.get("enable_graph"):
-                    search_params["enable_graph"] = True
-                    search_params["output_format"] = strategy["output_format"]
-                else:
-                    if strategy["filters"]:
-                        search_params["filters"] = strategy["filters"]
-                
-                logger.info(f"📤 STRATEGY {i+1}: Search parameters: {search_params}")
-                
-                memories = await asyncio.to_thread(
-                    self.client.search,
-                    cleaned_prompt,
-                    **search_params
-                )
-                
-                search_time = time.time() - search_start
-                logger.info(f"📥 STRATEGY {i+1}: Found {len(memories or [])} memories in {search_time:.3f}s")
+        # Prepare search parameters
+        search_params = {
+            "user_id": user_id,
+            "limit": limit,
+        }
+        
+        # Add strategy-specific parameters
+        if strategy.get("version") == "v2":
+            search_params["version"] = "v2"
+            if strategy["filters"]:
+                search_params["filters"] = strategy["filters"]
                 
-                if memories:
-                    used_strategy = strategy
-                    logger.info(f"✅ SUCCESS: Using strategy {i+1} ({strategy['name']})")
-                    logger.info(f"📥 MEMORIES: Raw data: {memories}")
-                    break
-                else:
-                    logger.info(f"❌ STRATEGY {i+1}: No memories found, trying next strategy")
-                    
-            except Exception as exc:
-                logger.error(f"❌ STRATEGY {i+1}: Search failed: {exc}")
-                logger.error(f"❌ STRATEGY {i+1}: Exception type: {type(exc)}")
-                continue
-
-        if not memories:
-            logger.info(f"📥 FINAL: No memories found with any strategy")
+        if strategy.get("enable_graph"):
+            search_params["enable_graph"] = True
+            search_params["output_format"] = strategy["output_format"]
         else:
-            logger.info(f"✅ FINAL: Found {len(memories)} memories using {used_strategy['name']}")
-
-        # Step 3: Enhanced context building (supports GraphMemory format)
-        logger.info(f"🧠 CONTEXT: Building enhanced context from memories")
-        context = self._build_enhanced_context(memories, used_strategy)
+            if strategy["filters"]:
+                search_params["filters"] = strategy["filters"]
         
-        if context.strip():
-            logger.info(f"🧠 CONTEXT: Built rich context (length: {len(context)} chars)")
-            logger.info(f"🧠 CONTEXT: Context preview: {context[:300]}...")
-        else:
-            logger.info(f"🧠 CONTEXT: No meaningful context extracted from memories")
+        cache_key = self._search_cache_key(
+            query,
+            user_id,
+            app_id=strategy["filters"].get("app_id"),
+            run_id=None,
+            version=strategy["version"],
+            enable_graph=strategy["enable_graph"],
+            limit=limit,
+        )
+        memories = await self.search_cache.get(cache_key)
+        if memories is not None:
+            logger.sampled("search.strategy.cache_hit", strategy=strategy["name"])
+            self._index_relations(user_id, memories, cache_key)
+            return memories
+        near = self.near_search.lookup(cache_key[1:], query)
+        if near is not None:
+            # Stored with the key it was fetched under, the relation index's payload token
+            near_key, memories = near.value
+            logger.sampled("search.strategy.near_hit", strategy=strategy["name"], similarity=round(near.similarity, 3))
+            self._index_relations(user_id, memories, near_key)
+            return memories
         
-        # Step 4: HARDENED enhancement with expert recommendations
-        if context.strip():
-            logger.info(f"🔒 DECISION: Rich context found - applying HARDENED enhancement")
-            enhance_start = time.time()
-            
-            enhanced = await self._hardened_enhance_with_context(
-                prompt=cleaned_prompt,
-                context=context,
-                user_id=user_id,
-                strategy_used=used_strategy["name"] if used_strategy else "none"
-            )
-            
-            enhance_time = time.time() - enhance_start
-            logger.info(f"🔒 ENHANCEMENT: HARDENED enhancement completed in {enhance_time:.3f}s")
-            logger.info(f"🔒 ENHANCEMENT: Original length: {len(cleaned_prompt)} chars")
-            logger.info(f"🔒 ENHANCEMENT: Enhanced length: {len(enhanced)} chars")
-            logger.info(f"🔒 ENHANCEMENT: Enhanced preview: {enhanced[:200]}...")
-            
-        else:
-            logger.info(f"📝 DECISION: No relevant context - returning cleaned prompt")
-            enhanced = cleaned_prompt
-
-        processing_time = time.time() - start_time
+        try:
+            memories = await self.mem0.call(lambda: self.client.search(query, **search_params))
+        except Exception:
+            SEARCH_STRATEGY_SECONDS.observe(time.time() - search_start, strategy=strategy["name"], outcome="error")
+            raise
+        hit = self._has_memories(memories)
+        search_time = time.time() - search_start
+        SEARCH_STRATEGY_SECONDS.observe(
+            search_time, strategy=strategy["name"], outcome="hit" if hit else "empty"
+        )
+        await self.search_cache.set(
+            cache_key, memories, self._cache_tags(user_id, strategy["filters"].get("app_id"))
+        )
+        self.near_search.store(cache_key[1:], query, (cache_key, memories))
+        self._index_relations(user_id, memories, cache_key)
         
-        result = {
-            "enhanced_prompt": enhanced,
-            "memories_used": len(memories or []),
-            "processing_time": round(processing_time, 3),
-            "strategy_used": used_strategy["name"] if used_strategy else "none",
-            "graph_enabled": used_strategy.get("enable_graph", False) if used_strategy else False
-        }
+        logger.sampled(
+            "search.strategy",
+            strategy=strategy["name"],
+            hit=hit,
+            duration_ms=round(search_time * 1000, 1),
+        )
+        return memories
+
+    async def _search_sequentially(
+        self,
+        query: str,
+        user_id: str,
+        strategies: List[Dict[str, Any]],
+        limit: int,
+        *,
+        deadline: Optional[float] = None,
+    ) -> Tuple[Any, Optional[Dict[str, Any]], bool]:
+        """
+        Try each strategy in turn and stop at the first non-empty result.
         
-        logger.info(f"✅ HARDENED ENHANCE: Enhancement completed successfully")
-        logger.info(f"✅ HARDENED ENHANCE: Total processing time: {processing_time:.3f}s")
-        logger.info(f"✅ HARDENED ENHANCE: Memories used: {result['memories_used']}")
-        logger.info(f"✅ HARDENED ENHANCE: Strategy used: {result['strategy_used']}")
-        logger.info(f"✅ HARDENED ENHANCE: Graph enabled: {result['graph_enabled']}")
-        logger.info(f"✅ HARDENED ENHANCE: Result preview: {result}")
+        Each strategy is cut off after SEARCH_STRATEGY_TIMEOUT_SECONDS (or at
+        ``deadline``) so a slow one cannot starve its fallbacks. The flag is
+        True when any strategy was cut off or the deadline ran out. Only the
+        server-side cap counts against the Mem0 breaker: a caller's short
+        ``deadline`` says nothing about Mem0's health.
+        """
+        timed_out = False
+        cap = self._stage_timeout(None, settings.SEARCH_STRATEGY_TIMEOUT_SECONDS)
+        for i, strategy in enumerate(strategies):
+            timeout = self._stage_timeout(deadline, settings.SEARCH_STRATEGY_TIMEOUT_SECONDS)
+            if timeout is not None and timeout <= 0:
+                return [], None, True
+            search_start = time.time()
+            try:
+                memories = await asyncio.wait_for(
+                    self._run_strategy(i, strategy, query, user_id, limit), timeout
+                )
+            except asyncio.TimeoutError:
+                timed_out = True
+                if cap is not None and timeout >= cap:
+                    self.mem0.record_timeout()
+                SEARCH_STRATEGY_SECONDS.observe(
+                    time.time() - search_start, strategy=strategy["name"], outcome="timeout"
+                )
+                logger.warning("search.strategy.timeout", strategy=strategy["name"], timeout_s=round(timeout, 3))
+                continue
+            except Exception as exc:
+                logger.error("search.strategy.failed", strategy=strategy["name"], error=str(exc))
+                continue
+            if self._has_memories(memories):
+                return memories, strategy, timed_out
+        return [], None, timed_out
+
+    async def _search_concurrently(
+        self,
+        query: str,
+        user_id: str,
+        strategies: List[Dict[str, Any]],
+        limit: int,
+        *,
+        hedge_delay: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> Tuple[Any, Optional[Dict[str, Any]], float, bool]:
+        """
+        Run strategies concurrently and keep the highest-priority non-empty result.
         
-        return result
+        With ``hedge_delay`` set, each fallback only starts once the previous
+        strategy has been running that long (or finished empty); otherwise all
+        strategies start at once. Losing searches are cancelled. Also returns
+        the estimated time saved versus running the same strategies in order,
+        and whether a strategy or the ``deadline`` timed out. At the deadline
+        the best result finished so far is used.
+        """
+        wall_start = time.perf_counter()
+        tasks: Dict[int, asyncio.Task] = {}
+        outcomes: Dict[int, Any] = {}
+        durations: Dict[int, float] = {}
+        last_launch = wall_start
+        timed_out = False
+
+        async def timed(index: int) -> Tuple[int, Any, float]:
+            nonlocal timed_out
+            started = time.perf_counter()
+            name = strategies[index]["name"]
+            try:
+                # Only the server-side cap applies here; the caller's deadline cancels instead
+                memories = await asyncio.wait_for(
+                    self._run_strategy(index, strategies[index], query, user_id, limit),
+                    self._stage_timeout(None, settings.SEARCH_STRATEGY_TIMEOUT_SECONDS),
+                )
+            except asyncio.TimeoutError:
+                timed_out = True
+                self.mem0.record_timeout()
+                SEARCH_STRATEGY_SECONDS.observe(time.perf_counter() - started, strategy=name, outcome="timeout")
+                logger.warning("search.strategy.timeout", strategy=name)
+                memories = None
+            except Exception as exc:
+                logger.error("search.strategy.failed", strategy=strategies[index]["name"], error=str(exc))
+                memories = None
+            return index, memories, time.perf_counter() - started
+
+        def launch() -> None:
+            nonlocal last_launch
+            index = len(tasks)
+            tasks[index] = asyncio.create_task(timed(index))
+            last_launch = time.perf_counter()
+
+        winner: Optional[int] = None
+        try:
+            launch()
+            while hedge_delay is None and len(tasks) < len(strategies):
+                launch()
+
+            while True:
+                # The first unfinished strategy in priority order blocks the decision
+                decided = True
+                for i in range(len(strategies)):
+                    if i not in outcomes:
+                        decided = False
+                        break
+                    if self._has_memories(outcomes[i]):
+                        winner = i
+                        break
+                if decided:
+                    break
+
+                remaining = self._stage_timeout(deadline)
+                if remaining is not None and remaining <= 0:
+                    # Out of budget: settle for the best strategy that already answered
+                    timed_out = True
+                    winner = next((i for i in sorted(outcomes) if self._has_memories(outcomes[i])), None)
+                    break
+
+                pending = [task for i, task in tasks.items() if i not in outcomes]
+                timeout = remaining
+                hedge_due = False
+                if len(tasks) < len(strategies):
+                    if not pending:
+                        launch()
+                        continue
+                    hedge_wait = max(0.0, last_launch + hedge_delay - time.perf_counter())
+                    hedge_due = timeout is None or hedge_wait <= timeout
+                    timeout = hedge_wait if hedge_due else timeout
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if hedge_due:
+                        logger.sampled("search.hedge", strategy=strategies[len(tasks)]["name"])
+                        launch()
+                    continue
+                for task in done:
+                    index, memories, duration = task.result()
+                    outcomes[index] = memories
+                    durations[index] = duration
+        finally:
+            losers = [task for task in tasks.values() if not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+
+        wall_time = time.perf_counter() - wall_start
+        decisive = range(winner + 1) if winner is not None else range(len(strategies))
+        sequential_estimate = sum(durations.get(i, 0.0) for i in decisive)
+        time_saved = max(0.0, sequential_estimate - wall_time)
+
+        if winner is None:
+            return [], None, time_saved, timed_out
+        return outcomes[winner], strategies[winner], time_saved, timed_out
+
+    @staticmethod
+    def _stage_timeout(deadline: Optional[float], cap: Optional[float] = None) -> Optional[float]:
+        """Seconds left until the monotonic ``deadline``, optionally capped; None means unbounded."""
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if cap is not None and cap > 0:
+            remaining = cap if remaining is None else min(remaining, cap)
+        return remaining
+
+    @staticmethod
+    def _enhance_deadlines(deadline_ms: Optional[int]) -> Tuple[float, float]:
+        """Monotonic (retrieval, overall) deadlines for one enhancement."""
+        budget = deadline_ms / 1000 if deadline_ms else settings.ENHANCE_DEADLINE_SECONDS
+        now = time.monotonic()
+        return now + budget * settings.ENHANCE_SEARCH_BUDGET_FRACTION, now + budget
 
     async def search_memories(
         self,
@@ -384,15 +1344,6 @@ class AsyncMemoryService:
         version: str = "v2"
     ) -> List[Dict[str, Any]]:
         """Enhanced search with v2 API and GraphMemory support."""
-        logger.info(f"🔍 SEARCH: Starting enhanced memory search")
-        logger.info(f"🔍 SEARCH: query: '{query}'")
-        logger.info(f"🔍 SEARCH: user_id: {user_id}")
-        logger.info(f"🔍 SEARCH: limit: {limit}")
-        logger.info(f"🔍 SEARCH: app_id: {app_id}")
-        logger.info(f"🔍 SEARCH: run_id: {run_id}")
-        logger.info(f"🔍 SEARCH: enable_graph: {enable_graph}")
-        logger.info(f"🔍 SEARCH: version: {version}")
-        
         search_params = {"user_id": user_id, "limit": limit}
         
         if version == "v2":
@@ -418,46 +1369,155 @@ class AsyncMemoryService:
             if filters:
                 search_params["filters"] = filters
 
-        logger.info(f"🔍 SEARCH: Using parameters: {search_params}")
+        cache_key = self._search_cache_key(
+            self._light_cleanup(query),
+            user_id,
+            app_id=app_id,
+            run_id=run_id,
+            version=version,
+            enable_graph=enable_graph,
+            limit=limit,
+        )
+        cached = await self.search_cache.get(cache_key)
+        if cached is None:
+            near = self.near_search.lookup(cache_key[1:], cache_key[0])
+            cached = near.value[1] if near is not None else None
+        if cached is not None:
+            logger.sampled("search.cache_hit", user_id=user_id, app_id=app_id)
+            return cached or []
+
+        local_mode = settings.LOCAL_STORE_MODE if self.local_store is not None else "off"
+        if local_mode == "first":
+            local, strategy = self._search_local(query, user_id, app_id, limit, run_id)
+            if strategy is not None:
+                return local
 
         try:
             search_start = time.time()
-            results = await asyncio.to_thread(
-                self.client.search,
-                query,
-                **search_params
+            results = await self.mem0.call(lambda: self.client.search(query, **search_params))
+            await self.search_cache.set(cache_key, results, self._cache_tags(user_id, app_id))
+            self.near_search.store(cache_key[1:], cache_key[0], (cache_key, results))
+            logger.info(
+                "search.done",
+                user_id=user_id,
+                app_id=app_id,
+                version=version,
+                hit=self._has_memories(results),
+                duration_ms=round((time.time() - search_start) * 1000, 1),
             )
-            search_time = time.time() - search_start
-            
-            logger.info(f"✅ SEARCH: Completed in {search_time:.3f}s")
-            logger.info(f"✅ SEARCH: Found {len(results or [])} results")
-            logger.info(f"✅ SEARCH: Results: {results}")
-            
+            logger.payload("search.results", results=results)
+            if local_mode == "fallback" and not self._has_memories(results):
+                local, strategy = self._search_local(query, user_id, app_id, limit, run_id)
+                if strategy is not None:
+                    return local
             return results or []
             
         except Exception as exc:
-            logger.error(f"❌ SEARCH: Failed for user={user_id}: {exc}")
-            logger.error(f"❌ SEARCH: Exception type: {type(exc)}")
-            logger.error(f"❌ SEARCH: Exception details: {str(exc)}")
+            logger.error("search.failed", user_id=user_id, error=str(exc), error_type=type(exc).__name__)
+            if local_mode == "fallback":
+                local, strategy = self._search_local(query, user_id, app_id, limit, run_id)
+                if strategy is not None:
+                    logger.info("search.local_fallback", user_id=user_id, memories=len(local["results"]))
+                    return local
             raise
 
+    @staticmethod
+    def _search_cache_key(
+        query: str,
+        user_id: str,
+        *,
+        app_id: Optional[str],
+        run_id: Optional[str],
+        version: str,
+        enable_graph: bool,
+        limit: int,
+    ) -> Tuple[Any, ...]:
+        """Cache key mirroring the Mem0 search parameters; v1 never sends enable_graph.
+
+        Everything after the query is the near-duplicate scope.
+        """
+        return (query, user_id, app_id, run_id, version, enable_graph and version == "v2", limit)
+
+    @staticmethod
+    def _cache_tags(user_id: str, app_id: Optional[str]) -> Tuple[str, str]:
+        """Invalidation tags for a cached search/enhancement scoped to user and app."""
+        return (f"user:{user_id}", f"user:{user_id}:app:{app_id or '*'}")
+
+    async def invalidate_user_caches(self, user_id: str, app_id: Optional[str] = None) -> int:
+        """Drop cached entries that could include memories written for user/app."""
+        if app_id is None:
+            tags = [f"user:{user_id}"]
+        else:
+            tags = [f"user:{user_id}:app:{app_id}", f"user:{user_id}:app:*"]
+        # A new memory may surface a new app in the Entities API listing
+        tags.append("entities")
+
+        # Near-duplicate scopes start (user_id, app_id, ...) like the tags above
+        def in_scope(scope: Tuple[Any, ...]) -> bool:
+            return scope[0] == user_id and (app_id is None or scope[1] in (app_id, None))
+
+        dropped = self.near_search.invalidate(in_scope) + self.near_enhance.invalidate(in_scope)
+        dropped += self.sessions.invalidate(user_id)
+        # The write may add or change graph edges; relations are not app-scoped, so all go
+        dropped += self.relation_index.forget(user_id)
+        try:
+            return dropped + await self.cache_backend.invalidate_tags(tags)
+        except Exception as exc:
+            logger.warning("cache.invalidate_failed", user_id=user_id, app_id=app_id, error=str(exc))
+            return dropped
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Backend details plus hit/miss counters for every cache namespace."""
+        return {
+            "backend": self.cache_backend.name,
+            **self.cache_backend.stats(),
+            "caches": {
+                "search": self.search_cache.stats(),
+                "enhance": {**self.enhance_cache.stats(), "coalesced": self._enhance_flight.coalesced},
+                "entities": self.entities_cache.stats(),
+                "session": self.sessions.stats(),
+            },
+            "near_duplicate": {
+                "search": self.near_search.stats(),
+                "enhance": self.near_enhance.stats(),
+            },
+            "relation_index": self.relation_index.stats(),
+            "local_store": self.local_store_stats(),
+        }
+
     @staticmethod
     def _light_cleanup(prompt: str) -> str:
         """Light cleanup: normalize whitespace only."""
-        logger.debug(f"🧹 _light_cleanup: Input: '{prompt}'")
-        
-        # Remove leading/trailing whitespace and normalize internal whitespace
-        cleaned = " ".join(prompt.strip().split())
-        
-        logger.debug(f"🧹 _light_cleanup: Output: '{cleaned}'")
-        return cleaned
+        return light_cleanup(prompt)
 
     @staticmethod
-    def _build_enhanced_context(memories: Optional[List[Dict[str, Any]]], strategy: Optional[Dict[str, Any]] = None) -> str:
+    def _build_enhanced_context(
+        memories: Optional[List[Dict[str, Any]]],
+        strategy: Optional[Dict[str, Any]] = None,
+        relation_groups: Optional[Dict[str, List[Relation]]] = None,
+        templates: Optional[ContextTemplates] = None,
+    ) -> str:
         """Enhanced context building with app_id-scoped filtering for GraphMemory relationships."""
+        return segments_to_text(
+            AsyncMemoryService._context_segments(memories, strategy, relation_groups, templates)
+        )
+
+    @staticmethod
+    def _context_segments(
+        memories: Optional[List[Dict[str, Any]]],
+        strategy: Optional[Dict[str, Any]] = None,
+        relation_groups: Optional[Dict[str, List[Relation]]] = None,
+        templates: Optional[ContextTemplates] = None,
+    ) -> List[ContextSegment]:
+        """
+        Context segments (memory and relation sentences with their Mem0 scores).
+        
+        ``relation_groups`` (from the relation index) replaces filtering the
+        payload's relations when the caller already has them bucketed.
+        Relations are rendered with ``templates`` (the built-in registry by default).
+        """
         if not memories:
-            logger.debug(f"🧠 _build_context: No memories provided")
-            return ""
+            return []
 
         # Handle both single dict (v2 GraphMemory) and list format
         if isinstance(memories, list):
@@ -465,150 +1525,339 @@ class AsyncMemoryService:
         else:
             memory_data = memories
             
-        logger.debug(f"🧠 _build_context: Processing memory data with strategy: {strategy}")
-        
         # Get the target app_id from strategy for filtering
         target_app_id = None
         if strategy and strategy.get("filters"):
             target_app_id = strategy["filters"].get("app_id")
+
         
-        logger.info(f"🧠 _build_context: Target app_id for filtering: {target_app_id}")
+        segments: List[ContextSegment] = []
+        append = segments.append
+
+        # Extract traditional memory content from results
+        for result in memory_data.get("results") or ():
+            if isinstance(result, dict):
+                message = result.get("message")
+                content = (
+                    result.get("content") or 
+                    result.get("memory") or 
+                    result.get("text") or
+                    (message.get("content") if isinstance(message, dict) else None)
+                )
+                if isinstance(content, str):
+                    content = content.strip()
+                    if content:
+                        score = result.get("score")
+                        append(ContextSegment(
+                            "Memory: " + content,
+                            float(score) if isinstance(score, (int, float)) else 0.0,
+                            "memory",
+                        ))
+
+        # ✅ GRAPHMEMORY RELATIONS, APP_ID-SCOPED AND BUCKETED (index lookup when given)
+        raw_relations = memory_data.get("relations")
+        if relation_groups is None:
+            relation_groups = group_payload(raw_relations, target_app_id) if raw_relations else {}
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.sampled(
+                "context.relations",
+                level=logging.DEBUG,
+                total=len(raw_relations or ()),
+                kept=sum(len(group) for group in relation_groups.values()),
+                app_id=target_app_id,
+            )
+
+        # Relationship sentences from the template registry, bucket by bucket
+        renderer = templates or default_templates
+        for bucket in BUCKETS:
+            relations = relation_groups.get(bucket)
+            if relations:
+                for relation, text in zip(relations, renderer.render_all(relations)):
+                    append(ContextSegment(text, relation.score, "relation", relation))
         
-        segments: List[str] = []
+        return segments
+
+    def _build_completion_request(
+        self, prompt: str, context: str, vocabulary: Optional[ContextVocabulary] = None
+    ) -> Dict[str, Any]:
+        """Compute length limits and the vocabulary-constrained messages for a completion."""
+        # 📐 STEP 1: Calculate strict length limits (Expert Recommendation #1)
+        orig_chars = len(prompt)
+        char_max = self._completion_char_max(prompt)
+        approx_token_ratio = 4  # ~4 chars/token heuristic
+        max_tokens = max(8, math.ceil(char_max / approx_token_ratio))
         
-        # Extract traditional memory content from results
-        results = memory_data.get("results", [])
-        if results:
-            logger.debug(f"🧠 _build_context: Processing {len(results)} traditional memory results")
-            for i, result in enumerate(results):
-                if isinstance(result, dict):
-                    content = (
-                        result.get("content") or 
-                        result.get("memory") or 
-                        result.get("text") or
-                        result.get("message", {}).get("content") if isinstance(result.get("message"), dict) else None
-                    )
-                    if isinstance(content, str) and content.strip():
-                        segments.append(f"Memory: {content.strip()}")
-                        logger.debug(f"🧠 _build_context: Added memory content {i}: {content[:50]}...")
-
-        # ✅ EXTRACT AND FILTER GRAPHMEMORY RELATIONS BY APP_ID
-        relations = memory_data.get("relations", [])
-        if relations:
-            logger.info(f"🧠 _build_context: Processing {len(relations)} GraphMemory relations")
-            
-            # Filter relationships to only include target app_id related ones
-            filtered_relations = []
-            for relation in relations:
-                if not isinstance(relation, dict):
-                    continue
-                    
-                source = relation.get("source", "").strip()
-                relationship = relation.get("relationship", "").strip()
-                target = relation.get("target", "").strip()
-                score = relation.get("score", 0.0)
-                
-                # Filter out low-confidence relations
-                if not (source and relationship and target) or score < 0.3:
-                    continue
-                
-                # ✅ CRITICAL FIX: Only include relations involving the target app_id
-                if target_app_id:
-                    # Include relation if either source or target matches app_id (case-insensitive)
-                    if target_app_id.lower() in [source.lower(), target.lower()]:
-                        filtered_relations.append(relation)
-                        logger.info(f"🧠 _build_context: ✅ Included relation (matches {target_app_id}): {source} → {relationship} → {target} (score: {score})")
-                    else:
-                        logger.info(f"🧠 _build_context: ❌ Filtered out relation (no match): {source} → {relationship} → {target}")
-                else:
-                    # No app_id filter, include all high-confidence relations
-                    filtered_relations.append(relation)
-                    logger.info(f"🧠 _build_context: ✅ Included relation (no filter): {source} → {relationship} → {target}")
-            
-            logger.info(f"🧠 _build_context: Filtered to {len(filtered_relations)} relevant relations (from {len(relations)} total)")
-            
-            # Build contextual segments from filtered relationships
-            if filtered_relations:
-                work_relations = []
-                assignment_relations = []
-                project_relations = []
-                
-                for relation in filtered_relations:
-                    source = relation.get("source", "").strip()
-                    relationship = relation.get("relationship", "").strip()
-                    target = relation.get("target", "").strip()
-                    target_type = relation.get("target_type", "").strip()
-                    
-                    relation_context = {
-                        "source": source,
-                        "relationship": relationship,
-                        "target": target,
-                        "target_type": target_type,
-                        "score": relation.get("score", 0.0)
-                    }
-                    
-                    # Categorize relationships
-                    if relationship in ["starting_work_on", "working_on", "developing"]:
-                        work_relations.append(relation_context)
-                    elif relationship in ["initiated_assignment", "assigned_to", "assignment"]:
-                        assignment_relations.append(relation_context)
-                    elif target_type in ["project"] or relationship == "is_related_to":
-                        project_relations.append(relation_context)
-                
-                context_segments = []
-                
-                # Work relationships - focus on simple completions
-                if work_relations:
-                    work_items = []
-                    for rel in work_relations:
-                        if rel["relationship"] == "starting_work_on":
-                            work_items.append(f"{rel['source']} is currently starting work on the {rel['target']} {rel['target_type'] or 'project'}")
-                        elif rel["relationship"] == "working_on":
-                            work_items.append(f"{rel['source']} is actively working on the {rel['target']} {rel['target_type'] or 'project'}")
-                        else:
-                            work_items.append(f"{rel['source']} {rel['relationship'].replace('_', ' ')} {rel['target']}")
-                    
-                    context_segments.extend(work_items)
-                
-                # Assignment relationships
-                if assignment_relations:
-                    assignment_items = []
-                    for rel in assignment_relations:
-                        if rel["relationship"] == "initiated_assignment":
-                            assignment_items.append(f"{rel['source']} initiated assignment for the {rel['target']} {rel['target_type'] or 'project'}")
-                        elif rel["relationship"] == "assignment":
-                            assignment_items.append(f"{rel['source']} has assignment relationship with {rel['target']}")
-                        else:
-                            assignment_items.append(f"{rel['source']} {rel['relationship'].replace('_', ' ')} {rel['target']}")
-                    
-                    context_segments.extend(assignment_items)
-                
-                # Project relationships
-                if project_relations:
-                    project_items = []
-                    for rel in project_relations:
-                        if rel["relationship"] == "is_related_to":
-                            project_items.append(f"{rel['source']} is related to {rel['target']} {rel['target_type'] or 'project'}")
-                        else:
-                            project_items.append(f"{rel['source']} {rel['relationship'].replace('_', ' ')} {rel['target']}")
-                    
-                    context_segments.extend(project_items)
-                
-                segments.extend(context_segments)
-                logger.info(f"🧠 _build_context: Added {len(context_segments)} filtered relationship contexts")
+        # 📝 STEP 2: Vocabulary constraint (Expert Recommendation #2)
+        # Prompt words, then context words by frequency, then function words
+        if vocabulary is None:
+            vocabulary = build_context_vocabulary(context)
+        vocab_line = ", ".join(select_vocabulary(prompt, vocabulary, settings.VOCABULARY_TOP_K))
         
-        context = "\n".join(segments)
+        # 🎯 STEP 3: Detect completion pattern (Expert Recommendation #3); the
+        # "X is" rule lives in the shared system prompt
+        is_x_is_pattern = is_x_is_prompt(prompt)
         
-        if context:
-            logger.info(f"🧠 _build_context: Final app_id-filtered context (length: {len(context)} chars):")
-            logger.info(f"🧠 _build_context: {context}")
-        else:
-            logger.info(f"🧠 _build_context: No meaningful app_id-scoped context extracted")
+        # Static system prompt first, then the retrieval's context (segments
+        # in retrieval order), then everything that changes with the prompt:
+        # limits, vocabulary and the prompt itself. Requests keeping the same
+        # segments share the prefix up to the limits line; it is at most
+        # CONTEXT_TOKEN_BUDGET plus ~110 tokens, under the 1024 OpenAI caches
+        # at the default budget (see init.completion_prefix)
+        system_message = COMPLETION_SYSTEM_PROMPT
+        user_message = (
+            f"Context: {context}\n"
+            f"Original length: {orig_chars} chars. Absolute max: {char_max} chars.\n"
+            f"Vocabulary: {vocab_line}\n"
+            f"Complete: {prompt}\nCompletion:"
+        )
+
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message},
+        ]
+
+        logger.sampled(
+            "completion.request",
+            level=logging.DEBUG,
+            mode="x_is" if is_x_is_pattern else "general",
+            prompt_chars=orig_chars,
+            char_max=char_max,
+            max_tokens=max_tokens,
+            system_chars=len(system_message),
+            user_chars=len(user_message),
+        )
+
+        return {"messages": messages, "char_max": char_max, "max_tokens": max_tokens}
+
+    @staticmethod
+    def _completion_char_max(prompt: str) -> int:
+        """Hard cap on an enhanced prompt's length: 2x-4x the original."""
+        orig_chars = len(prompt)
+        return min(max(2 * orig_chars, 20), 4 * orig_chars)
+
+    def _local_completion(self, prompt: str, retrieval: Dict[str, Any], user_id: str) -> Optional[str]:
+        """Rule-based completion from the retrieved context, or None to call OpenAI."""
+        if self.local_completer is None or not retrieval["segments"]:
+            return None
+        with ENHANCE_STAGE_SECONDS.time(stage="local"):
+            completion = self.local_completer.complete(
+                prompt, retrieval["segments"], self._completion_char_max(prompt)
+            )
+        if completion is None:
+            return None
+        accepted = self.local_completer.accept(completion)
+        logger.sampled(
+            "completion.local",
+            user_id=user_id,
+            rule=completion.rule,
+            confidence=completion.confidence,
+            accepted=accepted,
+        )
+        if not accepted:
+            return None
+        logger.payload("completion.local_enhanced", prompt=prompt, enhanced=completion.text)
+        return completion.text
+
+    @staticmethod
+    def _completion_params(request: Dict[str, Any]) -> Dict[str, Any]:
+        """HARDENED chat.completions parameters shared by blocking and streaming calls."""
+        return {
+            "model": "gpt-4o-mini",
+            "messages": request["messages"],
+            "max_tokens": request["max_tokens"],  # ✅ Strict token limit from char_max
+            "temperature": 0.1,                   # ✅ Lower temperature (≤0.2)
+            "top_p": 0.4,                         # ✅ Restrictive sampling (0.2–0.5)
+            "presence_penalty": 0.0,              # ✅ Keep penalties minimal to avoid drift
+            "frequency_penalty": 0.2,             # ✅ Encourage conciseness
+            "stop": STOP_SEQUENCES,               # ✅ Stop sequences for single-line completions
+        }
+
+    @staticmethod
+    def _record_usage(usage: Any) -> None:
+        """Count prompt and prompt-cache-hit tokens when OPENAI_RECORD_CACHED_TOKENS is on."""
+        if not settings.OPENAI_RECORD_CACHED_TOKENS or usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or 0
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        OPENAI_PROMPT_TOKENS.inc(prompt_tokens, kind="prompt")
+        OPENAI_PROMPT_TOKENS.inc(cached, kind="cached")
+        logger.sampled("completion.usage", prompt_tokens=prompt_tokens, cached_tokens=cached)
+
+    async def _stream_hardened_completion(
+        self,
+        *,
+        prompt: str,
+        context: str,
+        user_id: str,
+        deadline: Optional[float] = None,
+        vocabulary: Optional[ContextVocabulary] = None,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream a HARDENED completion, applying guardrails as tokens arrive.
         
-        return context
+        Yields ``("token", delta)`` for completion text the final guardrails
+        will keep, then one ``("final", enhanced)`` with the guardrailed result:
+        the prompt, a space and the streamed tokens add up to ``enhanced``. The
+        upstream stream is closed as soon as a stop sequence shows up or the
+        completion fills the room the guardrails leave after the prompt, so no
+        further tokens are paid for. If ``deadline`` passes first, the stream
+        is closed and the last item is ``("timeout", enhanced)`` built from
+        whatever already arrived.
+        """
+        request = self._build_completion_request(prompt, context, vocabulary)
+        char_max = request["char_max"]
+        # apply_guardrails keeps a completion only if "prompt completion" fits char_max
+        budget = char_max - len(prompt) - 1
+        raw = ""
+        shown = ""
+        final_kind = "final"
+
+        api_start = time.time()
+        try:
+            # One limiter slot (and one breaker verdict) for the whole stream, not just create()
+            async with self.openai.guard() as call:
+                try:
+                    stream = await asyncio.wait_for(
+                        self.openai_client.chat.completions.create(
+                            **self._completion_params(request),
+                            stream=True,
+                            **(
+                                {"stream_options": {"include_usage": True}}
+                                if settings.OPENAI_RECORD_CACHED_TOKENS
+                                else {}
+                            ),
+                        ),
+                        self._stage_timeout(deadline),
+                    )
+                except asyncio.TimeoutError:
+                    # The request deadline ran out, not OpenAI's own timeout (that is an APITimeoutError)
+                    logger.warning("completion.timeout", user_id=user_id, stage="connect")
+                    ENHANCE_STAGE_SECONDS.observe(time.time() - api_start, stage="openai")
+                    yield "timeout", prompt
+                    return
+                except Exception as exc:
+                    call.failed(exc)
+                    logger.error("completion.stream_request_failed", user_id=user_id, error=str(exc))
+                    OPENAI_FAILURES.inc(kind="request")
+                    ENHANCE_STAGE_SECONDS.observe(time.time() - api_start, stage="openai")
+                    yield "final", prompt
+                    return
+
+                chunks = stream.__aiter__()
+                try:
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), self._stage_timeout(deadline))
+                        except StopAsyncIteration:
+                            call.succeeded()
+                            break
+                        except asyncio.TimeoutError:
+                            logger.warning(
+                                "completion.timeout", user_id=user_id, stage="stream", raw_chars=len(raw)
+                            )
+                            final_kind = "timeout"
+                            break
+                        if getattr(chunk, "usage", None) is not None:
+                            self._record_usage(chunk.usage)
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if not delta:
+                            continue
+                        raw += delta
+
+                        stop_at = min((raw.find(seq) for seq in STOP_SEQUENCES if seq in raw), default=-1)
+                        if stop_at >= 0:
+                            raw = raw[:stop_at]
+
+                        body = self._completion_body(raw, prompt)
+                        # Trailing separators are held back: truncation may drop them
+                        visible = self._fit_completion(body, budget).rstrip(",;:- ") if body is not None else ""
+                        if len(visible) > len(shown):
+                            yield "token", visible[len(shown):]
+                            shown = visible
+
+                        if stop_at >= 0 or (body is not None and len(body.rstrip()) >= budget):
+                            logger.sampled("completion.stream_cut", raw_chars=len(raw), char_max=char_max)
+                            call.succeeded()
+                            break
+                except Exception as exc:
+                    call.failed(exc)
+                    logger.error("completion.stream_failed", user_id=user_id, error=str(exc))
+                    OPENAI_FAILURES.inc(kind="stream")
+                finally:
+                    await stream.close()
+                    ENHANCE_STAGE_SECONDS.observe(time.time() - api_start, stage="openai")
+        except CircuitOpenError as exc:
+            logger.error("completion.stream_request_failed", user_id=user_id, error=str(exc))
+            OPENAI_FAILURES.inc(kind="request")
+            yield "final", prompt
+            return
+
+        logger.sampled(
+            "completion.stream_done",
+            raw_chars=len(raw),
+            duration_ms=round((time.time() - api_start) * 1000, 1),
+        )
+        if raw.strip():
+            # The guardrails see the same budget-trimmed text that was streamed
+            body = self._completion_body(raw, prompt)
+            completion = self._fit_completion(body, budget) if body else ""
+            with ENHANCE_STAGE_SECONDS.time(stage="guardrails"):
+                enhanced = self._apply_post_processing_guardrails(completion or raw.strip(), prompt, char_max)
+            # Whatever the guardrails added after the streamed text (closing punctuation)
+            streamed = f"{prompt} {shown}"
+            if enhanced.startswith(streamed) and len(enhanced) > len(streamed):
+                yield "token", enhanced[len(streamed):]
+            yield final_kind, enhanced
+        else:
+            if final_kind == "final":
+                OPENAI_FAILURES.inc(kind="empty")
+            yield final_kind, prompt
+
+    @staticmethod
+    def _completion_body(raw: str, prompt: str) -> Optional[str]:
+        """A partial completion without preamble, quotes or an echo of the prompt.
+
+        None while the text so far could still turn into a preamble or echo.
+        """
+        text = raw.lstrip()
+        lowered = text.lower()
+        for prefix in PREAMBLE_PREFIXES:
+            lowered_prefix = prefix.lower()
+            if lowered.startswith(lowered_prefix):
+                text = text[len(prefix):].lstrip()
+                lowered = text.lower()
+            elif lowered_prefix.startswith(lowered):
+                return None
+        if text.startswith('"'):
+            # A closing quote is held back too: nothing follows it in a quoted completion
+            text = text[1:].lstrip()
+            if text.endswith('"'):
+                text = text[:-1]
+            lowered = text.lower()
+        lowered_prompt = prompt.lower()
+        if lowered.startswith(lowered_prompt):
+            text = text[len(prompt):].lstrip()
+        elif lowered_prompt.startswith(lowered):
+            return None
+        return text
+
+    @staticmethod
+    def _fit_completion(body: str, budget: int) -> str:
+        """A completion body cut to ``budget`` the way apply_guardrails truncates."""
+        if len(body) > budget:
+            return body[:budget].rstrip(",;:- ").rstrip()
+        return body.rstrip()
 
     async def _hardened_enhance_with_context(
-        self, *, prompt: str, context: str, user_id: str, strategy_used: str = "unknown"
+        self,
+        *,
+        prompt: str,
+        context: str,
+        user_id: str,
+        strategy_used: str = "unknown",
+        deadline: Optional[float] = None,
+        vocabulary: Optional[ContextVocabulary] = None,
     ) -> str:
         """
         🔒 HARDENED OpenAI enhancement implementing ALL expert recommendations.
@@ -620,184 +1869,71 @@ class AsyncMemoryService:
         - Pattern-specific handling for "X is..." completions
         - Post-processing guardrails with hard truncation
         - Optimal parameters: temperature=0.1, top_p=0.4
-        """
-        logger.info(f"🔒 HARDENED: Starting EXPERT-RECOMMENDED enhancement system")
-        logger.info(f"🔒 HARDENED: Prompt: '{prompt}' ({len(prompt)} chars)")
-        logger.info(f"🔒 HARDENED: Context: '{context}' ({len(context)} chars)")
-        logger.info(f"🔒 HARDENED: Strategy used: {strategy_used}")
-        logger.info(f"🔒 HARDENED: user_id: {user_id}")
         
-        # 📐 STEP 1: Calculate strict length limits (Expert Recommendation #1)
-        orig_chars = len(prompt)
-        char_max = min(max(2 * orig_chars, 20), 4 * orig_chars)  # 2x-4x clamp
-        approx_token_ratio = 4  # ~4 chars/token heuristic
-        max_tokens = max(8, math.ceil(char_max / approx_token_ratio))
-        
-        logger.info(f"🔒 HARDENED: Length limits - orig: {orig_chars}, max: {char_max} chars, tokens: {max_tokens}")
-        
-        # 📝 STEP 2: Build vocabulary-constrained system prompt (Expert Recommendation #2)
-        allowed_vocab = self._build_allowed_vocabulary(prompt, context)
-        
-        # 🎯 STEP 3: Detect completion pattern and build system message (Expert Recommendation #3)
-        is_x_is_pattern = re.search(r"\bis\s*$", prompt.strip(), re.IGNORECASE)
-        
-        if is_x_is_pattern:
-            system_message = (
-                f"You complete incomplete prompts concisely.\n"
-                f"Hard limits:\n"
-                f"- Original length: {orig_chars} chars.\n"
-                f"- Absolute max: {char_max} chars (<= 4x).\n"
-                f"- Return exactly one short completion (no more than 1 sentence).\n"
-                f"- Do not introduce facts not present in PROMPT or CONTEXT.\n"
-                f"- No advice, no questions, no preambles, no quotes.\n"
-                f"For 'X is' fragments, return a 2–6 word noun phrase; no verbs beyond 'is'.\n"
-                f"Use only words from this vocabulary: {', '.join(sorted(list(allowed_vocab))[:50])}"
-            )
-            user_message = f"Context: {context}\nComplete: {prompt}\nCompletion:"
-            logger.info(f"🔒 HARDENED: Using 'X is' pattern-specific mode")
-        else:
-            system_message = (
-                f"You complete incomplete prompts concisely.\n"
-                f"Hard limits:\n"
-                f"- Original length: {orig_chars} chars.\n"
-                f"- Absolute max: {char_max} chars (<= 4x).\n"
-                f"- Return exactly one short completion (no more than 1 sentence).\n"
-                f"- Do not introduce facts not present in PROMPT or CONTEXT.\n"
-                f"- No advice, no questions, no preambles, no quotes.\n"
-                f"Use only words from this vocabulary: {', '.join(sorted(list(allowed_vocab))[:50])}"
-            )
-            user_message = f"Context: {context}\nComplete: {prompt}\nCompletion:"
-            logger.info(f"🔒 HARDENED: Using general completion mode")
-
-        messages = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": user_message},
-        ]
-
-        logger.info(f"🔒 HARDENED: System message length: {len(system_message)} chars")
-        logger.info(f"🔒 HARDENED: User message length: {len(user_message)} chars")
+        Raises ``asyncio.TimeoutError`` when the call is still running at ``deadline``.
+        """
+        request = self._build_completion_request(prompt, context, vocabulary)
+        char_max = request["char_max"]
 
         # 🔒 STEP 4: API call with HARDENED parameters (Expert Recommendation #4)
         try:
-            logger.info(f"🔒 HARDENED: Making API call with EXPERT-RECOMMENDED parameters")
-            logger.info(f"🔒 HARDENED: max_tokens={max_tokens}, temp=0.1, top_p=0.4")
-            
             api_start = time.time()
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                max_tokens=max_tokens,           # ✅ Strict token limit from char_max
-                temperature=0.1,               # ✅ Lower temperature (≤0.2)
-                top_p=0.4,                     # ✅ Restrictive sampling (0.2–0.5)
-                presence_penalty=0.0,          # ✅ Keep penalties minimal to avoid drift
-                frequency_penalty=0.2,         # ✅ Encourage conciseness
-                stop=["\n", "\n\n", "—", "•"]  # ✅ Stop sequences for single-line completions
+            response = await asyncio.wait_for(
+                self.openai.call(
+                    lambda: self.openai_client.chat.completions.create(**self._completion_params(request))
+                ),
+                self._stage_timeout(deadline),
             )
             api_time = time.time() - api_start
+            ENHANCE_STAGE_SECONDS.observe(api_time, stage="openai")
+            self._record_usage(getattr(response, "usage", None))
 
-            logger.info(f"✅ HARDENED: API call successful in {api_time:.3f}s")
-            logger.info(f"✅ HARDENED: Response object type: {type(response)}")
+            logger.sampled("completion.done", strategy=strategy_used, duration_ms=round(api_time * 1000, 1))
 
+        except asyncio.TimeoutError:
+            ENHANCE_STAGE_SECONDS.observe(time.time() - api_start, stage="openai")
+            # The request deadline ran out; OpenAI's own timeout fails through openai.call
+            logger.warning("completion.timeout", user_id=user_id, stage="request")
+            raise
         except Exception as exc:
-            logger.error(f"❌ HARDENED: Enhancement request failed for user={user_id}: {exc}")
-            logger.error(f"❌ HARDENED: Exception type: {type(exc)}")
-            logger.error(f"❌ HARDENED: Exception details: {str(exc)}")
-            logger.info(f"🔄 HARDENED: Falling back to original prompt")
+            ENHANCE_STAGE_SECONDS.observe(time.time() - api_start, stage="openai")
+            OPENAI_FAILURES.inc(kind="request")
+            logger.error(
+                "completion.failed",
+                user_id=user_id,
+                error=str(exc),
+                error_type=type(exc).__name__,
+                fallback="original_prompt",
+            )
             return prompt
 
         # Extract content from response
         content = None
         try:
             content = response.choices[0].message.content if response and response.choices else None
-            logger.info(f"✅ HARDENED: Extracted content length: {len(content or '')} chars")
         except Exception as exc:
-            logger.error(f"❌ HARDENED: Failed to extract content from response: {exc}")
+            logger.error("completion.bad_response", error=str(exc))
+            OPENAI_FAILURES.inc(kind="bad_response")
 
         if isinstance(content, str) and content.strip():
             enhanced = content.strip()
             
             # 🧹 STEP 5: Post-processing guardrails (Expert Recommendation #5)
-            enhanced = self._apply_post_processing_guardrails(enhanced, prompt, char_max)
-            
-            logger.info(f"✅ HARDENED: Enhancement successful")
-            logger.info(f"✅ HARDENED: Original: {len(prompt)} chars → Enhanced: {len(enhanced)} chars")
-            logger.info(f"✅ HARDENED: Expansion ratio: {len(enhanced)/len(prompt):.1f}x")
-            logger.info(f"✅ HARDENED: Enhanced preview: {enhanced[:200]}...")
+            with ENHANCE_STAGE_SECONDS.time(stage="guardrails"):
+                enhanced = self._apply_post_processing_guardrails(enhanced, prompt, char_max)
+            logger.payload("completion.enhanced", prompt=prompt, context=context, enhanced=enhanced)
             return enhanced
         else:
-            logger.warn(f"⚠️ HARDENED: No valid content in response - using original prompt")
-            logger.warn(f"⚠️ HARDENED: Response content was: {repr(content)}")
+            OPENAI_FAILURES.inc(kind="empty")
+            logger.warning("completion.empty", content=repr(content), fallback="original_prompt")
             return prompt
 
-    @staticmethod
-    def _build_allowed_vocabulary(prompt: str, context: str) -> Set[str]:
-        """
-        Build vocabulary whitelist from prompt + context + function words.
-        (Expert Recommendation: Context-safety guard to prevent hallucination)
-        """
-        # Extract words from prompt and context
-        text = f"{prompt} {context}".lower()
-        words = set(re.findall(r'\b\w+\b', text))
-        
-        # Add essential function words for natural completions
-        function_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
-            'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
-            'will', 'would', 'could', 'should', 'may', 'might', 'can', 'must',
-            'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they',
-            'my', 'your', 'his', 'her', 'its', 'our', 'their',
-            'currently', 'project', 'work', 'working', 'starting', 'development', 'ai', 'system',
-            'now', 'today', 'new', 'current', 'main', 'primary', 'key', 'important', 'major'
-        }
-        
-        words.update(function_words)
-        return words
-
     @staticmethod
     def _apply_post_processing_guardrails(text: str, original_prompt: str, char_max: int) -> str:
         """
         Apply final guardrails: strip preambles, enforce length, ensure punctuation.
         (Expert Recommendation: Post-processing guardrails with hard truncation)
         """
-        
-        # Strip common AI preambles
-        prefixes_to_remove = [
-            "Enhanced prompt:", "Here's the enhanced prompt:", "Enhanced version:", 
-            "Improved prompt:", "Here is the enhanced version:", "The enhanced prompt is:",
-            "Completion:", "Enhanced completion:", "Result:", "Output:", "Response:"
-        ]
-        
-        cleaned = text.strip()
-        for prefix in prefixes_to_remove:
-            if cleaned.lower().startswith(prefix.lower()):
-                cleaned = cleaned[len(prefix):].strip()
-        
-        # Remove quotes if entire response is quoted
-        if cleaned.startswith('"') and cleaned.endswith('"'):
-            cleaned = cleaned[1:-1].strip()
-        
-        # Take only first line/sentence (single-line completions)
-        cleaned = cleaned.splitlines()[0].strip()
-        
-        # Hard character limit with graceful truncation
-        if len(cleaned) > char_max:
-            cleaned = cleaned[:char_max].rstrip(",;:- ").rstrip()
-            logger.info(f"🧹 GUARDRAIL: Hard-truncated to {char_max} chars")
-        
-        # Ensure it starts with original prompt (for completions)
-        if not cleaned.lower().startswith(original_prompt.lower()):
-            # Check if we can fit the original prompt + space + completion
-            prefix_with_space = original_prompt + " "
-            if len(prefix_with_space) + len(cleaned) <= char_max:
-                cleaned = prefix_with_space + cleaned
-            else:
-                # If not enough space, just return original
-                cleaned = original_prompt
-        
-        # Add period if missing and there's space (graceful punctuation)
-        if not re.search(r"[.!?]$", cleaned) and len(cleaned) + 1 <= char_max:
-            cleaned += "."
-        
-        return cleaned
+        return apply_guardrails(text, original_prompt, char_max)
 
 __all__ = ["AsyncMemoryService"]
@@ -0,0 +1,221 @@
+"""Near-duplicate lookup behind the exact search and enhancement caches.
+
+The exact caches key on the cleaned prompt, so "my current projct is" misses
+what "my current project is" fetched a second earlier. :class:`NearDuplicateIndex`
+fingerprints each normalized prompt with a 64-bit SimHash over character
+trigrams, a locality-sensitive hash: editing a character flips a few bits,
+while an unrelated prompt differs in about half of them. Similarity is the
+fraction of fingerprint bits two prompts share, and a lookup only compares
+entries stored under the same scope (user, app and the other request
+parameters), so one scan costs ``max_per_scope`` XOR/popcounts.
+
+SimHash cannot tell "q3 revenue" from "q4 revenue", so a candidate above the
+threshold is only returned when :func:`same_words` confirms it: the prompts
+have the same words, except for short typos in words without digits.
+
+Memory is bounded: at most ``max_scopes`` scopes (least recently used go
+first) of at most ``max_per_scope`` entries each, every entry expiring
+``ttl`` seconds after it was stored. Shingles are hashed with BLAKE2b, so a
+prompt's fingerprint is the same in every process and after restarts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.core.metrics import CACHE_LOOKUPS
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+SHINGLE_SIZE = 3
+FINGERPRINT_BITS = 64
+
+
+def normalize(text: str) -> str:
+    """Lowercase words and digits, single-spaced; punctuation and case do not matter."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+# One request fingerprints the same prompt for every search strategy and cache
+@lru_cache(maxsize=1024)
+def fingerprint(text: str) -> Optional[int]:
+    """64-bit SimHash of the text's character trigrams, or None when it has no words."""
+    normalized = normalize(text)
+    if not normalized:
+        return None
+    padded = f" {normalized} "
+    shingles = [padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1)]
+    digests = b"".join(hashlib.blake2b(shingle.encode(), digest_size=8).digest() for shingle in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    # Each bit of the fingerprint is the majority vote of the shingles' bits
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+    return int(np.packbits(votes > 0, bitorder="little").view(np.uint64)[0])
+
+
+def similarity(left: int, right: int) -> float:
+    return 1.0 - (left ^ right).bit_count() / FINGERPRINT_BITS
+
+
+def edit_distance(left: str, right: str) -> int:
+    previous = list(range(len(right) + 1))
+    for i, left_char in enumerate(left, 1):
+        current = [i]
+        for j, right_char in enumerate(right, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (left_char != right_char)))
+        previous = current
+    return previous[-1]
+
+
+def same_words(left: str, right: str) -> bool:
+    """True when the texts differ at most by typos: word for word, no digit changed.
+
+    A word with a digit ("q3", "2024", "v2") must match exactly; any other
+    word may be off by one edit per four characters of the shorter spelling,
+    so words under four characters must match too.
+    """
+    left_words, right_words = normalize(left).split(), normalize(right).split()
+    if len(left_words) != len(right_words):
+        return False
+    for left_word, right_word in zip(left_words, right_words):
+        if left_word == right_word:
+            continue
+        if any(char.isdigit() for char in left_word + right_word):
+            return False
+        if edit_distance(left_word, right_word) > min(len(left_word), len(right_word)) // 4:
+            return False
+    return True
+
+
+class NearMatch(NamedTuple):
+    text: str
+    value: Any
+    similarity: float
+
+
+class _Entry(NamedTuple):
+    fingerprint: int
+    text: str
+    value: Any
+    expires_at: float
+
+
+class NearDuplicateIndex:
+    """Scoped, bounded SimHash index returning the most similar live entry."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        threshold: float,
+        ttl: float,
+        max_scopes: int,
+        max_per_scope: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_scopes = max_scopes
+        self.max_per_scope = max_per_scope
+        self._clock = clock
+        # Scope → entries, newest first
+        self._scopes: "OrderedDict[Hashable, List[_Entry]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_scopes > 0 and self.max_per_scope > 0 and self.threshold <= 1.0
+
+    def lookup(
+        self,
+        scope: Hashable,
+        text: str,
+        accept: Optional[Callable[[NearMatch], bool]] = None,
+    ) -> Optional[NearMatch]:
+        """Most similar live entry in ``scope`` at or above the threshold that passes :func:`same_words` and ``accept``."""
+        if not self.enabled:
+            return None
+        entries = self._scopes.get(scope)
+        probe = fingerprint(text) if entries else None
+        best: Optional[NearMatch] = None
+        if probe is not None:
+            now = self._clock()
+            live = [entry for entry in entries if entry.expires_at > now]
+            for entry in live:
+                score = similarity(probe, entry.fingerprint)
+                if score < self.threshold or (best is not None and score <= best.similarity):
+                    continue
+                if not same_words(text, entry.text):
+                    continue
+                match = NearMatch(entry.text, entry.value, score)
+                if accept is None or accept(match):
+                    best = match
+            if live:
+                self._scopes[scope] = live
+                self._scopes.move_to_end(scope)
+            else:
+                del self._scopes[scope]
+        if best is None:
+            self.misses += 1
+            CACHE_LOOKUPS.inc(cache=self.name, result="near_miss")
+        else:
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache=self.name, result="near_hit")
+        return best
+
+    def store(self, scope: Hashable, text: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        signature = fingerprint(text)
+        if signature is None:
+            return
+        entries = [entry for entry in self._scopes.get(scope, ()) if entry.fingerprint != signature]
+        entries.insert(0, _Entry(signature, text, value, self._clock() + self.ttl))
+        if len(entries) > self.max_per_scope:
+            self.evictions += len(entries) - self.max_per_scope
+            del entries[self.max_per_scope:]
+        self._scopes[scope] = entries
+        self._scopes.move_to_end(scope)
+        while len(self._scopes) > self.max_scopes:
+            _, dropped = self._scopes.popitem(last=False)
+            self.evictions += len(dropped)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every scope matching ``predicate``; return how many entries went with them."""
+        stale = [scope for scope in self._scopes if predicate(scope)]
+        return sum(len(self._scopes.pop(scope)) for scope in stale)
+
+    def clear(self) -> None:
+        self._scopes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "scopes": len(self._scopes),
+            "entries": sum(len(entries) for entries in self._scopes.values()),
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+__all__ = [
+    "NearDuplicateIndex",
+    "NearMatch",
+    "edit_distance",
+    "fingerprint",
+    "normalize",
+    "same_words",
+    "similarity",
+]
@@ -0,0 +1,257 @@
+"""Per-user index of GraphMemory relations for context assembly.
+
+Mem0 graph searches return ``relations`` (source, relationship, target,
+target_type, score). Instead of re-filtering that payload on every request,
+relations are ingested once into a per-user index keyed by lowercase entity,
+with each relation pre-classified into a context bucket (work, assignment,
+project). App-scoped context is then a lookup of the app entity: no scan of
+the payload, score-ordered, and it keeps relations learned from earlier
+searches of the same app for ``ttl`` seconds.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+# Relations below this score are too weak to put in front of the model
+MIN_RELATION_SCORE = 0.3
+
+WORK_RELATIONSHIPS = frozenset({"starting_work_on", "working_on", "developing"})
+ASSIGNMENT_RELATIONSHIPS = frozenset({"initiated_assignment", "assigned_to", "assignment"})
+
+# Payload tokens remembered per user before the set is reset
+_MAX_TOKENS = 256
+
+# Context order of the buckets
+BUCKETS = ("work", "assignment", "project")
+
+
+class Relation(NamedTuple):
+    source: str
+    relationship: str
+    target: str
+    target_type: str
+    score: float
+    bucket: str
+    # Derived once at parse time for the context templates
+    relationship_text: str
+    target_kind: str
+
+
+RelationKey = Tuple[str, str, str]
+
+
+_BUCKET_BY_RELATIONSHIP: Dict[str, str] = {
+    **{relationship: "work" for relationship in WORK_RELATIONSHIPS},
+    **{relationship: "assignment" for relationship in ASSIGNMENT_RELATIONSHIPS},
+    "is_related_to": "project",
+}
+
+_new_relation = tuple.__new__
+
+
+def relation_bucket(relationship: str, target_type: str) -> Optional[str]:
+    """Context bucket for a relation, or None when it is not used for context."""
+    bucket = _BUCKET_BY_RELATIONSHIP.get(relationship)
+    if bucket is None and target_type == "project":
+        return "project"
+    return bucket
+
+
+def iter_relations(raw_relations: Iterable[Any], entity: Optional[str] = None) -> Iterator[Relation]:
+    """Normalise Mem0 relation dicts, skipping incomplete, weak or unbucketed ones.
+
+    With ``entity`` (lowercase), relations not touching it are rejected before
+    any further work. This is the per-relation hot loop, hence the inlining.
+    """
+    buckets = _BUCKET_BY_RELATIONSHIP
+    for raw in raw_relations or ():
+        if not isinstance(raw, dict):
+            continue
+        score = raw.get("score") or 0.0
+        if score < MIN_RELATION_SCORE:
+            continue
+        source = (raw.get("source") or "").strip()
+        target = (raw.get("target") or "").strip()
+        if entity is not None and entity != source.lower() and entity != target.lower():
+            continue
+        relationship = (raw.get("relationship") or "").strip()
+        if not (source and relationship and target):
+            continue
+        target_type = (raw.get("target_type") or "").strip()
+        bucket = buckets.get(relationship)
+        if bucket is None:
+            if target_type != "project":
+                continue
+            bucket = "project"
+        yield _new_relation(
+            Relation,
+            (
+                source,
+                relationship,
+                target,
+                target_type,
+                float(score),
+                bucket,
+                relationship.replace("_", " "),
+                target_type or "project",
+            ),
+        )
+
+
+def group_relations(
+    relations: Iterable[Relation], limit: Optional[int] = None, *, sort: bool = True
+) -> Dict[str, List[Relation]]:
+    """Bucket relations; with ``sort``, highest score first within each bucket."""
+    groups: Dict[str, List[Relation]] = {bucket: [] for bucket in BUCKETS}
+    for relation in relations:
+        groups[relation.bucket].append(relation)
+    for items in groups.values():
+        if sort:
+            items.sort(key=_score, reverse=True)
+        if limit is not None:
+            del items[limit:]
+    return groups
+
+
+def group_payload(raw_relations: Iterable[Any], entity: Optional[str] = None) -> Dict[str, List[Relation]]:
+    """One pass over a raw relations payload (kept in Mem0's order), optionally only those touching ``entity``."""
+    groups: Dict[str, List[Relation]] = {bucket: [] for bucket in BUCKETS}
+    for relation in iter_relations(raw_relations, entity.lower() if entity else None):
+        groups[relation[5]].append(relation)
+    return groups
+
+
+def _score(relation: Relation) -> float:
+    return relation.score
+
+
+class _UserRelations:
+    __slots__ = ("entries", "by_entity", "ordered", "tokens")
+
+    def __init__(self) -> None:
+        # payload token (e.g. search cache key) -> when it was ingested
+        self.tokens: Dict[Hashable, float] = {}
+        # key -> (relation, last seen)
+        self.entries: Dict[RelationKey, Tuple[Relation, float]] = {}
+        self.by_entity: Dict[str, Set[RelationKey]] = {}
+        # entity -> keys sorted by score, rebuilt lazily after changes
+        self.ordered: Dict[str, List[RelationKey]] = {}
+
+    def put(self, relation: Relation, now: float) -> None:
+        source, target = relation.source.lower(), relation.target.lower()
+        key = (source, relation.relationship, target)
+        previous = self.entries.get(key)
+        self.entries[key] = (relation, now)
+        if previous is None:
+            self.by_entity.setdefault(source, set()).add(key)
+            self.by_entity.setdefault(target, set()).add(key)
+        if previous is None or previous[0].score != relation.score:
+            self.ordered.pop(source, None)
+            self.ordered.pop(target, None)
+
+    def drop(self, key: RelationKey) -> None:
+        self.entries.pop(key, None)
+        for entity in (key[0], key[2]):
+            keys = self.by_entity.get(entity)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_entity[entity]
+            self.ordered.pop(entity, None)
+
+    def keys_for(self, entity: str) -> List[RelationKey]:
+        keys = self.ordered.get(entity)
+        if keys is None:
+            keys = sorted(
+                self.by_entity.get(entity, ()),
+                key=lambda k: self.entries[k][0].score,
+                reverse=True,
+            )
+            self.ordered[entity] = keys
+        return keys
+
+
+class RelationIndex:
+    """User → entity → score-ordered relations, fed by Mem0 search results."""
+
+    def __init__(self, *, ttl: float, max_per_user: int) -> None:
+        self.ttl = ttl
+        self.max_per_user = max_per_user
+        self._users: Dict[str, _UserRelations] = {}
+        self.ingested = 0
+        self.lookups = 0
+
+    def ingest(self, user_id: str, raw_relations: Iterable[Any], *, token: Optional[Hashable] = None) -> int:
+        """Add or refresh relations from a Mem0 payload; returns how many were usable.
+
+        ``token`` identifies the payload (the search cache key): re-serving the
+        same cached payload within ``ttl`` is not parsed again.
+        """
+        now = time.monotonic()
+        user = self._users.get(user_id)
+        if token is not None and user is not None:
+            seen = user.tokens.get(token)
+            if seen is not None and now - seen < self.ttl:
+                return 0
+        count = 0
+        for relation in iter_relations(raw_relations):
+            if user is None:
+                user = self._users[user_id] = _UserRelations()
+            user.put(relation, now)
+            count += 1
+        if user is not None and token is not None:
+            if len(user.tokens) >= _MAX_TOKENS:
+                user.tokens.clear()
+            user.tokens[token] = now
+        if user is not None and len(user.entries) > self.max_per_user:
+            self._evict(user, len(user.entries) - self.max_per_user)
+        self.ingested += count
+        return count
+
+    def lookup(self, user_id: str, entity: str, limit: Optional[int] = None) -> Dict[str, List[Relation]]:
+        """Relations touching ``entity`` (case-insensitive), bucketed and score-ordered."""
+        self.lookups += 1
+        user = self._users.get(user_id)
+        if user is None:
+            return group_relations(())
+        entity = entity.lower()
+        cutoff = time.monotonic() - self.ttl
+        stale = [key for key in user.by_entity.get(entity, ()) if user.entries[key][1] < cutoff]
+        for key in stale:
+            user.drop(key)
+        return group_relations(
+            (user.entries[key][0] for key in user.keys_for(entity)), limit, sort=False
+        )
+
+    def forget(self, user_id: str) -> int:
+        """Drop everything indexed for the user (their memories changed); returns how many relations went."""
+        user = self._users.pop(user_id, None)
+        return len(user.entries) if user is not None else 0
+
+    @staticmethod
+    def _evict(user: _UserRelations, count: int) -> None:
+        # Oldest sightings go first
+        for key in sorted(user.entries, key=lambda k: user.entries[k][1])[:count]:
+            user.drop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._users),
+            "relations": sum(len(user.entries) for user in self._users.values()),
+            "ingested": self.ingested,
+            "lookups": self.lookups,
+        }
+
+
+__all__ = [
+    "BUCKETS",
+    "MIN_RELATION_SCORE",
+    "Relation",
+    "RelationIndex",
+    "group_payload",
+    "group_relations",
+    "iter_relations",
+    "relation_bucket",
+]
@@ -0,0 +1,291 @@
+"""Circuit breakers and adaptive concurrency limits for upstream APIs.
+
+Each upstream (Mem0, OpenAI) gets an :class:`Upstream` guard combining a
+closed/open/half-open :class:`CircuitBreaker` with an AIMD
+:class:`AdaptiveLimiter`. The limiter grows the number of concurrent calls by
+roughly one per ``limit`` fast successes and cuts it multiplicatively when
+calls fail or exceed the latency target, so a degrading upstream sees less
+load instead of an ever-growing pile of waiting requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+import openai
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, upstream: str) -> None:
+        super().__init__(f"{upstream} circuit breaker is open")
+        self.upstream = upstream
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a timed half-open probe."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int,
+        recovery_time: float,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == "open" and self._clock() - self._opened_at >= self.recovery_time:
+            self._state = "half_open"
+            self._probes = 0
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == "open"
+
+    def allow(self) -> bool:
+        """Admit a call: always when closed, a limited number of probes when half-open."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._state != "closed":
+            logger.info("breaker.closed", upstream=self.name)
+        self._state = "closed"
+        self._failures = 0
+        self._probes = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == "half_open" or self._failures >= self.failure_threshold:
+            if self._state != "open":
+                self.times_opened += 1
+                logger.warning("breaker.opened", upstream=self.name, failures=self._failures)
+            self._state = "open"
+            self._opened_at = self._clock()
+            self._probes = 0
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot for a call that ended without a verdict."""
+        if self._state == "half_open" and self._probes > 0:
+            self._probes -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "retry_in_seconds": (
+                round(max(0.0, self._opened_at + self.recovery_time - self._clock()), 3)
+                if state == "open"
+                else 0.0
+            ),
+        }
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit driven by call latency and errors."""
+
+    def __init__(
+        self,
+        *,
+        max_limit: int,
+        min_limit: int,
+        latency_target: float,
+        decrease_factor: float = 0.7,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self._clock = clock
+
+        self._limit = float(self.max_limit)
+        self._in_flight = 0
+        self._last_decrease = float("-inf")
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[Dict[str, bool]]:
+        """Hold one concurrency slot; set ``outcome["failed"]`` to report an error."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        outcome = {"failed": False}
+        started = self._clock()
+        try:
+            yield outcome
+        finally:
+            self._adjust(self._clock() - started, outcome["failed"])
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def _adjust(self, latency: float, failed: bool) -> None:
+        now = self._clock()
+        if failed or latency > self.latency_target:
+            # At most one cut per latency window so a burst of slow calls counts once
+            if now - self._last_decrease >= self.latency_target:
+                self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                self._last_decrease = now
+        else:
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"concurrency_limit": self.limit, "in_flight": self._in_flight}
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of an error the upstream answered with, else None."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code
+    status = getattr(exc, "status_code", None)  # openai.APIStatusError
+    return status if isinstance(status, int) else None
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Count timeouts, transport errors and 5xx/429 answers.
+
+    Other 4xx are the caller's fault, and any other exception is a bug on
+    this side; neither says anything about the upstream's health.
+    """
+    status = _status_code(exc)
+    if status is not None:
+        return status >= 500 or status == 429
+    return isinstance(exc, (asyncio.TimeoutError, httpx.TransportError, openai.APIConnectionError))
+
+
+class CallOutcome:
+    """What one guarded call reports to the breaker; see :meth:`Upstream.guard`."""
+
+    def __init__(self) -> None:
+        # "success", "failure" or None (neutral: cancelled, deadline, our own error)
+        self.verdict: Optional[str] = None
+
+    def succeeded(self) -> None:
+        self.verdict = "success"
+
+    def failed(self, exc: BaseException) -> None:
+        if is_upstream_failure(exc):
+            self.verdict = "failure"
+        elif _status_code(exc) is not None:
+            # The upstream answered; the request itself was rejected
+            self.verdict = "success"
+
+
+class Upstream:
+    """Breaker plus limiter guarding every call to one upstream API."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int,
+        recovery_time: float,
+        max_concurrency: int,
+        min_concurrency: int,
+        latency_target: float,
+    ) -> None:
+        self.name = name
+        self.breaker = CircuitBreaker(
+            name, failure_threshold=failure_threshold, recovery_time=recovery_time
+        )
+        self.limiter = AdaptiveLimiter(
+            max_limit=max_concurrency, min_limit=min_concurrency, latency_target=latency_target
+        )
+
+    async def call(self, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run ``factory()`` under the breaker and limiter, recording its outcome.
+
+        Cancellation (hedged losers, deadlines) is neutral for the breaker;
+        callers report server-side timeouts explicitly via :meth:`record_timeout`.
+        """
+        async with self.guard() as outcome:
+            result = await factory()
+            outcome.succeeded()
+            return result
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[CallOutcome]:
+        """Breaker and limiter around a block that may outlive one call (a whole stream).
+
+        The limiter slot is held until the block exits. The block reports
+        through the yielded :class:`CallOutcome`; an exception escaping it
+        counts as ``failed(exc)``. A block reporting nothing is neutral.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.name)
+        outcome = CallOutcome()
+        try:
+            async with self.limiter.slot() as slot:
+                try:
+                    yield outcome
+                except Exception as exc:
+                    outcome.failed(exc)
+                    raise
+                finally:
+                    slot["failed"] = outcome.verdict == "failure"
+        finally:
+            if outcome.verdict == "failure":
+                self.breaker.record_failure()
+            elif outcome.verdict == "success":
+                self.breaker.record_success()
+            else:
+                self.breaker.release_probe()
+
+    def record_timeout(self) -> None:
+        """Count a server-side timeout cap expiring; never call it for a caller's own deadline."""
+        self.breaker.record_failure()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.breaker.snapshot(), **self.limiter.snapshot()}
+
+
+__all__ = [
+    "AdaptiveLimiter",
+    "CallOutcome",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "Upstream",
+    "is_upstream_failure",
+]
@@ -0,0 +1,111 @@
+"""Per-session reuse of retrieved context while a prompt is being typed.
+
+Clients enhancing as the user types send "I am working", "I am working on",
+"I am working on the"... under one ``run_id``. :class:`SessionContexts`
+remembers, per (user_id, run_id), the prompt the last retrieval ran for and
+its result. A prompt that extends it (or was cut back to a prefix of it) reuses
+that retrieval, unless it adds ``min_new_terms`` content words found neither
+in the searched prompt nor in the retrieved context. The caller then searches
+again and the session moves on to the new prompt.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, FrozenSet, NamedTuple, Optional
+
+from app.core.metrics import CACHE_LOOKUPS
+from app.services.cache import TTLCache
+from app.services.vocabulary import FUNCTION_WORDS
+
+_WORD_RE = re.compile(r"\b\w+\b")
+# Shorter words ("ok", "to") rarely change what a search returns
+MIN_TERM_LENGTH = 3
+
+
+def content_terms(text: str) -> FrozenSet[str]:
+    return frozenset(
+        word for word in _WORD_RE.findall(text.lower()) if len(word) >= MIN_TERM_LENGTH and word not in FUNCTION_WORDS
+    )
+
+
+class _Session(NamedTuple):
+    prompt: str
+    app_id: Optional[str]
+    limit: int
+    retrieval: Dict[str, Any]
+    # Content words of the searched prompt and of the context it retrieved
+    known_terms: FrozenSet[str]
+
+
+class SessionContexts:
+    """Bounded (user_id, run_id) → last retrieval map, expiring ``ttl`` seconds after each search."""
+
+    def __init__(self, *, ttl: float, max_sessions: int, min_new_terms: int) -> None:
+        self.min_new_terms = min_new_terms
+        self._sessions = TTLCache(max_sessions, ttl)
+        self.reused = 0
+        self.searched = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.min_new_terms > 0 and self._sessions.ttl > 0 and self._sessions.max_entries > 0
+
+    def lookup(
+        self, user_id: str, run_id: str, prompt: str, app_id: Optional[str], limit: int
+    ) -> Optional[Dict[str, Any]]:
+        """The session's retrieval when ``prompt`` only extends its searched prompt, else None."""
+        if not self.enabled:
+            return None
+        session: Optional[_Session] = self._sessions.get((user_id, run_id))
+        reusable = (
+            session is not None
+            and session.app_id == app_id
+            and session.limit == limit
+            and self._same_prefix(session.prompt, prompt)
+            and len(content_terms(prompt) - session.known_terms) < self.min_new_terms
+        )
+        if not reusable:
+            self.searched += 1
+            CACHE_LOOKUPS.inc(cache="session", result="miss")
+            return None
+        self.reused += 1
+        CACHE_LOOKUPS.inc(cache="session", result="hit")
+        return session.retrieval
+
+    def store(
+        self,
+        user_id: str,
+        run_id: str,
+        prompt: str,
+        app_id: Optional[str],
+        limit: int,
+        retrieval: Dict[str, Any],
+    ) -> None:
+        if not self.enabled:
+            return
+        vocabulary = retrieval.get("vocabulary")
+        known_terms = content_terms(prompt) | frozenset(vocabulary.ranked if vocabulary else ())
+        self._sessions.set((user_id, run_id), _Session(prompt, app_id, limit, retrieval, known_terms))
+
+    def invalidate(self, user_id: str) -> int:
+        """Forget the user's sessions (their memories changed)."""
+        return self._sessions.invalidate(lambda key: key[0] == user_id)
+
+    @staticmethod
+    def _same_prefix(searched: str, prompt: str) -> bool:
+        searched, prompt = searched.lower(), prompt.lower()
+        return prompt.startswith(searched) or searched.startswith(prompt)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.reused + self.searched
+        return {
+            "hits": self.reused,
+            "misses": self.searched,
+            "size": len(self._sessions),
+            "ttl_seconds": self._sessions.ttl,
+            "hit_rate": round(self.reused / lookups, 4) if lookups else 0.0,
+        }
+
+
+__all__ = ["SessionContexts", "content_terms"]
@@ -0,0 +1,143 @@
+"""Pure text steps run on every enhancement: prompt cleanup and completion guardrails.
+
+Patterns are compiled once at import. Preamble stripping is a single anchored
+match instead of one ``lower()`` per prefix; it relies on ASCII case folding,
+so non-ASCII completions (where ``str.lower`` and regex case folding can
+disagree) take the step-by-step path with the same result as before.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Sequence, Tuple
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Common AI preambles stripped by the post-processing guardrails, in the order they are tried
+PREAMBLE_PREFIXES: Tuple[str, ...] = (
+    "Enhanced prompt:", "Here's the enhanced prompt:", "Enhanced version:",
+    "Improved prompt:", "Here is the enhanced version:", "The enhanced prompt is:",
+    "Completion:", "Enhanced completion:", "Result:", "Output:", "Response:",
+)
+
+
+# What str.strip() removes from ASCII text (re.ASCII's \s omits \x1c-\x1f)
+_ASCII_SPACE = r"[\t\n\x0b\x0c\r\x1c-\x1f ]"
+
+
+def _compile_preambles(prefixes: Sequence[str]) -> "re.Pattern[str]":
+    # Each prefix (plus the whitespace after it) is optional and tried once,
+    # in order: exactly the sequential strip loop, as one match
+    return re.compile(
+        "".join(f"(?:{re.escape(prefix)}{_ASCII_SPACE}*)?" for prefix in prefixes),
+        re.IGNORECASE | re.ASCII,
+    )
+
+
+_PREAMBLES_RE = _compile_preambles(PREAMBLE_PREFIXES)
+_LOWERED_PREAMBLES = tuple((prefix, prefix.lower()) for prefix in PREAMBLE_PREFIXES)
+# First characters a preamble can start with; anything else skips the match
+_PREAMBLE_INITIALS = frozenset(
+    initial for prefix in PREAMBLE_PREFIXES for initial in (prefix[0].lower(), prefix[0].upper())
+)
+
+# Boundaries str.splitlines() breaks on
+_LINE_BREAK_RE = re.compile("[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+_SENTENCE_ENDS = (".", "!", "?")
+_X_IS_RE = re.compile(r"\bis\s*$", re.IGNORECASE)
+
+
+def light_cleanup(prompt: str) -> str:
+    """Normalize whitespace only (split() already drops leading/trailing runs)."""
+    return " ".join(prompt.split())
+
+
+def is_x_is_prompt(prompt: str) -> bool:
+    """Whether the prompt ends in "is", the "X is" completion pattern."""
+    # The pattern only reaches three characters back from the last non-space
+    return _X_IS_RE.search(prompt.rstrip()[-3:]) is not None
+
+
+def strip_preambles(text: str) -> str:
+    """Remove leading AI preambles ("Enhanced prompt:", "Result:", ...) from stripped text."""
+    if text.isascii():
+        if text[:1] not in _PREAMBLE_INITIALS:
+            return text
+        return text[_PREAMBLES_RE.match(text).end():]
+    # Lowercased again only after a strip, not once per prefix
+    lowered = text.lower()
+    for prefix, lowered_prefix in _LOWERED_PREAMBLES:
+        if lowered.startswith(lowered_prefix):
+            text = text[len(prefix):].strip()
+            lowered = text.lower()
+    return text
+
+
+def _starts_with_ignore_case(text: str, prefix: str) -> bool:
+    if text.isascii() and prefix.isascii():
+        return text[:len(prefix)].lower() == prefix.lower()
+    return text.lower().startswith(prefix.lower())
+
+
+def _ends_sentence(text: str) -> bool:
+    # Same as re.search(r"[.!?]$", text): "$" also matches before one final newline
+    return text.endswith(_SENTENCE_ENDS) or (text.endswith("\n") and text[:-1].endswith(_SENTENCE_ENDS))
+
+
+def apply_guardrails(text: str, original_prompt: str, char_max: int) -> str:
+    """Strip preambles, keep the first line, enforce ``char_max`` and end punctuation."""
+    cleaned = strip_preambles(text.strip())
+
+    # Remove quotes if entire response is quoted
+    if cleaned.startswith('"') and cleaned.endswith('"'):
+        cleaned = cleaned[1:-1].strip()
+
+    # Single-line completions: keep the first line only. Only the first
+    # char_max + 1 characters can survive truncation, so the line break is
+    # looked for there, unless the cut lands on whitespace (the line's real
+    # end, and so its length after strip, is then unknown)
+    head = cleaned[:char_max + 1]
+    line_break = _LINE_BREAK_RE.search(head)
+    if line_break is not None:
+        cleaned = head[:line_break.start()]
+    elif len(head) == len(cleaned) or not head[-1].isspace():
+        cleaned = head
+    else:
+        line_break = _LINE_BREAK_RE.search(cleaned)
+        if line_break is not None:
+            cleaned = cleaned[:line_break.start()]
+    cleaned = cleaned.strip()
+    if not cleaned:
+        # Nothing but a preamble or quotes: same as an empty completion
+        return original_prompt
+
+    # Hard character limit with graceful truncation
+    if len(cleaned) > char_max:
+        cleaned = cleaned[:char_max].rstrip(",;:- ").rstrip()
+        logger.sampled("guardrail.truncated", char_max=char_max)
+
+    # Ensure it starts with original prompt (for completions)
+    if not _starts_with_ignore_case(cleaned, original_prompt):
+        prefix_with_space = original_prompt + " "
+        if len(prefix_with_space) + len(cleaned) <= char_max:
+            cleaned = prefix_with_space + cleaned
+        else:
+            # If not enough space, just return original
+            cleaned = original_prompt
+
+    # Add period if missing and there's space (graceful punctuation)
+    if not _ends_sentence(cleaned) and len(cleaned) + 1 <= char_max:
+        cleaned += "."
+
+    return cleaned
+
+
+__all__ = [
+    "PREAMBLE_PREFIXES",
+    "apply_guardrails",
+    "is_x_is_prompt",
+    "light_cleanup",
+    "strip_preambles",
+]
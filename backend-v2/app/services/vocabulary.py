@@ -0,0 +1,91 @@
+"""Vocabulary whitelist for constrained completions.
+
+The completion prompt lists up to ``VOCABULARY_TOP_K`` words the model may
+use. The retrieved context's words are counted once per distinct retrieval
+(memories rarely change between a user's requests) and cached under a key
+the caller derives from the retrieval, never from the prompt-dependent packed
+text. Each request then only tokenises its short prompt and merges the ranked
+lists: prompt words first, then context words by frequency, then function
+words.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter, OrderedDict
+from typing import FrozenSet, Hashable, List, NamedTuple, Optional, Tuple
+
+_WORD_RE = re.compile(r"\b\w+\b")
+
+# Always-allowed words for natural completions, most useful first
+FUNCTION_WORDS_RANKED: Tuple[str, ...] = (
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
+    "is", "are", "was", "were", "be", "been", "being", "have", "has", "had", "do", "does", "did",
+    "will", "would", "could", "should", "may", "might", "can", "must",
+    "this", "that", "these", "those", "i", "you", "he", "she", "it", "we", "they",
+    "my", "your", "his", "her", "its", "our", "their",
+    "currently", "project", "work", "working", "starting", "development", "ai", "system",
+    "now", "today", "new", "current", "main", "primary", "key", "important", "major",
+)
+FUNCTION_WORDS: FrozenSet[str] = frozenset(FUNCTION_WORDS_RANKED)
+
+
+class ContextVocabulary(NamedTuple):
+    # Content words (not function words) by descending frequency, ties in first-seen order
+    ranked: Tuple[str, ...]
+
+
+def build_context_vocabulary(context: str) -> ContextVocabulary:
+    counts = Counter(_WORD_RE.findall(context.lower()))
+    ranked = tuple(word for word, _ in counts.most_common() if word not in FUNCTION_WORDS)
+    return ContextVocabulary(ranked)
+
+
+def select_vocabulary(prompt: str, vocabulary: ContextVocabulary, top_k: int) -> List[str]:
+    """Top ``top_k`` allowed words ranked by relevance to this prompt."""
+    selected: List[str] = []
+    seen = set()
+    prompt_words = [word for word in _WORD_RE.findall(prompt.lower()) if word not in FUNCTION_WORDS]
+    for source in (prompt_words, vocabulary.ranked, FUNCTION_WORDS_RANKED):
+        for word in source:
+            if word not in seen:
+                seen.add(word)
+                selected.append(word)
+                if len(selected) >= top_k:
+                    return selected
+    return selected
+
+
+class VocabularyCache:
+    """Small LRU of retrieval key → :class:`ContextVocabulary`."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, ContextVocabulary]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, context: str) -> ContextVocabulary:
+        """Vocabulary cached under ``key``, built from ``context`` on a miss."""
+        vocabulary: Optional[ContextVocabulary] = self._entries.get(key)
+        if vocabulary is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vocabulary
+        self.misses += 1
+        vocabulary = build_context_vocabulary(context)
+        if self.max_entries > 0:
+            self._entries[key] = vocabulary
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vocabulary
+
+
+__all__ = [
+    "ContextVocabulary",
+    "FUNCTION_WORDS",
+    "FUNCTION_WORDS_RANKED",
+    "VocabularyCache",
+    "build_context_vocabulary",
+    "select_vocabulary",
+]
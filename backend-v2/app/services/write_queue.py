@@ -0,0 +1,221 @@
+"""Write-behind queue for Mem0 memory adds.
+
+Callers enqueue messages and return immediately; a background worker
+coalesces messages for the same user/app/run into one batched Mem0 ``add``,
+retries upstream failures (timeouts, transport errors, 5xx/429, an open
+breaker) with exponential backoff and drains everything on shutdown. Any
+other error - a 4xx, a bug on this side - fails the same way on every
+attempt, so the batch is dropped at once.
+Each batch is flushed in its own task (at most ``max_concurrent`` writes at
+once, one batch per key at a time), so a batch backing off never holds up
+other users' writes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from app.core.logging import get_logger
+from app.services.resilience import CircuitOpenError, is_upstream_failure
+
+logger = get_logger(__name__)
+
+
+class WriteKey(NamedTuple):
+    """Mem0 add parameters shared by every message in a batch."""
+
+    user_id: str
+    app_id: str
+    run_id: Optional[str]
+    enable_graph: bool
+
+
+@dataclass
+class _Batch:
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    first_enqueued_at: float = 0.0
+
+
+class WriteQueueFull(RuntimeError):
+    """Raised when the queue already holds ``max_depth`` messages."""
+
+
+class MemoryWriteQueue:
+    """Coalescing, retrying background writer for Mem0 adds."""
+
+    def __init__(
+        self,
+        writer: Callable[[WriteKey, List[Dict[str, Any]]], Awaitable[Any]],
+        *,
+        flush_interval: float,
+        max_batch: int,
+        max_retries: int,
+        backoff: float,
+        max_depth: int,
+        max_concurrent: int = 8,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._writer = writer
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_depth = max_depth
+        self._clock = clock
+
+        self._pending: Dict[WriteKey, _Batch] = {}
+        self._in_flight: List[_Batch] = []
+        # Key → its flush task; a key's next batch waits for it to keep writes in order
+        self._flushing: Dict[WriteKey, asyncio.Task] = {}
+        self._write_slots = asyncio.Semaphore(max(1, max_concurrent))
+        self._wake = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.enqueued = 0
+        self.flushed = 0
+        self.failed = 0
+        self.retries = 0
+        # Messages still unwritten when close() gave up waiting
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    def enqueue(self, key: WriteKey, messages: List[Dict[str, Any]]) -> None:
+        """Accept messages for a background write; raises WriteQueueFull when saturated."""
+        if self._closing or self._worker is None:
+            raise WriteQueueFull("write queue is not running")
+        if self._worker.done():
+            # The worker died; nothing pending would ever be written without a new one
+            error = None if self._worker.cancelled() else self._worker.exception()
+            logger.error("write_queue.worker_restarted", error=str(error), depth=self.depth)
+            self._worker = asyncio.create_task(self._run())
+        if self.depth + len(messages) > self.max_depth:
+            raise WriteQueueFull(f"write queue holds {self.depth} messages")
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _Batch(first_enqueued_at=self._clock())
+        batch.messages.extend(messages)
+        self.enqueued += len(messages)
+        if len(batch.messages) >= self.max_batch:
+            self._wake.set()
+
+    @property
+    def depth(self) -> int:
+        """Messages accepted but not yet written (pending plus in flight)."""
+        return sum(len(b.messages) for b in self._pending.values()) + sum(
+            len(b.messages) for b in self._in_flight
+        )
+
+    def status(self) -> Dict[str, Any]:
+        batches = list(self._pending.values()) + self._in_flight
+        oldest = min((b.first_enqueued_at for b in batches), default=None)
+        return {
+            "running": self._worker is not None and not self._worker.done(),
+            "depth": self.depth,
+            "pending_batches": len(self._pending),
+            "in_flight_batches": len(self._in_flight),
+            "lag_seconds": round(self._clock() - oldest, 3) if oldest is not None else 0.0,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+        }
+
+    async def close(self, timeout: float) -> None:
+        """Stop accepting writes and flush everything still pending."""
+        self._closing = True
+        self._wake.set()
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._worker, timeout)
+        except asyncio.TimeoutError:
+            unwritten = self.depth
+            for task in list(self._flushing.values()):
+                task.cancel()
+            await asyncio.gather(*self._flushing.values(), return_exceptions=True)
+            self._pending.clear()
+            self.dropped += unwritten
+            logger.warning("write_queue.shutdown_dropped", messages=unwritten, timeout_s=timeout)
+        self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            now = self._clock()
+            ready = [
+                key
+                for key, batch in self._pending.items()
+                if key not in self._flushing
+                and (
+                    self._closing
+                    or len(batch.messages) >= self.max_batch
+                    or now - batch.first_enqueued_at >= self.flush_interval
+                )
+            ]
+            for key in ready:
+                task = asyncio.create_task(self._flush(key, self._pending.pop(key)))
+                self._flushing[key] = task
+                task.add_done_callback(lambda _, key=key: self._flush_done(key))
+            if self._closing and not self._pending and not self._flushing:
+                return
+
+    def _flush_done(self, key: WriteKey) -> None:
+        self._flushing.pop(key, None)
+        # The key may have a batch waiting on this one, and close() waits for the last flush
+        self._wake.set()
+
+    async def _flush(self, key: WriteKey, batch: _Batch) -> None:
+        self._in_flight.append(batch)
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    # Backoff sleeps below happen outside the slot
+                    async with self._write_slots:
+                        await self._writer(key, batch.messages)
+                    self.flushed += len(batch.messages)
+                    logger.info(
+                        "write_queue.flushed",
+                        user_id=key.user_id,
+                        app_id=key.app_id,
+                        messages=len(batch.messages),
+                        lag_s=round(self._clock() - batch.first_enqueued_at, 3),
+                    )
+                    return
+                except Exception as exc:
+                    self.last_error = str(exc)
+                    retryable = isinstance(exc, CircuitOpenError) or is_upstream_failure(exc)
+                    if not retryable or attempt == self.max_retries:
+                        break
+                    self.retries += 1
+                    delay = self.backoff * (2 ** attempt)
+                    logger.warning("write_queue.retry", attempt=attempt + 1, delay_s=delay, error=str(exc))
+                    await asyncio.sleep(delay)
+            self.failed += len(batch.messages)
+            logger.error(
+                "write_queue.dropped",
+                user_id=key.user_id,
+                app_id=key.app_id,
+                messages=len(batch.messages),
+                attempts=attempt + 1,
+                error=self.last_error,
+            )
+        finally:
+            self._in_flight.remove(batch)
+
+
+__all__ = ["MemoryWriteQueue", "WriteKey", "WriteQueueFull"]
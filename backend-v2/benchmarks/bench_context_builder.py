@@ -0,0 +1,157 @@
+"""Micro-benchmark: relation payload → context sentences.
+
+Compares the original per-request if/elif builder (kept below as the
+reference) with the relation index + compiled template path on 1k and 10k
+relation payloads, and checks both produce the same sentences.
+
+The wins are on the app-scoped path (templates ~1.6-1.8x, index lookup
+~17x at 1k and ~220x at 10k). The user-wide path (no entity filter) parses
+every relation into a ``Relation`` before rendering and measures ~0.8-0.95x
+of the legacy builder, i.e. a small regression rather than parity.
+
+    cd backend-v2 && python benchmarks/bench_context_builder.py [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.context_templates import default_templates  # noqa: E402
+from app.services.relation_index import RelationIndex, group_payload  # noqa: E402
+
+RELATIONSHIPS = [
+    "starting_work_on", "working_on", "developing", "initiated_assignment",
+    "assigned_to", "assignment", "is_related_to", "uses", "owns", "mentions",
+]
+TARGET_TYPES = ["project", "person", "library", ""]
+APP_ID = "masterbrain"
+
+
+def make_payload(size: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    entities = [APP_ID] + [f"entity_{i}" for i in range(max(8, size // 20))]
+    return [
+        {
+            "source": rng.choice(entities),
+            "relationship": rng.choice(RELATIONSHIPS),
+            "target": rng.choice(entities),
+            "target_type": rng.choice(TARGET_TYPES),
+            "score": rng.random(),
+        }
+        for _ in range(size)
+    ]
+
+
+def legacy_relation_context(relations: List[Dict[str, Any]], target_app_id: Optional[str]) -> List[str]:
+    """Reference copy of the original relation section of _build_enhanced_context."""
+    filtered_relations = []
+    for relation in relations:
+        if not isinstance(relation, dict):
+            continue
+        source = relation.get("source", "").strip()
+        relationship = relation.get("relationship", "").strip()
+        target = relation.get("target", "").strip()
+        score = relation.get("score", 0.0)
+        if not (source and relationship and target) or score < 0.3:
+            continue
+        if target_app_id:
+            if target_app_id.lower() in [source.lower(), target.lower()]:
+                filtered_relations.append(relation)
+        else:
+            filtered_relations.append(relation)
+
+    work_relations, assignment_relations, project_relations = [], [], []
+    for relation in filtered_relations:
+        relation_context = {
+            "source": relation.get("source", "").strip(),
+            "relationship": relation.get("relationship", "").strip(),
+            "target": relation.get("target", "").strip(),
+            "target_type": relation.get("target_type", "").strip(),
+            "score": relation.get("score", 0.0),
+        }
+        relationship = relation_context["relationship"]
+        if relationship in ["starting_work_on", "working_on", "developing"]:
+            work_relations.append(relation_context)
+        elif relationship in ["initiated_assignment", "assigned_to", "assignment"]:
+            assignment_relations.append(relation_context)
+        elif relation_context["target_type"] in ["project"] or relationship == "is_related_to":
+            project_relations.append(relation_context)
+
+    segments: List[str] = []
+    for rel in work_relations:
+        if rel["relationship"] == "starting_work_on":
+            segments.append(f"{rel['source']} is currently starting work on the {rel['target']} {rel['target_type'] or 'project'}")
+        elif rel["relationship"] == "working_on":
+            segments.append(f"{rel['source']} is actively working on the {rel['target']} {rel['target_type'] or 'project'}")
+        else:
+            segments.append(f"{rel['source']} {rel['relationship'].replace('_', ' ')} {rel['target']}")
+    for rel in assignment_relations:
+        if rel["relationship"] == "initiated_assignment":
+            segments.append(f"{rel['source']} initiated assignment for the {rel['target']} {rel['target_type'] or 'project'}")
+        elif rel["relationship"] == "assignment":
+            segments.append(f"{rel['source']} has assignment relationship with {rel['target']}")
+        else:
+            segments.append(f"{rel['source']} {rel['relationship'].replace('_', ' ')} {rel['target']}")
+    for rel in project_relations:
+        if rel["relationship"] == "is_related_to":
+            segments.append(f"{rel['source']} is related to {rel['target']} {rel['target_type'] or 'project'}")
+        else:
+            segments.append(f"{rel['source']} {rel['relationship'].replace('_', ' ')} {rel['target']}")
+    return segments
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    args = parser.parse_args()
+
+    print(f"{'relations':>9}  {'scope':<11}  {'path':<16}  {'best ms':>8}  {'relations/s':>12}  {'speedup':>7}")
+    for size in args.sizes:
+        payload = make_payload(size)
+        index = RelationIndex(ttl=3600, max_per_user=size * 2)
+        index.ingest("bench", payload)
+
+        for scope in (None, APP_ID):
+            legacy = legacy_relation_context(payload, scope)
+            rendered = default_templates.render_groups(group_payload(payload, scope))
+            assert sorted(legacy) == sorted(rendered), "template output diverged from the reference"
+            if scope:
+                indexed = default_templates.render_groups(index.lookup("bench", scope))
+                assert sorted(set(indexed)) == sorted(set(legacy)), "index output diverged from the reference"
+
+            paths = {
+                "legacy if/elif": lambda: legacy_relation_context(payload, scope),
+                "templates": lambda: default_templates.render_groups(group_payload(payload, scope)),
+            }
+            if scope:
+                paths["index+templates"] = lambda: default_templates.render_groups(index.lookup("bench", scope))
+
+            baseline = None
+            for name, fn in paths.items():
+                best = best_of(fn, args.repeat)
+                baseline = baseline or best
+                print(
+                    f"{size:>9}  {scope or 'user':<11}  {name:<16}  {best * 1000:>8.2f}  "
+                    f"{size / best:>12,.0f}  {baseline / best:>6.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
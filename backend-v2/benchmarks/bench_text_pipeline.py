@@ -0,0 +1,237 @@
+"""Micro-benchmark: the pure text steps run on every enhancement.
+
+Covers prompt cleanup, the "X is" check, the post-processing guardrails and
+context building (memories + relations), each against a reference copy of the
+original implementation kept below, on fixtures from tiny prompts to very
+large completions and payloads. Every case is checked for identical output
+before it is timed.
+
+The reference guardrails raise IndexError when a completion is nothing but a
+preamble or quotes (the fast path returns the original prompt there); the
+fixtures always carry a completion body, so that case is not generated.
+
+    cd backend-v2 && python benchmarks/bench_text_pipeline.py [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+# The service module loads settings on import; no upstream is contacted
+os.environ.setdefault("MEM0_API_KEY", "benchmark")
+
+from bench_context_builder import APP_ID, legacy_relation_context, make_payload  # noqa: E402
+
+from app.core.logging import get_logger  # noqa: E402
+from app.services.memory import AsyncMemoryService  # noqa: E402
+from app.services.text_pipeline import (  # noqa: E402
+    PREAMBLE_PREFIXES,
+    apply_guardrails,
+    is_x_is_prompt,
+    light_cleanup,
+)
+
+logger = get_logger("app.services.text_pipeline")
+
+WORDS = (
+    "masterbrain project backend extension memory search graph context prompt "
+    "deadline cache relation vector index latency service release review team"
+).split()
+
+# name -> (prompt words, completion words, memories, relations, cases per batch)
+FIXTURES: Dict[str, Tuple[int, int, int, int, int]] = {
+    "tiny": (3, 4, 1, 0, 200),
+    "small": (8, 16, 5, 20, 200),
+    "medium": (30, 60, 10, 200, 100),
+    "large": (200, 400, 20, 2_000, 20),
+    "very large": (2_000, 20_000, 50, 20_000, 5),
+}
+
+
+# --- reference copies of the original implementations -----------------------
+
+LEGACY_PREAMBLE_PREFIXES = [
+    "Enhanced prompt:", "Here's the enhanced prompt:", "Enhanced version:",
+    "Improved prompt:", "Here is the enhanced version:", "The enhanced prompt is:",
+    "Completion:", "Enhanced completion:", "Result:", "Output:", "Response:"
+]
+
+
+def legacy_light_cleanup(prompt: str) -> str:
+    return " ".join(prompt.strip().split())
+
+
+def legacy_is_x_is(prompt: str) -> bool:
+    return bool(re.search(r"\bis\s*$", prompt.strip(), re.IGNORECASE))
+
+
+def legacy_guardrails(text: str, original_prompt: str, char_max: int) -> str:
+    cleaned = text.strip()
+    for prefix in LEGACY_PREAMBLE_PREFIXES:
+        if cleaned.lower().startswith(prefix.lower()):
+            cleaned = cleaned[len(prefix):].strip()
+    if cleaned.startswith('"') and cleaned.endswith('"'):
+        cleaned = cleaned[1:-1].strip()
+    cleaned = cleaned.splitlines()[0].strip()
+    if len(cleaned) > char_max:
+        cleaned = cleaned[:char_max].rstrip(",;:- ").rstrip()
+        logger.sampled("guardrail.truncated", char_max=char_max)
+    if not cleaned.lower().startswith(original_prompt.lower()):
+        prefix_with_space = original_prompt + " "
+        if len(prefix_with_space) + len(cleaned) <= char_max:
+            cleaned = prefix_with_space + cleaned
+        else:
+            cleaned = original_prompt
+    if not re.search(r"[.!?]$", cleaned) and len(cleaned) + 1 <= char_max:
+        cleaned += "."
+    return cleaned
+
+
+def legacy_enhanced_context(memories: List[Dict[str, Any]], strategy: Optional[Dict[str, Any]]) -> str:
+    """Original memory section (operator-precedence fix applied) + relation section."""
+    if not memories:
+        return ""
+    memory_data = memories[0] if isinstance(memories, list) else memories
+    target_app_id = strategy["filters"].get("app_id") if strategy and strategy.get("filters") else None
+    segments: List[str] = []
+    for result in memory_data.get("results", []) or []:
+        if isinstance(result, dict):
+            content = (
+                result.get("content") or
+                result.get("memory") or
+                result.get("text") or
+                (result.get("message", {}).get("content") if isinstance(result.get("message"), dict) else None)
+            )
+            if isinstance(content, str) and content.strip():
+                segments.append(f"Memory: {content.strip()}")
+    segments.extend(legacy_relation_context(memory_data.get("relations", []) or [], target_app_id))
+    return "\n".join(segments)
+
+
+# --- fixtures ----------------------------------------------------------------
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_prompts(rng: random.Random, words: int, count: int) -> List[str]:
+    prompts = []
+    for i in range(count):
+        prompt = sentence(rng, words)
+        if i % 3 == 0:
+            spacing = rng.choice(["  ", "\t", " \n "])
+            prompt = f"  {prompt.replace(' ', spacing, 3)} is  "
+        prompts.append(prompt)
+    return prompts
+
+
+def make_completions(rng: random.Random, prompt_words: int, words: int, count: int) -> List[Tuple[str, str, int]]:
+    """(completion, original prompt, char_max) covering each guardrail branch."""
+    cases = []
+    for i in range(count):
+        prompt = sentence(rng, prompt_words)
+        char_max = min(max(2 * len(prompt), 20), 4 * len(prompt))
+        body = sentence(rng, words)
+        shape = i % 8
+        if shape == 0:
+            text = body
+        elif shape == 1:
+            text = f"{rng.choice(PREAMBLE_PREFIXES).upper()}  {body}"
+        elif shape == 2:
+            # Stacked preambles, stripped in list order only
+            text = f"Enhanced prompt: Result:\t{rng.choice(PREAMBLE_PREFIXES)} {body}"
+        elif shape == 3:
+            text = f'"{body}"'
+        elif shape == 4:
+            text = f"{body}\n{sentence(rng, words)}\r\n{body}"
+        elif shape == 5:
+            text = f"{prompt.upper()} {body}."
+        elif shape == 6:
+            text = f"résumé: {body} — naïve"
+        else:
+            text = f"Output:\x1c {body}!"
+        cases.append((text, prompt, char_max))
+    return cases
+
+
+def make_memories(rng: random.Random, memories: int, relations: int) -> List[Dict[str, Any]]:
+    results = []
+    for i in range(memories):
+        field = ("memory", "content", "text", "message")[i % 4]
+        value = sentence(rng, 12)
+        results.append({"message": {"content": value}} if field == "message" else {field: value, "score": rng.random()})
+    return [{"results": results, "relations": make_payload(relations)}]
+
+
+# --- timing ------------------------------------------------------------------
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def check(name: str, legacy: List[Any], fast: List[Any]) -> None:
+    for index, (expected, actual) in enumerate(zip(legacy, fast)):
+        assert expected == actual, f"{name}[{index}]: {actual!r} != reference {expected!r}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--fixtures", nargs="+", choices=list(FIXTURES), default=list(FIXTURES))
+    args = parser.parse_args()
+
+    strategy = {"filters": {"app_id": APP_ID}}
+    print(f"{'fixture':<10}  {'step':<14}  {'cases':>5}  {'reference ms':>12}  {'fast ms':>8}  {'speedup':>7}")
+    for name in args.fixtures:
+        prompt_words, completion_words, memories, relations, count = FIXTURES[name]
+        rng = random.Random(name)
+        prompts = make_prompts(rng, prompt_words, count)
+        completions = make_completions(rng, prompt_words, completion_words, count)
+        payloads = [make_memories(rng, memories, relations) for _ in range(max(1, count // 20))]
+
+        steps: Dict[str, Tuple[Callable[[], List[Any]], Callable[[], List[Any]]]] = {
+            "light_cleanup": (
+                lambda: [legacy_light_cleanup(p) for p in prompts],
+                lambda: [light_cleanup(p) for p in prompts],
+            ),
+            "x_is": (
+                lambda: [legacy_is_x_is(p) for p in prompts],
+                lambda: [is_x_is_prompt(p) for p in prompts],
+            ),
+            "guardrails": (
+                lambda: [legacy_guardrails(*case) for case in completions],
+                lambda: [apply_guardrails(*case) for case in completions],
+            ),
+            "context": (
+                lambda: [legacy_enhanced_context(m, strategy) for m in payloads],
+                lambda: [AsyncMemoryService._build_enhanced_context(m, strategy) for m in payloads],
+            ),
+        }
+        for step, (legacy, fast) in steps.items():
+            check(f"{name}/{step}", legacy(), fast())
+            legacy_best = best_of(legacy, args.repeat)
+            fast_best = best_of(fast, args.repeat)
+            cases = len(payloads) if step == "context" else len(completions) if step == "guardrails" else len(prompts)
+            print(
+                f"{name:<10}  {step:<14}  {cases:>5}  {legacy_best * 1000:>12.3f}  "
+                f"{fast_best * 1000:>8.3f}  {legacy_best / fast_best:>6.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
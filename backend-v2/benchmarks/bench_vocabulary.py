@@ -0,0 +1,115 @@
+"""Micro-benchmark: vocabulary whitelist for the completion prompt.
+
+Compares the original per-request whitelist (kept below as the reference:
+regex over prompt + context, a fresh function-word set, and the
+alphabetical ``sorted(...)[:50]`` evaluated twice) with the cached, ranked
+vocabulary on large contexts. Cold includes counting the context; warm is the
+per-request cost once the context's vocabulary is cached with retrieval.
+
+    cd backend-v2 && python benchmarks/bench_vocabulary.py [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Set
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.vocabulary import (  # noqa: E402
+    FUNCTION_WORDS,
+    VocabularyCache,
+    build_context_vocabulary,
+    select_vocabulary,
+)
+
+TOP_K = 50
+PROMPT = "the masterbrain dashboard payments service is"
+
+
+def make_context(words: int, seed: int = 11) -> str:
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(max(50, words // 10))] + list(FUNCTION_WORDS)
+    lines, line = [], []
+    for _ in range(words):
+        line.append(rng.choice(vocabulary))
+        if len(line) == 12:
+            lines.append("Memory: " + " ".join(line))
+            line = []
+    return "\n".join(lines)
+
+
+def legacy_allowed_vocabulary(prompt: str, context: str) -> Set[str]:
+    """Reference copy of the original _build_allowed_vocabulary."""
+    text = f"{prompt} {context}".lower()
+    words = set(re.findall(r'\b\w+\b', text))
+    function_words = {
+        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+        'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
+        'will', 'would', 'could', 'should', 'may', 'might', 'can', 'must',
+        'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they',
+        'my', 'your', 'his', 'her', 'its', 'our', 'their',
+        'currently', 'project', 'work', 'working', 'starting', 'development', 'ai', 'system',
+        'now', 'today', 'new', 'current', 'main', 'primary', 'key', 'important', 'major'
+    }
+    words.update(function_words)
+    return words
+
+
+def legacy(prompt: str, context: str) -> str:
+    allowed_vocab = legacy_allowed_vocabulary(prompt, context)
+    # The original built the line in the branch taken, after computing it for the f-string
+    ', '.join(sorted(list(allowed_vocab))[:50])
+    return ', '.join(sorted(list(allowed_vocab))[:50])
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'words':>7}  {'path':<14}  {'best ms':>9}  {'speedup':>8}  {'prompt words kept':>17}")
+    for size in args.sizes:
+        context = make_context(size)
+        cache = VocabularyCache()
+        cache.get(size, context)
+        prompt_words: List[str] = [w for w in PROMPT.split() if w not in FUNCTION_WORDS]
+
+        def kept(line: List[str]) -> str:
+            return f"{sum(w in line for w in prompt_words)}/{len(prompt_words)}"
+
+        paths = {
+            "legacy": (lambda: legacy(PROMPT, context), legacy(PROMPT, context).split(", ")),
+            "ranked cold": (
+                lambda: select_vocabulary(PROMPT, build_context_vocabulary(context), TOP_K),
+                select_vocabulary(PROMPT, build_context_vocabulary(context), TOP_K),
+            ),
+            "ranked warm": (
+                lambda: select_vocabulary(PROMPT, cache.get(size, context), TOP_K),
+                select_vocabulary(PROMPT, cache.get(size, context), TOP_K),
+            ),
+        }
+        baseline = None
+        for name, (fn, line) in paths.items():
+            best = best_of(fn, args.repeat)
+            baseline = baseline or best
+            print(f"{size:>7}  {name:<14}  {best * 1000:>9.3f}  {baseline / best:>7.1f}x  {kept(line):>17}")
+
+
+if __name__ == "__main__":
+    main()
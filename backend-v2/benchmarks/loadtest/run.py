@@ -0,0 +1,260 @@
+"""End-to-end load test: ``app.main:app`` against local Mem0/OpenAI stubs.
+
+Starts the stubs (``stubs.py``) and the app under uvicorn as subprocesses,
+points the app at the stubs through ``MEM0_HOST`` and ``OPENAI_BASE_URL``,
+then drives each endpoint with ``--concurrency`` clients for ``--duration``
+seconds (after a warm-up) and reports RPS and p50/p95/p99 latency.
+
+    cd backend-v2 && python benchmarks/loadtest/run.py --concurrency 32 --duration 20
+    python benchmarks/loadtest/run.py --relations 5000 --mem0-error-rate 0.05 \\
+        --app-env SEARCH_STRATEGY_MODE=hedged --json results.json
+
+Use ``--app-url`` to drive an app that is already running (it must be pointed
+at the stubs, or at real upstreams, by its own environment).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from stubs import WORDS, add_arguments, stub_argv
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+STUBS_SCRIPT = Path(__file__).resolve().with_name("stubs.py")
+
+ENDPOINTS = {
+    "enhance": "/api/v1/prompts/enhance",
+    "search": "/api/v1/memories/search",
+}
+
+
+def make_bodies(endpoint: str, args: argparse.Namespace) -> Callable[[random.Random], Dict[str, Any]]:
+    """Request body factory drawing from a fixed pool of users, apps and prompts.
+
+    Pool sizes control the cache hit rate: few distinct prompts mostly hit
+    the app's caches, many mostly miss.
+    """
+    pool_rng = random.Random(args.seed)
+    prompts = [
+        "I am working on the " + " ".join(pool_rng.choice(WORDS) for _ in range(pool_rng.randint(2, 8)))
+        for _ in range(args.prompts)
+    ]
+    users = [f"loadtest_user_{i}" for i in range(args.users)]
+    apps = [f"app_{i:03d}" for i in range(args.apps)]
+
+    def body(rng: random.Random) -> Dict[str, Any]:
+        payload = {"user_id": rng.choice(users), "app_id": rng.choice(apps)}
+        if endpoint == "enhance":
+            payload["prompt"] = rng.choice(prompts)
+        else:
+            payload["query"] = rng.choice(prompts)
+        return payload
+
+    return body
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    path: str,
+    make_body: Callable[[random.Random], Dict[str, Any]],
+    concurrency: int,
+    duration: float,
+    seed: int,
+) -> Tuple[List[float], Dict[str, int], float]:
+    """Run ``concurrency`` closed-loop clients for ``duration`` seconds."""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    started = time.perf_counter()
+    stop_at = started + duration
+
+    async def worker(index: int) -> None:
+        rng = random.Random(seed + index)
+        while time.perf_counter() < stop_at:
+            body = make_body(rng)
+            sent = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            if status == "200":
+                latencies.append(time.perf_counter() - sent)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def run_load(args: argparse.Namespace, app_url: str) -> List[Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.request_timeout)
+    results: List[Dict[str, Any]] = []
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=timeout) as client:
+        for endpoint in args.endpoints:
+            path = ENDPOINTS[endpoint]
+            make_body = make_bodies(endpoint, args)
+            if args.warmup > 0:
+                await drive(client, path, make_body, args.concurrency, args.warmup, args.seed + 1000)
+            latencies, statuses, elapsed = await drive(
+                client, path, make_body, args.concurrency, args.duration, args.seed
+            )
+            latencies.sort()
+            total = sum(statuses.values())
+            results.append(
+                {
+                    "endpoint": endpoint,
+                    "path": path,
+                    "concurrency": args.concurrency,
+                    "requests": total,
+                    "ok": len(latencies),
+                    "errors": total - len(latencies),
+                    "statuses": statuses,
+                    "rps": len(latencies) / elapsed if elapsed else 0.0,
+                    "p50_ms": percentile(latencies, 50) * 1000,
+                    "p95_ms": percentile(latencies, 95) * 1000,
+                    "p99_ms": percentile(latencies, 99) * 1000,
+                    "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+                }
+            )
+        try:
+            stub_calls = (await client.get(f"{args.stub_url}/_stub/calls")).json() if args.stub_url else None
+        except httpx.HTTPError:
+            stub_calls = None
+    if stub_calls:
+        print(f"stub upstream calls: {stub_calls}")
+    return results
+
+
+def wait_ready(url: str, process: Optional[subprocess.Popen], timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f"{url}: process exited with code {process.returncode} before becoming ready")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"{url}: not ready after {timeout:.0f}s")
+
+
+def app_environment(args: argparse.Namespace) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "MEM0_API_KEY": "loadtest",
+            "MEM0_HOST": args.stub_url,
+            "OPENAI_API_KEY": "loadtest",
+            "OPENAI_BASE_URL": f"{args.stub_url}/v1",
+            "LOG_LEVEL": "WARNING",
+        }
+    )
+    for item in args.app_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    print(
+        f"{'endpoint':<8}  {'conc':>4}  {'requests':>8}  {'errors':>6}  {'rps':>8}  "
+        f"{'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'max ms':>8}"
+    )
+    for row in results:
+        print(
+            f"{row['endpoint']:<8}  {row['concurrency']:>4}  {row['requests']:>8}  {row['errors']:>6}  "
+            f"{row['rps']:>8.1f}  {row['p50_ms']:>8.1f}  {row['p95_ms']:>8.1f}  {row['p99_ms']:>8.1f}  "
+            f"{row['max_ms']:>8.1f}"
+        )
+        if row["errors"]:
+            print(f"{'':<8}  statuses: {row['statuses']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=["enhance", "search"])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds per endpoint")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds per endpoint")
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--prompts", type=int, default=200, help="distinct prompts/queries in the pool")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app")
+    parser.add_argument(
+        "--app-env", action="append", default=[], metavar="KEY=VALUE", help="extra app setting (repeatable)"
+    )
+    parser.add_argument("--app-url", help="drive an already-running app instead of starting one")
+    parser.add_argument("--no-stubs", action="store_true", help="do not start the stubs (with --app-url)")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    args.stub_url = None if args.no_stubs else f"http://{args.host}:{args.stub_port}"
+    processes: List[subprocess.Popen] = []
+    try:
+        if args.stub_url:
+            stub = subprocess.Popen(
+                [sys.executable, str(STUBS_SCRIPT), "--host", args.host, "--port", str(args.stub_port)]
+                + stub_argv(args)
+            )
+            processes.append(stub)
+            wait_ready(f"{args.stub_url}/v1/ping/", stub)
+
+        app_url = args.app_url
+        if not app_url:
+            app_url = f"http://{args.host}:{args.app_port}"
+            app = subprocess.Popen(
+                [
+                    sys.executable, "-m", "uvicorn", "app.main:app",
+                    "--host", args.host, "--port", str(args.app_port),
+                    "--workers", str(args.workers), "--log-level", "warning",
+                ],
+                cwd=BACKEND_DIR,
+                env=app_environment(args),
+            )
+            processes.append(app)
+        # /health answers before the memory service is up; this route is 503 until it is
+        wait_ready(f"{app_url}/api/v1/memories/cache/stats", app if not args.app_url else None)
+
+        results = asyncio.run(run_load(args, app_url))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump({"args": {k: v for k, v in vars(args).items()}, "results": results}, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Local stand-ins for Mem0 and OpenAI, for load-testing the backend offline.
+
+One FastAPI app serves both upstreams on one port (their paths do not
+overlap): point ``MEM0_HOST`` at ``http://HOST:PORT`` and ``OPENAI_BASE_URL``
+at ``http://HOST:PORT/v1``. Latency, jitter, error rate and payload sizes are
+set per upstream from the command line (or :class:`StubConfig` when embedded).
+
+    cd backend-v2 && python benchmarks/loadtest/stubs.py --port 9100 --relations 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+RELATIONSHIPS = [
+    "starting_work_on", "working_on", "developing", "initiated_assignment",
+    "assigned_to", "assignment", "is_related_to", "uses", "owns", "mentions",
+]
+TARGET_TYPES = ["project", "person", "library", ""]
+WORDS = (
+    "masterbrain project backend extension memory search graph context prompt "
+    "deadline cache relation vector index latency service release review team"
+).split()
+
+
+@dataclass
+class UpstreamProfile:
+    """Behaviour of one stubbed upstream."""
+
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+
+    async def respond_delay(self, rng: random.Random) -> None:
+        delay = self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    def fails(self, rng: random.Random) -> bool:
+        return self.error_rate > 0 and rng.random() < self.error_rate
+
+
+@dataclass
+class StubConfig:
+    mem0: UpstreamProfile = field(default_factory=UpstreamProfile)
+    openai: UpstreamProfile = field(default_factory=lambda: UpstreamProfile(latency_ms=300.0, jitter_ms=100.0))
+    # Search payload shape
+    memories: int = 5
+    memory_words: int = 12
+    relations: int = 50
+    # Entities listed by /v1/entities/ (apps and users)
+    apps: int = 20
+    completion_words: int = 6
+    seed: int = 7
+
+
+def _payloads(config: StubConfig) -> Dict[str, Any]:
+    """Search payloads are built once: the stub must not be the bottleneck."""
+    rng = random.Random(config.seed)
+    apps = [f"app_{i:03d}" for i in range(config.apps)]
+    entities = apps + [f"entity_{i}" for i in range(max(8, config.relations // 20))]
+    results = [
+        {
+            "id": f"mem-{i}",
+            "memory": " ".join(rng.choice(WORDS) for _ in range(config.memory_words)),
+            "score": round(rng.uniform(0.3, 0.95), 3),
+            "metadata": {"app_id": rng.choice(apps)},
+        }
+        for i in range(config.memories)
+    ]
+    relations = [
+        {
+            "source": rng.choice(entities),
+            "relationship": rng.choice(RELATIONSHIPS),
+            "target": rng.choice(entities),
+            "target_type": rng.choice(TARGET_TYPES),
+            "score": round(rng.random(), 3),
+        }
+        for _ in range(config.relations)
+    ]
+    entity_list = [{"type": "app", "name": app, "total_memories": rng.randint(1, 50)} for app in apps]
+    return {"results": results, "relations": relations, "entities": entity_list}
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="mastermind load-test stubs")
+    rng = random.Random(config.seed)
+    payloads = _payloads(config)
+    entities_body = {"total_apps": config.apps, "results": payloads["entities"]}
+    entities_etag = '"%s"' % hashlib.md5(json.dumps(entities_body).encode()).hexdigest()
+    calls: Dict[str, int] = {"search": 0, "add": 0, "entities": 0, "chat": 0, "errors": 0}
+
+    def upstream_error(name: str) -> JSONResponse:
+        calls["errors"] += 1
+        return JSONResponse({"error": f"injected {name} failure"}, status_code=503)
+
+    @app.get("/v1/ping/")
+    async def ping() -> Dict[str, Any]:
+        return {"org_id": "org-loadtest", "project_id": "proj-loadtest", "user_email": "loadtest@example.com"}
+
+    @app.patch("/api/v1/orgs/organizations/{org_id}/projects/{project_id}/")
+    async def update_project(org_id: str, project_id: str) -> Dict[str, Any]:
+        return {"org_id": org_id, "project_id": project_id}
+
+    @app.post("/v1/memories/search/")
+    @app.post("/v2/memories/search/")
+    async def search(request: Request) -> Any:
+        body = await request.json()
+        calls["search"] += 1
+        await config.mem0.respond_delay(rng)
+        if config.mem0.fails(rng):
+            return upstream_error("mem0")
+        if body.get("output_format") != "v1.1":
+            return payloads["results"]
+        return {
+            "results": payloads["results"],
+            "relations": payloads["relations"] if body.get("enable_graph") else [],
+        }
+
+    @app.post("/v1/memories/")
+    async def add(request: Request) -> Any:
+        body = await request.json()
+        calls["add"] += 1
+        await config.mem0.respond_delay(rng)
+        if config.mem0.fails(rng):
+            return upstream_error("mem0")
+        content = (body.get("messages") or [{}])[0].get("content", "")
+        return {"results": [{"id": f"add-{calls['add']}", "event": "ADD", "memory": content}], "relations": []}
+
+    @app.get("/v1/entities/")
+    async def entities(request: Request) -> Any:
+        calls["entities"] += 1
+        if request.headers.get("if-none-match") == entities_etag:
+            return Response(status_code=304, headers={"ETag": entities_etag})
+        await config.mem0.respond_delay(rng)
+        if config.mem0.fails(rng):
+            return upstream_error("mem0")
+        return JSONResponse(entities_body, headers={"ETag": entities_etag})
+
+    @app.post("/v1/chat/completions")
+    async def chat(request: Request) -> Any:
+        body = await request.json()
+        calls["chat"] += 1
+        await config.openai.respond_delay(rng)
+        if config.openai.fails(rng):
+            return upstream_error("openai")
+        tokens = [(" " if i else "") + rng.choice(WORDS) for i in range(config.completion_words)]
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": 200,
+            "completion_tokens": len(tokens),
+            "total_tokens": 200 + len(tokens),
+            "prompt_tokens_details": {"cached_tokens": 128},
+        }
+        if not body.get("stream"):
+            return {
+                "id": "chatcmpl-loadtest",
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model", "gpt-4o-mini"),
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}
+                ],
+                "usage": usage,
+            }
+
+        async def events() -> AsyncIterator[str]:
+            base = {"id": "chatcmpl-loadtest", "object": "chat.completion.chunk", "created": created, "model": body.get("model")}
+            for token in tokens:
+                chunk = dict(base, choices=[{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(0.005)
+            yield f"data: {json.dumps(dict(base, choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]))}\n\n"
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield f"data: {json.dumps(dict(base, choices=[], usage=usage))}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/_stub/calls")
+    async def call_counts() -> Dict[str, int]:
+        return calls
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Stub options, shared with the load-test runner."""
+    group = parser.add_argument_group("stub upstreams")
+    group.add_argument("--mem0-latency-ms", type=float, default=50.0)
+    group.add_argument("--mem0-jitter-ms", type=float, default=10.0)
+    group.add_argument("--mem0-error-rate", type=float, default=0.0)
+    group.add_argument("--openai-latency-ms", type=float, default=300.0)
+    group.add_argument("--openai-jitter-ms", type=float, default=100.0)
+    group.add_argument("--openai-error-rate", type=float, default=0.0)
+    group.add_argument("--memories", type=int, default=5, help="memories per search result")
+    group.add_argument("--memory-words", type=int, default=12)
+    group.add_argument("--relations", type=int, default=50, help="GraphMemory relations per search result")
+    group.add_argument("--apps", type=int, default=20)
+    group.add_argument("--completion-words", type=int, default=6)
+
+
+def stub_argv(args: argparse.Namespace) -> List[str]:
+    """Command-line flags reproducing ``args`` for a stub subprocess."""
+    argv: List[str] = []
+    for name in (
+        "mem0_latency_ms", "mem0_jitter_ms", "mem0_error_rate",
+        "openai_latency_ms", "openai_jitter_ms", "openai_error_rate",
+        "memories", "memory_words", "relations", "apps", "completion_words",
+    ):
+        argv += ["--" + name.replace("_", "-"), str(getattr(args, name))]
+    return argv
+
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        mem0=UpstreamProfile(args.mem0_latency_ms, args.mem0_jitter_ms, args.mem0_error_rate),
+        openai=UpstreamProfile(args.openai_latency_ms, args.openai_jitter_ms, args.openai_error_rate),
+        memories=args.memories,
+        memory_words=args.memory_words,
+        relations=args.relations,
+        apps=args.apps,
+        completion_words=args.completion_words,
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
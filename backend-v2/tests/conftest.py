@@ -0,0 +1,91 @@
+"""Shared fixtures: a memory service wired to in-process fakes, never the network."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Iterable, Iterator, List
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+# Settings are read on import; no upstream is contacted
+os.environ.setdefault("MEM0_API_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from app.services.memory import AsyncMemoryService  # noqa: E402
+
+
+class FakeStream:
+    """Async iterator of chat.completions chunks carrying ``tokens``."""
+
+    def __init__(self, tokens: Iterable[str]) -> None:
+        self._chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))], usage=None)
+            for token in tokens
+        ]
+        self.consumed = 0
+        self.closed = False
+
+    def __aiter__(self) -> "FakeStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        if self.consumed >= len(self._chunks):
+            raise StopAsyncIteration
+        self.consumed += 1
+        return self._chunks[self.consumed - 1]
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeCompletions:
+    """Stands in for ``AsyncOpenAI().chat.completions``; ``create`` runs ``handler``."""
+
+    def __init__(self, handler: Any) -> None:
+        self.handler = handler
+        self.calls: List[dict] = []
+
+    async def create(self, **params: Any) -> Any:
+        self.calls.append(params)
+        return await self.handler(**params)
+
+
+class FakeOpenAI:
+    """Stands in for ``AsyncOpenAI``: ``chat.completions`` plus ``close``."""
+
+    def __init__(self, completions: FakeCompletions) -> None:
+        self.chat = SimpleNamespace(completions=completions)
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def service() -> Iterator[AsyncMemoryService]:
+    service = AsyncMemoryService()
+    yield service
+    # Releases the httpx clients and drains the write queue a test may have started
+    asyncio.run(service.aclose())
+
+
+@pytest.fixture
+def fake_stream() -> Callable[[Iterable[str]], FakeStream]:
+    return FakeStream
+
+
+@pytest.fixture
+def use_completions(service: AsyncMemoryService) -> Callable[[Any], FakeCompletions]:
+    """Route ``service``'s OpenAI completions to ``handler(**params)``."""
+
+    def install(handler: Any) -> FakeCompletions:
+        completions = FakeCompletions(handler)
+        service.openai_client = FakeOpenAI(completions)
+        return completions
+
+    return install
@@ -0,0 +1,96 @@
+"""The app index revalidates its Entities snapshot with the last ETag and keeps per-user writes bounded."""
+
+from __future__ import annotations
+
+import asyncio
+
+from app.services.app_index import AppIdIndex
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SnapshotLoader:
+    """Answers conditional loads like the Entities fetch: None when the ETag still matches."""
+
+    def __init__(self, apps, etag="v1"):
+        self.apps = apps
+        self.etag = etag
+        self.calls = []
+
+    async def __call__(self, etag):
+        self.calls.append(etag)
+        if etag == self.etag:
+            return None
+        return {"version": self.etag, "etag": self.etag, "apps": dict(self.apps)}
+
+
+def test_refresh_sends_the_etag_and_rebuilds_only_on_change():
+    async def run():
+        clock = FakeClock()
+        loader = SnapshotLoader({"notes": 2})
+        index = AppIdIndex(loader, ttl=60, clock=clock)
+
+        first = await index.lookup("u")
+        clock.now = 61
+        await index.refresh()
+        unchanged = await index.lookup("u")
+
+        loader.apps, loader.etag = {"notes": 2, "tasks": 1}, "v2"
+        clock.now = 122
+        await index.refresh()
+        return loader.calls, first, unchanged, await index.lookup("u")
+
+    calls, first, unchanged, changed = asyncio.run(run())
+    assert calls == [None, "v1", "v1"]
+    assert first == {"notes": 2}
+    # Same version: the shared view is kept, not rebuilt
+    assert unchanged is first
+    assert changed == {"notes": 2, "tasks": 1}
+
+
+def test_expired_snapshot_is_served_while_revalidating():
+    async def run():
+        clock = FakeClock()
+        loader = SnapshotLoader({"notes": 2})
+        index = AppIdIndex(loader, ttl=60, clock=clock)
+        await index.lookup("u")
+
+        loader.apps, loader.etag = {"tasks": 1}, "v2"
+        clock.now = 61
+        stale = await index.lookup("u")
+        await index._background
+        fresh = await index.lookup("u")
+        await index.aclose()
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+    assert stale == {"notes": 2}
+    assert fresh == {"tasks": 1}
+
+
+def test_local_writes_are_bounded_and_expire():
+    async def run():
+        clock = FakeClock()
+        index = AppIdIndex(SnapshotLoader({"shared": 5}), ttl=1000, max_users=2, user_ttl=30, clock=clock)
+        await index.lookup("a")
+        index.record("a", "app-a")
+        index.record("b", "app-b")
+        index.record("c", "app-c")
+        views = {user: await index.lookup(user) for user in "abc"}
+
+        clock.now = 31
+        expired = await index.lookup("c")
+        return views, expired
+
+    views, expired = asyncio.run(run())
+    # "a" was the least recently written user once "c" arrived
+    assert views["a"] == {"shared": 5}
+    assert views["b"] == {"app-b": 1, "shared": 5}
+    assert views["c"] == {"app-c": 1, "shared": 5}
+    assert expired == {"shared": 5}
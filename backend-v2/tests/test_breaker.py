@@ -0,0 +1,124 @@
+"""What counts against the upstream breakers: never a caller's deadline, our own bugs or 4xx."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.resilience import is_upstream_failure
+
+STRATEGIES = [{"name": "v2_filtered"}, {"name": "v1_plain"}]
+
+
+def status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://mem0.test/v2/memories/search/")
+    return httpx.HTTPStatusError("upstream said no", request=request, response=httpx.Response(status, request=request))
+
+
+def slow_mem0(service, monkeypatch, seconds: float) -> None:
+    async def run_strategy(index, strategy, query, user_id, limit):
+        await asyncio.sleep(seconds)
+        return []
+
+    monkeypatch.setattr(service, "_run_strategy", run_strategy)
+
+
+def test_short_deadline_leaves_mem0_breaker_closed(service, monkeypatch):
+    slow_mem0(service, monkeypatch, 0.2)
+
+    async def run():
+        for _ in range(settings.BREAKER_FAILURE_THRESHOLD + 1):
+            await service._search_sequentially(
+                "project", "u", STRATEGIES, 5, deadline=time.monotonic() + 0.01
+            )
+
+    asyncio.run(run())
+    assert service.mem0.breaker.state == "closed"
+    assert service.mem0.breaker.snapshot()["consecutive_failures"] == 0
+
+
+def test_strategy_cap_still_counts_against_mem0_breaker(service, monkeypatch):
+    slow_mem0(service, monkeypatch, 0.2)
+    monkeypatch.setattr(settings, "SEARCH_STRATEGY_TIMEOUT_SECONDS", 0.01)
+
+    asyncio.run(service._search_sequentially("project", "u", STRATEGIES[:1], 5, deadline=None))
+    assert service.mem0.breaker.snapshot()["consecutive_failures"] == 1
+
+
+def test_short_deadline_leaves_openai_breaker_closed(service, use_completions):
+    async def slow(**params):
+        await asyncio.sleep(0.2)
+
+    use_completions(slow)
+
+    async def run():
+        for _ in range(settings.BREAKER_FAILURE_THRESHOLD + 1):
+            with pytest.raises(asyncio.TimeoutError):
+                await service._hardened_enhance_with_context(
+                    prompt="I am working on", context="", user_id="u", deadline=time.monotonic() + 0.01
+                )
+
+    asyncio.run(run())
+    assert service.openai.breaker.state == "closed"
+    assert service.openai.breaker.snapshot()["consecutive_failures"] == 0
+
+
+@pytest.mark.parametrize(
+    "exc, counted",
+    [
+        (asyncio.TimeoutError(), True),
+        (httpx.ConnectError("refused"), True),
+        (httpx.ReadTimeout("slow"), True),
+        (status_error(503), True),
+        (status_error(429), True),
+        (status_error(400), False),
+        (status_error(404), False),
+        (ValueError("our own bug"), False),
+        (KeyError("results"), False),
+    ],
+)
+def test_only_timeouts_transport_errors_and_5xx_count(exc, counted):
+    assert is_upstream_failure(exc) is counted
+
+
+def test_stream_holds_its_limiter_slot_until_drained(service, use_completions, fake_stream):
+    use_completions(lambda **params: asyncio.sleep(0, fake_stream(["the", " masterbrain", " backend"])))
+    in_flight = []
+
+    async def run():
+        async for kind, _ in service._stream_hardened_completion(
+            prompt="I am working on", context="Memory: user works on the masterbrain backend", user_id="u"
+        ):
+            in_flight.append((kind, service.openai.limiter.in_flight))
+
+    asyncio.run(run())
+    tokens = [count for kind, count in in_flight if kind == "token"]
+    assert tokens and set(tokens) == {1}
+    assert in_flight[-1] == ("final", 0)
+    assert service.openai.breaker.snapshot()["consecutive_failures"] == 0
+
+
+def test_stream_body_failure_counts_against_openai_breaker(service, use_completions):
+    class BrokenStream:
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            raise httpx.RemoteProtocolError("peer closed connection")
+
+        async def close(self):
+            pass
+
+    use_completions(lambda **params: asyncio.sleep(0, BrokenStream()))
+
+    async def run():
+        return [item async for item in service._stream_hardened_completion(
+            prompt="I am working on", context="", user_id="u"
+        )]
+
+    assert asyncio.run(run()) == [("final", "I am working on")]
+    assert service.openai.breaker.snapshot()["consecutive_failures"] == 1
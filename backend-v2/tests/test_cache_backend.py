@@ -0,0 +1,46 @@
+"""The in-process cache backend behaves like the shared one: JSON copies, per-entry TTL, tag invalidation."""
+
+from __future__ import annotations
+
+import asyncio
+
+from app.services.cache import CacheNamespace, InMemoryCacheBackend
+
+
+def test_hits_are_json_copies_like_redis():
+    async def run():
+        backend = InMemoryCacheBackend(max_entries=8)
+        value = {"results": [{"memory": "a", "score": 0.9}], "scope": ("u", "app")}
+        await backend.set("k", value, ttl=60)
+        value["results"].append({"memory": "added after set"})
+
+        first = await backend.get("k")
+        first["results"].clear()
+        return await backend.get("k")
+
+    assert asyncio.run(run()) == {"results": [{"memory": "a", "score": 0.9}], "scope": ["u", "app"]}
+
+
+def test_entries_expire_and_tags_invalidate():
+    async def run():
+        backend = InMemoryCacheBackend(max_entries=8)
+        await backend.set("short", 1, ttl=0.01)
+        await backend.set("a", 2, ttl=60, tags=["user:a"])
+        await backend.set("b", 3, ttl=60, tags=["user:b"])
+        await asyncio.sleep(0.02)
+        dropped = await backend.invalidate_tags(["user:a"])
+        return dropped, [await backend.get(key) for key in ("short", "a", "b")]
+
+    assert asyncio.run(run()) == (1, [None, None, 3])
+
+
+def test_namespace_counts_hits_and_misses():
+    async def run():
+        search = CacheNamespace(InMemoryCacheBackend(max_entries=8), "search", ttl=60)
+        await search.get(("u", "query"))
+        await search.set(("u", "query"), {"results": []})
+        await search.get(("u", "query"))
+        return search.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["hits"], stats["misses"], stats["errors"]) == (1, 1, 0)
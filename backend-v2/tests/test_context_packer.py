@@ -0,0 +1,27 @@
+"""Packed context keeps retrieval order, so the same kept segments give the same prefix."""
+
+from __future__ import annotations
+
+from app.services.context_packer import ContextPacker, ContextSegment
+
+SEGMENTS = [
+    ContextSegment("Memory: user builds the masterbrain backend", 0.9, "memory"),
+    ContextSegment("Memory: user prefers fastapi for services", 0.4, "memory"),
+    ContextSegment("Memory: user deploys payments on fridays", 0.2, "memory"),
+]
+
+
+def test_kept_segments_follow_retrieval_order():
+    packer = ContextPacker(token_budget=400)
+    assert packer.pack(SEGMENTS, "payments deploys") == "\n".join(segment.text for segment in SEGMENTS)
+
+
+def test_context_does_not_depend_on_prompt_when_everything_fits():
+    packer = ContextPacker(token_budget=400)
+    assert packer.pack(SEGMENTS, "the payments service is") == packer.pack(SEGMENTS, "my fastapi project")
+
+
+def test_budget_keeps_most_relevant_but_in_retrieval_order():
+    packer = ContextPacker(token_budget=22)
+    packed = packer.pack(SEGMENTS, "payments deploys fridays")
+    assert packed == f"{SEGMENTS[0].text}\n{SEGMENTS[2].text}"
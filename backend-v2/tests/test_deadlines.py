@@ -0,0 +1,71 @@
+"""An enhancement answers within its deadline: a stage that runs out degrades to the cleaned prompt, uncached."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+PROMPT = "Help me plan  the release"
+CLEANED = "Help me plan the release"
+
+
+@pytest.fixture
+def mem0_search(service, monkeypatch):
+    """Strategy calls answer after ``delay`` seconds with one memory; returns the call log."""
+    calls = []
+    delay = {"seconds": 0.0}
+
+    async def run_strategy(index, strategy, query, user_id, limit):
+        calls.append(strategy["name"])
+        await asyncio.sleep(delay["seconds"])
+        return {"results": [{"memory": "The release ships on Friday after QA signs off"}], "relations": []}
+
+    monkeypatch.setattr(service, "_run_strategy", run_strategy)
+    return delay, calls
+
+
+def enhance(service, deadline_ms):
+    async def run():
+        started = time.perf_counter()
+        result = await service.two_stage_enhance(prompt=PROMPT, user_id="u", app_id="notes", deadline_ms=deadline_ms)
+        return result, time.perf_counter() - started
+
+    return asyncio.run(run())
+
+
+def test_slow_search_degrades_within_the_deadline_and_is_not_cached(service, mem0_search, use_completions):
+    delay, calls = mem0_search
+    delay["seconds"] = 1.0
+
+    async def completion(**params):
+        raise AssertionError("no context, no completion")
+
+    use_completions(completion)
+    result, elapsed = enhance(service, deadline_ms=200)
+    assert elapsed < 0.5
+    assert (result["timed_out_stage"], result["enhanced_prompt"]) == ("search", CLEANED)
+
+    searched = len(calls)
+    enhance(service, deadline_ms=200)
+    assert len(calls) > searched
+
+
+def test_slow_completion_degrades_to_the_cleaned_prompt(service, mem0_search, use_completions):
+    async def completion(**params):
+        await asyncio.sleep(1.0)
+
+    completions = use_completions(completion)
+    result, elapsed = enhance(service, deadline_ms=300)
+    assert completions.calls
+    assert elapsed < 0.6
+    assert (result["timed_out_stage"], result["enhanced_prompt"]) == ("completion", CLEANED)
+
+
+def test_stage_timeout_takes_the_tighter_of_deadline_and_cap(service):
+    assert service._stage_timeout(None) is None
+    assert service._stage_timeout(None, 2.0) == 2.0
+    assert service._stage_timeout(time.monotonic() + 10, 2.0) == 2.0
+    assert service._stage_timeout(time.monotonic() + 0.5, 2.0) <= 0.5
+    assert service._stage_timeout(time.monotonic() - 1) == 0.0
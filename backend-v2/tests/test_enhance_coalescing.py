@@ -0,0 +1,74 @@
+"""Concurrent enhancements only share a run when their deadline and session match."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+PROMPT = "I am working on"
+
+
+@pytest.fixture
+def runs(service, monkeypatch) -> List[Dict[str, Any]]:
+    """Replace the uncached pipeline: a short deadline comes back degraded."""
+    calls: List[Dict[str, Any]] = []
+
+    async def enhance(*, prompt, user_id, app_id, run_id, limit, deadline_ms):
+        calls.append({"run_id": run_id, "deadline_ms": deadline_ms})
+        await asyncio.sleep(0.05)
+        degraded = deadline_ms is not None and deadline_ms < 500
+        return {
+            "enhanced_prompt": prompt if degraded else f"{prompt} the masterbrain backend",
+            "timed_out_stage": "search" if degraded else None,
+            "circuit_open": None,
+        }
+
+    monkeypatch.setattr(service, "_two_stage_enhance_uncached", enhance)
+    return calls
+
+
+def test_short_deadline_leader_does_not_degrade_long_deadline_follower(service, runs):
+    async def run():
+        return await asyncio.gather(
+            service.two_stage_enhance(prompt=PROMPT, user_id="u", deadline_ms=100),
+            service.two_stage_enhance(prompt=PROMPT, user_id="u", deadline_ms=5000),
+        )
+
+    short, long = asyncio.run(run())
+    assert len(runs) == 2
+    assert short["timed_out_stage"] == "search"
+    assert long["timed_out_stage"] is None
+    assert long["enhanced_prompt"] == f"{PROMPT} the masterbrain backend"
+
+
+def test_identical_requests_still_share_one_run(service, runs):
+    async def run():
+        return await asyncio.gather(
+            *(service.two_stage_enhance(prompt=PROMPT, user_id="u", deadline_ms=5000) for _ in range(3))
+        )
+
+    results = asyncio.run(run())
+    assert len(runs) == 1
+    assert [result.get("cache_hit") for result in results].count(True) == 2
+
+
+def test_batch_items_differing_in_deadline_or_run_both_run(service, runs):
+    items = [
+        {"prompt": PROMPT, "user_id": "u", "deadline_ms": 100},
+        {"prompt": PROMPT, "user_id": "u", "deadline_ms": 5000},
+        {"prompt": PROMPT, "user_id": "u", "deadline_ms": 5000, "run_id": "typing-1"},
+        {"prompt": PROMPT, "user_id": "u", "deadline_ms": 5000, "run_id": "typing-1"},
+    ]
+
+    outcomes = asyncio.run(service.batch_enhance(items))
+
+    assert sorted((run["deadline_ms"], run["run_id"] or "") for run in runs) == [
+        (100, ""), (5000, ""), (5000, "typing-1")
+    ]
+    assert [outcome["deduplicated"] for outcome in outcomes] == [False, False, False, True]
+    assert outcomes[0]["result"]["timed_out_stage"] == "search"
+    for outcome in outcomes[1:]:
+        assert outcome["result"]["timed_out_stage"] is None
+        assert outcome["result"]["enhanced_prompt"] == f"{PROMPT} the masterbrain backend"
@@ -0,0 +1,64 @@
+""""X is" prompts are completed from context when a rule answers confidently, and OpenAI is skipped."""
+
+from __future__ import annotations
+
+import asyncio
+
+from app.services.local_completer import LocalCompleter
+from app.services.memory import AsyncMemoryService
+
+WORK_ON_LAYER = {
+    "source": "masterbrain", "relationship": "working_on", "target": "memory_layer",
+    "target_type": "project", "score": 0.95,
+}
+DEVELOPS_MASTERBRAIN = {
+    "source": "user_1", "relationship": "developing", "target": "masterbrain", "target_type": "app", "score": 0.9,
+}
+DEADLINE = {"memory": "The deadline is next Friday at noon", "score": 0.9}
+
+
+def segments(results=(), relations=()):
+    return AsyncMemoryService._context_segments({"results": list(results), "relations": list(relations)})
+
+
+def test_rules_answer_from_relations_and_memories():
+    completer = LocalCompleter(min_confidence=0.7)
+    context = segments([DEADLINE], [WORK_ON_LAYER])
+
+    entity = completer.complete("masterbrain is", context, char_max=200)
+    assert (entity.text, entity.rule) == ("masterbrain is actively working on the memory_layer project.", "entity")
+    memory = completer.complete("The deadline is", context, char_max=200)
+    assert (memory.text, memory.rule) == ("The deadline is next Friday at noon.", "memory")
+    work = completer.complete("my current project is", context, char_max=200)
+    assert (work.text, work.rule) == ("my current project is memory_layer.", "work")
+    assert all(completer.accept(answer) for answer in (entity, memory, work))
+
+
+def test_no_rule_or_weak_evidence_falls_back_to_openai():
+    completer = LocalCompleter(min_confidence=0.7)
+    context = segments([DEADLINE], [WORK_ON_LAYER])
+    assert completer.complete("Tell me about masterbrain", context, char_max=200) is None
+    assert completer.complete("the weather is", context, char_max=200) is None
+    # Answers that do not fit the completion budget are not offered
+    assert completer.complete("masterbrain is", context, char_max=20) is None
+
+    weak = completer.complete("masterbrain is", [s._replace(score=0.3) for s in context], char_max=200)
+    assert not completer.accept(weak)
+    # Two candidate projects: the winner is discounted below the threshold
+    rivals = completer.complete("my current project is", segments(relations=[WORK_ON_LAYER, DEVELOPS_MASTERBRAIN]), 200)
+    assert rivals.rule == "work" and not completer.accept(rivals)
+
+
+def test_enhancement_answers_locally_without_calling_openai(service, monkeypatch, use_completions):
+    async def run_strategy(index, strategy, query, user_id, limit):
+        return {"results": [{"memory": "The deadline is next Friday", "score": 0.9}], "relations": []}
+
+    async def completion(**params):
+        raise AssertionError("answered locally")
+
+    monkeypatch.setattr(service, "_run_strategy", run_strategy)
+    completions = use_completions(completion)
+    result = asyncio.run(service.two_stage_enhance(prompt="The deadline is", user_id="u"))
+    assert result["engine"] == "local"
+    assert result["enhanced_prompt"] == "The deadline is next Friday."
+    assert completions.calls == []
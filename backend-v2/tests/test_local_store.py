@@ -0,0 +1,67 @@
+"""Local store search stays in the user/app/run scope, survives a reopen and keeps its dedup keys bounded."""
+
+from __future__ import annotations
+
+import asyncio
+
+from app.services.local_store import LocalMemoryStore
+
+
+def memories(result):
+    return [item["memory"] for item in result["results"]]
+
+
+def test_search_ranks_within_scope_and_survives_reopen(tmp_path):
+    path = str(tmp_path / "memories.sqlite3")
+
+    async def run():
+        store = LocalMemoryStore(path)
+        await store.open()
+        await store.add("u", "notes", None, ["the deploy pipeline runs on github actions", "lunch was pasta"])
+        await store.add("u", "tasks", "run-1", ["fix the deploy pipeline cache"])
+        await store.add("other", "notes", None, ["the deploy pipeline is broken"])
+        scoped = (
+            store.search("deploy pipeline", "u"),
+            store.search("deploy pipeline", "u", app_id="notes"),
+            store.search("deploy pipeline", "u", run_id="run-1"),
+            store.search("deploy pipeline", "nobody"),
+        )
+        await store.aclose()
+
+        reopened = LocalMemoryStore(path)
+        await reopened.open()
+        after_reopen = reopened.search("deploy pipeline", "u", app_id="notes")
+        await reopened.aclose()
+        return scoped, after_reopen
+
+    (everything, notes, run_only, nobody), after_reopen = asyncio.run(run())
+    assert set(memories(everything)) == {
+        "the deploy pipeline runs on github actions",
+        "fix the deploy pipeline cache",
+    }
+    assert memories(notes) == ["the deploy pipeline runs on github actions"]
+    assert memories(run_only) == ["fix the deploy pipeline cache"]
+    assert nobody == {"results": [], "relations": []}
+    assert after_reopen == notes
+    assert notes["results"][0]["source"] == "local"
+
+
+def test_duplicates_are_skipped_and_dedup_keys_stay_bounded(tmp_path):
+    async def run():
+        store = LocalMemoryStore(str(tmp_path / "memories.sqlite3"), max_seen=2)
+        await store.open()
+        added = [
+            await store.add("u", "app", None, ["one", "two", "one"]),
+            await store.add("u", "app", None, ["three"]),
+            # "one" fell out of the dedup keys; SQLite still refuses the duplicate
+            await store.add("u", "app", None, ["one", " three "]),
+        ]
+        stats = store.stats()
+        seen = len(store._seen)
+        await store.aclose()
+        return added, stats, seen
+
+    added, stats, seen = asyncio.run(run())
+    assert added == [2, 1, 0]
+    assert stats["memories"] == 3
+    assert seen == 2
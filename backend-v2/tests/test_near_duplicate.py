@@ -0,0 +1,67 @@
+"""Near-duplicate reuse is stable across processes and never crosses changed numbers or identifiers."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.services.near_duplicate import NearDuplicateIndex, fingerprint, same_words
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def make_index(threshold: float = 0.0) -> NearDuplicateIndex:
+    return NearDuplicateIndex("test", threshold=threshold, ttl=60.0, max_scopes=8, max_per_scope=8)
+
+
+def test_fingerprint_is_stable_across_hash_seeds():
+    script = "from app.services.near_duplicate import fingerprint; print(fingerprint('my current project is'))"
+    seen = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=BACKEND_DIR,
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        for seed in ("1", "2")
+    }
+    assert seen == {str(fingerprint("my current project is"))}
+
+
+@pytest.mark.parametrize(
+    "stored, probe",
+    [
+        ("q3 revenue report for the payments team", "q4 revenue report for the payments team"),
+        ("budget plan for 2024 in the payments team", "budget plan for 2025 in the payments team"),
+        ("migrate the api to v2", "migrate the api to v3"),
+        ("deploy the payments api today", "deploy the billing api today"),
+        ("open the app settings", "open the api settings"),
+        ("I am working on", "I am working on the"),
+    ],
+)
+def test_changed_numbers_and_identifiers_are_not_reused(stored, probe):
+    index = make_index()
+    index.store("scope", stored, "stored result")
+    assert not same_words(stored, probe)
+    assert index.lookup("scope", probe) is None
+
+
+@pytest.mark.parametrize(
+    "stored, probe",
+    [
+        ("my current project is", "my current projct is"),
+        ("I am working on the masterbrain backend", "I am working on the masterbrain backnd"),
+        ("Q3 revenue report!", "q3 revenue report"),
+    ],
+)
+def test_typos_are_reused(stored, probe):
+    index = make_index(threshold=0.75)
+    index.store("scope", stored, "stored result")
+    match = index.lookup("scope", probe)
+    assert match is not None and match.value == "stored result"
@@ -0,0 +1,66 @@
+"""Relation index lookups, and their invalidation when the user writes a memory."""
+
+from __future__ import annotations
+
+import asyncio
+
+from app.services.relation_index import RelationIndex
+
+
+def relation(source: str, relationship: str, target: str, target_type: str, score: float) -> dict:
+    return {
+        "source": source, "relationship": relationship, "target": target, "target_type": target_type, "score": score
+    }
+
+
+RELATIONS = [
+    relation("alice", "working_on", "MasterBrain", "project", 0.9),
+    relation("alice", "assigned_to", "masterbrain", "task", 0.6),
+    relation("masterbrain", "is_related_to", "fastapi", "tool", 0.5),
+    # No context bucket
+    relation("alice", "likes", "masterbrain", "thing", 0.95),
+    # Below MIN_RELATION_SCORE
+    relation("bob", "working_on", "masterbrain", "project", 0.1),
+]
+
+
+def test_lookup_buckets_relations_of_an_entity_case_insensitively():
+    index = RelationIndex(ttl=60.0, max_per_user=100)
+    assert index.ingest("u", RELATIONS) > 0
+
+    groups = index.lookup("u", "MASTERBRAIN")
+
+    assert [(r.source, r.target) for r in groups["work"]] == [("alice", "MasterBrain")]
+    assert [r.relationship for r in groups["assignment"]] == ["assigned_to"]
+    assert [r.target for r in groups["project"]] == ["fastapi"]
+    assert index.lookup("someone-else", "masterbrain") == index.lookup("u", "unknown")
+
+
+def test_same_payload_token_is_not_parsed_twice():
+    index = RelationIndex(ttl=60.0, max_per_user=100)
+    first = index.ingest("u", RELATIONS, token="search-key")
+    assert first > 0
+    assert index.ingest("u", RELATIONS, token="search-key") == 0
+
+
+def test_forget_drops_the_users_relations():
+    index = RelationIndex(ttl=60.0, max_per_user=100)
+    index.ingest("u", RELATIONS)
+    index.ingest("v", RELATIONS)
+
+    assert index.forget("u") > 0
+    assert not any(index.lookup("u", "masterbrain").values())
+    assert index.lookup("v", "masterbrain")["work"]
+
+
+def test_memory_write_invalidates_indexed_relations(service, monkeypatch):
+    async def add(messages, **params):
+        return {"results": []}
+
+    monkeypatch.setattr(service.client, "add", add)
+    service._index_relations("u", {"results": [], "relations": RELATIONS}, token="search-key")
+    assert service.relation_index.lookup("u", "masterbrain")["work"]
+
+    asyncio.run(service.add_memory("u", "masterbrain", [{"role": "user", "content": "I switched to django"}]))
+
+    assert not any(service.relation_index.lookup("u", "masterbrain").values())
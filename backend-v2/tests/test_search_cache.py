@@ -0,0 +1,72 @@
+"""Mem0 searches are cached per normalized query and filters, expire, evict least recently used, and drop on writes."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.services.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def searches(service, monkeypatch):
+    """Record every Mem0 search that reaches the client."""
+    calls = []
+
+    async def search(query, **params):
+        calls.append((query, params.get("filters")))
+        return {"results": [{"memory": f"about {query}"}], "relations": []}
+
+    async def add(messages, **params):
+        return {"results": []}
+
+    monkeypatch.setattr(service.client, "search", search)
+    monkeypatch.setattr(service.client, "add", add)
+    return calls
+
+
+def test_repeat_searches_are_served_from_cache(service, searches):
+    async def run():
+        first = await service.search_memories(query="deploy  pipeline", user_id="u", app_id="notes")
+        # Whitespace-only differences share the entry
+        again = await service.search_memories(query=" deploy pipeline ", user_id="u", app_id="notes")
+        other_app = await service.search_memories(query="deploy pipeline", user_id="u", app_id="tasks")
+        return first, again, other_app
+
+    first, again, other_app = asyncio.run(run())
+    assert again == first
+    assert [filters for _, filters in searches] == [{"app_id": "notes"}, {"app_id": "tasks"}]
+    assert other_app["results"][0]["memory"] == "about deploy pipeline"
+
+
+def test_a_memory_write_drops_the_users_cached_searches(service, searches):
+    async def run():
+        await service.search_memories(query="deploy pipeline", user_id="u", app_id="notes")
+        await service.add_memory("u", "notes", [{"role": "user", "content": "the pipeline moved"}])
+        await service.search_memories(query="deploy pipeline", user_id="u", app_id="notes")
+
+    asyncio.run(run())
+    assert len(searches) == 2
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used():
+    clock = FakeClock()
+    cache = TTLCache(2, ttl=30, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+    clock.now = 31
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,85 @@
+"""Concurrent strategy execution keeps priority order; hedged fallbacks start late and losers are cancelled."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+STRATEGIES = [{"name": "app_wide_graph"}, {"name": "user_wide_graph"}, {"name": "recent"}]
+
+
+@pytest.fixture
+def strategies(service, monkeypatch):
+    """Replace Mem0 strategy calls with fakes: index -> (delay seconds, memories)."""
+    plan = {}
+    log = {"started": {}, "cancelled": []}
+    origin = time.perf_counter()
+
+    async def run_strategy(index, strategy, query, user_id, limit):
+        log["started"][index] = time.perf_counter() - origin
+        delay, memories = plan[index]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log["cancelled"].append(index)
+            raise
+        return memories
+
+    monkeypatch.setattr(service, "_run_strategy", run_strategy)
+    return plan, log
+
+
+def hit(text):
+    return {"results": [{"memory": text}], "relations": []}
+
+
+EMPTY = {"results": [], "relations": []}
+
+
+def test_parallel_prefers_priority_over_speed(service, strategies):
+    plan, log = strategies
+    plan.update({0: (0.05, hit("app")), 1: (0.0, hit("user")), 2: (0.0, EMPTY)})
+    memories, strategy, _, timed_out = asyncio.run(
+        service._search_concurrently("q", "u", STRATEGIES, 5)
+    )
+    assert (memories, strategy["name"], timed_out) == (hit("app"), "app_wide_graph", False)
+    assert sorted(log["started"]) == [0, 1, 2]
+
+
+def test_parallel_falls_through_empty_strategies(service, strategies):
+    plan, log = strategies
+    plan.update({0: (0.02, EMPTY), 1: (0.04, hit("user")), 2: (0.2, hit("recent"))})
+    started = time.perf_counter()
+    memories, strategy, time_saved, _ = asyncio.run(
+        service._search_concurrently("q", "u", STRATEGIES, 5)
+    )
+    elapsed = time.perf_counter() - started
+    assert (memories, strategy["name"]) == (hit("user"), "user_wide_graph")
+    # Strategies ran side by side, and the slower, lower-priority one was cancelled
+    assert elapsed < 0.15
+    assert time_saved > 0
+    assert log["cancelled"] == [2]
+
+
+def test_hedged_fallback_starts_after_the_delay_and_loses_to_priority(service, strategies):
+    plan, log = strategies
+    plan.update({0: (0.15, hit("app")), 1: (0.5, hit("user")), 2: (0.0, hit("recent"))})
+    memories, strategy, _, _ = asyncio.run(
+        service._search_concurrently("q", "u", STRATEGIES, 5, hedge_delay=0.05)
+    )
+    assert strategy["name"] == "app_wide_graph"
+    assert log["started"][1] >= 0.04
+    assert log["started"][2] >= log["started"][1] + 0.04
+    assert log["cancelled"] == [1]
+
+
+def test_hedged_fast_hit_never_launches_fallbacks(service, strategies):
+    plan, log = strategies
+    plan.update({0: (0.0, hit("app")), 1: (0.0, hit("user")), 2: (0.0, hit("recent"))})
+    memories, strategy, _, _ = asyncio.run(
+        service._search_concurrently("q", "u", STRATEGIES, 5, hedge_delay=0.05)
+    )
+    assert strategy["name"] == "app_wide_graph"
+    assert list(log["started"]) == [0]
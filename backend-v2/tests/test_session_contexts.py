@@ -0,0 +1,65 @@
+"""Keystrokes extending a typing session's prompt reuse its retrieval; new topics, scopes and writes search again."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def searches(service, monkeypatch):
+    """Strategy calls answer with one memory about the deploy pipeline; returns the searched queries."""
+    queries = []
+
+    async def run_strategy(index, strategy, query, user_id, limit):
+        queries.append(query)
+        return {"results": [{"memory": "Deploy pipeline runs on Kubernetes", "score": 0.9}], "relations": []}
+
+    async def add(messages, **params):
+        return {"results": []}
+
+    monkeypatch.setattr(service, "_run_strategy", run_strategy)
+    monkeypatch.setattr(service.client, "add", add)
+    return queries
+
+
+def retrieve(service, prompts, run_id="typing-1", app_id="notes"):
+    async def run():
+        return [await service._session_retrieval(prompt, "u", app_id, run_id, 5) for prompt in prompts]
+
+    return asyncio.run(run())
+
+
+def test_extending_prompts_reuse_the_sessions_retrieval(service, searches):
+    results = retrieve(service, ["I am working", "I am working on the", "I am working on the deploy pipeline", "I am"])
+    assert searches == ["I am working"]
+    assert [result["session_reused"] for result in results] == [False, True, True, True]
+    # Re-packed for the prompt, from the same retrieved memories
+    assert results[2]["memories"] == results[0]["memories"]
+    assert "Deploy pipeline" in results[2]["context"]
+
+
+def test_new_topics_other_sessions_and_scopes_search_again(service, searches):
+    retrieve(service, ["I am working on", "I am working on billing invoices export"])
+    retrieve(service, ["I am working on"], run_id="typing-2")
+    retrieve(service, ["I am working on"], app_id="tasks")
+    retrieve(service, ["I am working on"], run_id=None)
+    assert searches == [
+        "I am working on",
+        "I am working on billing invoices export",
+        "I am working on",
+        "I am working on",
+        "I am working on",
+    ]
+
+
+def test_a_memory_write_ends_reuse(service, searches):
+    async def run():
+        await service._session_retrieval("I am working", "u", "notes", "typing-1", 5)
+        await service.add_memory("u", "notes", [{"role": "user", "content": "moved to billing"}])
+        return await service._session_retrieval("I am working on", "u", "notes", "typing-1", 5)
+
+    result = asyncio.run(run())
+    assert result["session_reused"] is False
+    assert len(searches) == 2
@@ -0,0 +1,64 @@
+"""Streamed tokens are exactly what the final guardrails keep."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, List, Tuple
+
+import pytest
+
+PROMPT = "I am working on"
+
+
+def stream(
+    service, use_completions, fake_stream, tokens: List[str], prompt: str = PROMPT
+) -> Tuple[List[str], str, Any]:
+    fake = fake_stream(tokens)
+
+    async def handler(**params):
+        return fake
+
+    use_completions(handler)
+
+    async def collect():
+        streamed, final = [], None
+        async for kind, text in service._stream_hardened_completion(
+            prompt=prompt, context="Memory: user works on the masterbrain backend", user_id="u"
+        ):
+            if kind == "token":
+                streamed.append(text)
+            else:
+                final = text
+        return streamed, final
+
+    streamed, final = asyncio.run(collect())
+    return streamed, final, fake
+
+
+@pytest.mark.parametrize(
+    "tokens",
+    [
+        # Longer than the room left after the prompt
+        ["project", " backend", " index", " index", " backend", " context"],
+        ["the", " masterbrain", " backend"],
+        ["Enhanced", " prompt:", " the", " masterbrain", " backend"],
+        ['"the', " masterbrain", ' backend"'],
+        ["I am working on", " the", " masterbrain", " backend"],
+        ["the", " masterbrain,", " backend", " -", " and", " more", " words", " here"],
+    ],
+)
+def test_streamed_tokens_add_up_to_final(service, use_completions, fake_stream, tokens):
+    streamed, final, _ = stream(service, use_completions, fake_stream, tokens)
+
+    assert final != PROMPT
+    assert f"{PROMPT} {''.join(streamed)}" == final
+    assert len(final) <= service._completion_char_max(PROMPT)
+
+
+def test_stream_is_cut_once_the_budget_is_full(service, use_completions, fake_stream):
+    tokens = ["project"] + [" backend"] * 50
+    streamed, final, fake = stream(service, use_completions, fake_stream, tokens)
+
+    assert fake.closed
+    assert fake.consumed < len(tokens)
+    assert f"{PROMPT} {''.join(streamed)}" == final
@@ -0,0 +1,41 @@
+"""Context vocabularies rank content words, whitelists put the prompt first, and retrievals share one cached build."""
+
+from __future__ import annotations
+
+from app.services.context_packer import ContextSegment
+from app.services.vocabulary import VocabularyCache, build_context_vocabulary, select_vocabulary
+
+
+def test_context_words_rank_by_frequency_without_function_words():
+    vocabulary = build_context_vocabulary("Deploy the pipeline. The pipeline uses Docker; deploy Docker daily")
+    assert vocabulary.ranked == ("deploy", "pipeline", "docker", "uses", "daily")
+
+
+def test_selection_puts_prompt_words_first_and_stops_at_top_k():
+    vocabulary = build_context_vocabulary("pipeline pipeline docker release")
+    assert select_vocabulary("Fix the Release notes", vocabulary, top_k=5) == [
+        "fix", "release", "notes", "pipeline", "docker",
+    ]
+    # Function words fill up what prompt and context leave
+    assert select_vocabulary("", build_context_vocabulary("docker"), top_k=3) == ["docker", "the", "a"]
+
+
+def test_cache_builds_once_per_key_and_evicts_least_recently_used():
+    cache = VocabularyCache(max_entries=2)
+    first = cache.get("a", "alpha words")
+    assert cache.get("a", "ignored on a hit") is first
+    cache.get("b", "beta")
+    cache.get("a", "alpha words")
+    cache.get("c", "gamma")
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert cache.get("b", "beta again").ranked == ("beta", "again")
+    assert cache.misses == 4
+
+
+def test_prompts_over_the_same_retrieval_share_its_vocabulary(service):
+    segments = [ContextSegment("The release ships Friday", 0.9, "memory")]
+    first = service._segments_vocabulary(segments)
+    again = service._segments_vocabulary(list(segments))
+    assert again is first
+    assert (service.vocabulary_cache.hits, service.vocabulary_cache.misses) == (1, 1)
+    assert service._segments_vocabulary([]) is None
@@ -0,0 +1,134 @@
+"""A failing batch backs off without holding up other keys, only upstream failures are retried,
+a dead worker is replaced and a timed-out shutdown reports what it dropped."""
+
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+
+from app.services.write_queue import MemoryWriteQueue, WriteKey
+
+
+def make_queue(writer, **overrides) -> MemoryWriteQueue:
+    params = dict(flush_interval=0.01, max_batch=20, max_retries=3, backoff=0.2, max_depth=100, max_concurrent=2)
+    params.update(overrides)
+    return MemoryWriteQueue(writer, **params)
+
+
+def test_backing_off_batch_does_not_block_other_keys():
+    async def run():
+        written = []
+
+        async def writer(key, messages):
+            if key.user_id == "bad":
+                raise httpx.ConnectError("mem0 down")
+            written.append(key)
+
+        queue = make_queue(writer)
+        queue.start()
+        queue.enqueue(WriteKey("bad", "app", None, False), [{"role": "user", "content": "a"}])
+        await asyncio.sleep(0.05)
+        queue.enqueue(WriteKey("good", "app", None, False), [{"role": "user", "content": "b"}])
+        await asyncio.sleep(0.05)
+        # The bad batch is still backing off while the good one is already written
+        assert written == [WriteKey("good", "app", None, False)]
+        await queue.close(timeout=0.01)
+
+    asyncio.run(run())
+
+
+def test_one_batch_per_key_at_a_time_keeps_order():
+    async def run():
+        order = []
+
+        async def writer(key, messages):
+            await asyncio.sleep(0.02)
+            order.extend(message["content"] for message in messages)
+
+        queue = make_queue(writer, max_batch=1)
+        queue.start()
+        for content in "abc":
+            queue.enqueue(WriteKey("u", "app", None, False), [{"role": "user", "content": content}])
+            await asyncio.sleep(0.001)
+        await queue.close(timeout=1.0)
+        return order
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+
+
+def test_enqueue_restarts_a_dead_worker():
+    async def run():
+        written = []
+
+        async def writer(key, messages):
+            written.append(key)
+
+        queue = make_queue(writer)
+        queue.start()
+        queue._worker.cancel()
+        await asyncio.sleep(0)
+        queue.enqueue(WriteKey("u", "app", None, False), [{"role": "user", "content": "a"}])
+        assert not queue._worker.done()
+        await queue.close(timeout=1.0)
+        return written
+
+    assert asyncio.run(run()) == [WriteKey("u", "app", None, False)]
+
+
+def test_client_errors_are_dropped_without_retrying():
+    async def run():
+        calls = []
+
+        async def writer(key, messages):
+            calls.append(key)
+            request = httpx.Request("POST", "https://mem0.test/v1/memories/")
+            raise httpx.HTTPStatusError("bad request", request=request, response=httpx.Response(400, request=request))
+
+        queue = make_queue(writer, backoff=0.001)
+        queue.start()
+        queue.enqueue(WriteKey("u", "app", None, False), [{"role": "user", "content": "a"}])
+        await queue.close(timeout=1.0)
+        return len(calls), queue.status()
+
+    calls, status = asyncio.run(run())
+    assert calls == 1
+    assert (status["retries"], status["failed"], status["dropped"]) == (0, 1, 0)
+
+
+def test_upstream_failures_are_retried():
+    async def run():
+        calls = []
+
+        async def writer(key, messages):
+            calls.append(key)
+            if len(calls) < 3:
+                raise asyncio.TimeoutError()
+
+        queue = make_queue(writer, backoff=0.001)
+        queue.start()
+        queue.enqueue(WriteKey("u", "app", None, False), [{"role": "user", "content": "a"}])
+        await queue.close(timeout=1.0)
+        return len(calls), queue.status()
+
+    calls, status = asyncio.run(run())
+    assert calls == 3
+    assert (status["retries"], status["flushed"], status["failed"]) == (2, 1, 0)
+
+
+def test_shutdown_timeout_counts_dropped_messages():
+    async def run():
+        async def writer(key, messages):
+            await asyncio.sleep(10)
+
+        queue = make_queue(writer, max_concurrent=1)
+        queue.start()
+        queue.enqueue(WriteKey("a", "app", None, False), [{"role": "user", "content": "1"}] * 2)
+        queue.enqueue(WriteKey("b", "app", None, False), [{"role": "user", "content": "2"}] * 3)
+        await asyncio.sleep(0.05)
+        await queue.close(timeout=0.05)
+        return queue.status()
+
+    status = asyncio.run(run())
+    assert status["dropped"] == 5
+    assert status["depth"] == 0